@@ -1,16 +1,163 @@
+import asyncio
+import hashlib
+import hmac
+import logging
 import os
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+import time
+from collections import deque
+from statistics import median, quantiles
+from typing import Deque, Dict, Optional
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+from sqlalchemy import event, exc, text
+
+logger = logging.getLogger(__name__)
 
 # Database URL - Update with your MySQL credentials
 # Can be overridden with DATABASE_URL environment variable
 DATABASE_URL = os.getenv("DATABASE_URL", "mysql+aiomysql://root:@localhost/skillpath")
 
+# Read replica used by read-only routes (get_read_db); unset sends every read to DATABASE_URL
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL", "")
+# A client's reads stay on the primary this long after one of its own writes
+READ_STICKY_SECONDS = float(os.getenv("READ_STICKY_SECONDS", "5"))
+# Replication lag above which reads go to the primary
+READ_MAX_LAG_SECONDS = float(os.getenv("READ_MAX_LAG_SECONDS", "5"))
+# How often the replica's health and lag are checked, and how long a check may take
+READ_CHECK_INTERVAL = float(os.getenv("READ_CHECK_INTERVAL", "5"))
+READ_CHECK_TIMEOUT = 2.0
+# Signed time of the client's last write, set on write responses (header and cookie) and
+# sent back by the client, so stickiness holds whichever worker process serves the read
+LAST_WRITE_HEADER = "X-Last-Write"
+LAST_WRITE_COOKIE = "last_write"
+
+# Engine profile: dev (SQL statements logged), test (no pooling) or prod
+DB_PROFILE = os.getenv("DB_PROFILE", "dev")
+
+ENGINE_PROFILES = {
+    "dev": {
+        "echo": True,
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_timeout": 30,
+        "pool_recycle": 3600,
+        "pool_pre_ping": True,
+        "query_cache_size": 500,
+        "log_level": logging.INFO,
+    },
+    # Each test gets fresh connections, so nothing leaks between event loops
+    "test": {
+        "echo": False,
+        "poolclass": NullPool,
+        "query_cache_size": 500,
+        "log_level": logging.WARNING,
+    },
+    "prod": {
+        "echo": False,
+        "pool_size": 20,
+        "max_overflow": 10,
+        "pool_timeout": 10,
+        # Below MySQL's wait_timeout, so the server never closes a pooled connection first
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "query_cache_size": 1200,
+        "log_level": logging.WARNING,
+    },
+}
+
+# aiomysql connection options (MySQL URLs only)
+MYSQL_CONNECT_ARGS = {
+    "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "10")),
+    "charset": "utf8mb4",
+}
+
+# Checkout wait times kept for the percentiles in pool_stats()
+POOL_WAIT_SAMPLES = 1000
+
+
+class PoolMetrics:
+    """Connection checkouts, time spent waiting for one, overflow connections and timeouts."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.overflow_connections = 0
+        self.timeouts = 0
+        self.wait_ms: Deque[float] = deque(maxlen=POOL_WAIT_SAMPLES)
+
+    def stats(self) -> Dict:
+        waits = list(self.wait_ms) or [0.0]
+        p95 = quantiles(waits, n=20)[-1] if len(waits) > 1 else waits[0]
+        return {
+            "checkouts": self.checkouts,
+            "overflow_connections": self.overflow_connections,
+            "timeouts": self.timeouts,
+            "wait_ms": {"p50": round(median(waits), 2), "p95": round(p95, 2), "max": round(max(waits), 2)},
+        }
+
+
+pool_metrics = PoolMetrics()
+replica_pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool recording checkout waits, overflow connections and timeouts."""
+
+    metrics = pool_metrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.checkouts += 1
+            self.metrics.wait_ms.append((time.perf_counter() - start) * 1000)
+
+    def _create_connection(self):
+        # _overflow counts up from -pool_size: above 0 the pool is past its size
+        if self._overflow > 0:
+            self.metrics.overflow_connections += 1
+        return super()._create_connection()
+
+
+class ReplicaQueuePool(InstrumentedQueuePool):
+    """Pool of the read replica engine, with its own metrics."""
+
+    metrics = replica_pool_metrics
+
+
+def engine_options(profile: str, url: str, poolclass: type = InstrumentedQueuePool) -> Dict:
+    """create_async_engine() keyword arguments for a profile, with DB_* overrides."""
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"DB_PROFILE must be one of {', '.join(ENGINE_PROFILES)}")
+    options = dict(ENGINE_PROFILES[profile])
+    options.pop("log_level")
+    if "poolclass" not in options:
+        options["poolclass"] = poolclass
+        for name, env in (
+            ("pool_size", "DB_POOL_SIZE"),
+            ("max_overflow", "DB_MAX_OVERFLOW"),
+            ("pool_timeout", "DB_POOL_TIMEOUT"),
+            ("pool_recycle", "DB_POOL_RECYCLE"),
+        ):
+            if os.getenv(env):
+                options[name] = type(options[name])(os.getenv(env))
+    if os.getenv("DB_ECHO"):
+        options["echo"] = os.getenv("DB_ECHO").lower() == "true"
+    if url.startswith("mysql+aiomysql"):
+        options["connect_args"] = MYSQL_CONNECT_ARGS
+    return options
+
+
 # Create async engine
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True
-)
+_engine_options = engine_options(DB_PROFILE, DATABASE_URL)
+engine = create_async_engine(DATABASE_URL, **_engine_options)
+if not _engine_options["echo"]:
+    logging.getLogger("sqlalchemy.engine").setLevel(ENGINE_PROFILES[DB_PROFILE]["log_level"])
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -19,10 +166,198 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False
 )
 
+# Read replica engine and session factory (None without READ_DATABASE_URL)
+read_engine: Optional[AsyncEngine] = None
+ReadSessionLocal: Optional[async_sessionmaker] = None
+if READ_DATABASE_URL:
+    read_engine = create_async_engine(
+        READ_DATABASE_URL, **engine_options(DB_PROFILE, READ_DATABASE_URL, ReplicaQueuePool)
+    )
+    ReadSessionLocal = async_sessionmaker(
+        read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+
 # Base class for models
 Base = declarative_base()
 
 
+def client_key(request: Request) -> Optional[str]:
+    """Identify the client by a hash of its bearer token (None for anonymous requests)."""
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode()).hexdigest()
+
+
+def _last_write_signature(written_at: str, client: Optional[str]) -> str:
+    # Lazy import: app.core.security imports this module
+    from app.core.security import SECRET_KEY
+    message = f"{written_at}:{client or ''}".encode()
+    return hmac.new(SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()[:32]
+
+
+def last_write_token(client: Optional[str]) -> str:
+    """Value of LAST_WRITE_HEADER/LAST_WRITE_COOKIE for a write made now by client."""
+    written_at = str(int(time.time() * 1000))
+    return f"{written_at}.{_last_write_signature(written_at, client)}"
+
+
+def wrote_recently(request: Request) -> bool:
+    """
+    Whether the request carries a valid last-write token (header or cookie) of
+    this client younger than READ_STICKY_SECONDS.
+    """
+    token = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    if not token or "." not in token:
+        return False
+    written_at, signature = token.split(".", 1)
+    if not written_at.isdigit():
+        return False
+    age = time.time() - int(written_at) / 1000
+    if not -READ_STICKY_SECONDS < age < READ_STICKY_SECONDS:
+        return False
+    return hmac.compare_digest(signature, _last_write_signature(written_at, client_key(request)))
+
+
+async def _replication_lag(conn: AsyncConnection) -> float:
+    """
+    Seconds the replica is behind its source. A server that is not replicating
+    (e.g. a second local instance) has no lag; stopped replication has infinite lag.
+    """
+    if conn.dialect.name != "mysql":
+        await conn.execute(text("SELECT 1"))
+        return 0.0
+    try:
+        row = (await conn.execute(text("SHOW REPLICA STATUS"))).mappings().first()
+        column = "Seconds_Behind_Source"
+    except exc.DBAPIError:
+        # MySQL before 8.0.22 and MariaDB
+        row = (await conn.execute(text("SHOW SLAVE STATUS"))).mappings().first()
+        column = "Seconds_Behind_Master"
+    if row is None:
+        return 0.0
+    lag = row[column]
+    return float(lag) if lag is not None else float("inf")
+
+
+class ReadReplica:
+    """
+    Routes reads to the replica while it is up and close enough to the primary.
+
+    Health and lag are checked in the background at most every READ_CHECK_INTERVAL
+    seconds, so routing a read never waits on a check. A client that just wrote
+    (see wrote_recently) reads from the primary for READ_STICKY_SECONDS, so it sees
+    its own writes.
+    """
+
+    def __init__(self, engine: Optional[AsyncEngine]):
+        self.engine = engine
+        # Reads use the primary until the first check succeeds
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self._check_task: Optional[asyncio.Task] = None
+        self.reads = {"replica": 0, "sticky": 0, "lagging": 0, "down": 0}
+
+    async def check(self) -> None:
+        """Probe the replica and record whether it is up and how far behind it is."""
+        if self.engine is None:
+            return
+        try:
+            lag = await asyncio.wait_for(self._probe(), READ_CHECK_TIMEOUT)
+        except Exception as e:
+            if self.healthy or self.checked_at is None:
+                logger.warning("Read replica unavailable, reading from the primary: %s", e)
+            self.healthy, self.lag = False, None
+        else:
+            if not self.healthy and self.checked_at is not None:
+                logger.info("Read replica available again")
+            self.healthy, self.lag = True, lag
+        self.checked_at = time.monotonic()
+
+    async def _probe(self) -> float:
+        async with self.engine.connect() as conn:
+            return await _replication_lag(conn)
+
+    def _schedule_check(self) -> None:
+        due = self.checked_at is None or time.monotonic() - self.checked_at >= READ_CHECK_INTERVAL
+        if due and (self._check_task is None or self._check_task.done()):
+            self._check_task = asyncio.create_task(self.check())
+
+    def mark_down(self) -> None:
+        """Stop using the replica until the next check finds it up."""
+        self.healthy = False
+        self.checked_at = None
+
+    def route(self, sticky: bool = False) -> str:
+        """Where a read goes: "primary" without a replica, else "replica" or why not."""
+        if self.engine is None:
+            return "primary"
+        self._schedule_check()
+        if not self.healthy:
+            target = "down"
+        elif self.lag > READ_MAX_LAG_SECONDS:
+            target = "lagging"
+        elif sticky:
+            target = "sticky"
+        else:
+            target = "replica"
+        self.reads[target] += 1
+        return target
+
+    def stats(self) -> Dict:
+        return {
+            "healthy": self.healthy,
+            # None while down, or when replication is stopped
+            "lag_seconds": self.lag if self.lag != float("inf") else None,
+            "reads": dict(self.reads),
+        }
+
+
+read_replica = ReadReplica(read_engine)
+
+if read_engine is not None:
+    @event.listens_for(read_engine.sync_engine, "handle_error")
+    def _replica_disconnected(context) -> None:
+        # A lost replica stops taking reads now, not at the next scheduled check
+        if context.is_disconnect:
+            read_replica.mark_down()
+
+
+def read_sessionmaker(sticky: bool = False) -> async_sessionmaker:
+    """
+    Session factory for a read: the replica's, or the primary's (see ReadReplica.route).
+    sticky: the client wrote recently and must read from the primary.
+    """
+    if read_replica.route(sticky) == "replica":
+        return ReadSessionLocal
+    return AsyncSessionLocal
+
+
+def _pool_stats(engine: AsyncEngine, metrics: PoolMetrics) -> Dict:
+    pool = engine.sync_engine.pool
+    occupancy = {}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        occupancy = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        }
+    return {"pool": type(pool).__name__, **occupancy, **metrics.stats()}
+
+
+def pool_stats() -> Dict:
+    """Profile, pool occupancy and PoolMetrics of the engine, and of the read replica."""
+    stats = {"profile": DB_PROFILE, **_pool_stats(engine, pool_metrics)}
+    if read_engine is not None:
+        stats["replica"] = {**read_replica.stats(), **_pool_stats(read_engine, replica_pool_metrics)}
+    return stats
+
+
 # Dependency to get DB session
 async def get_db():
     async with AsyncSessionLocal() as session:
@@ -30,3 +365,26 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+
+# Dependency to get a DB session for read-only routes (replica when available)
+async def get_read_db(request: Request):
+    """
+    Session for a read-only route. A replica session checks out its connection
+    here (pool_pre_ping tests it), so a replica that cannot be reached is marked
+    down and the request is retried once on the primary instead of failing.
+    """
+    sessionmaker = read_sessionmaker(wrote_recently(request))
+    session = sessionmaker()
+    if sessionmaker is ReadSessionLocal:
+        try:
+            await session.connection()
+        except (exc.OperationalError, exc.DisconnectionError) as e:
+            logger.warning("Read replica unreachable, reading from the primary: %s", e)
+            read_replica.mark_down()
+            await session.close()
+            session = AsyncSessionLocal()
+    try:
+        yield session
+    finally:
+        await session.close()
@@ -0,0 +1,334 @@
+import asyncio
+import copy
+import logging
+import os
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.config.database import AsyncSessionLocal, read_sessionmaker
+from app.models.formation import Formation
+from app.models.job import Job
+from app.core.catalog_index import BM25Index, tokenize
+from app.core.catalog_events import CatalogEvent, subscribe
+from app.core.persistent import ChunkedList, OverlayMap
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip when loading the snapshot
+LOAD_BATCH_SIZE = 5000
+
+# Writes made outside this process (other workers, seed_db.py, SQL) are not published
+# to it: every CATALOG_CHECK_SECONDS the snapshot's row counts and highest ids are
+# compared with the database's and the snapshot is reloaded when they differ. Edits
+# that keep both unchanged are picked up by a full reload after CATALOG_MAX_AGE_SECONDS.
+# 0 disables either.
+CATALOG_CHECK_SECONDS = float(os.getenv("CATALOG_CHECK_SECONDS", "30"))
+CATALOG_MAX_AGE_SECONDS = float(os.getenv("CATALOG_MAX_AGE_SECONDS", "900"))
+
+# (formation count, highest formation id, job count, highest job id)
+CatalogMarker = Tuple[int, int, int, int]
+
+
+class FormationRecord:
+    """Compact read-only view of a formation row."""
+    __slots__ = ("id", "titre", "description", "text")
+
+    def __init__(self, id: int, titre: str, description: Optional[str]):
+        self.id = id
+        self.titre = titre
+        self.description = description
+        # Lowercased title + description, matched against user keywords
+        self.text = f"{titre} {description or ''}".lower()
+
+
+class JobRecord:
+    """Compact read-only view of a job row."""
+    __slots__ = ("id", "titre", "description", "requirements", "text")
+
+    def __init__(self, id: int, titre: str, description: Optional[str], requirements: Optional[List[str]]):
+        self.id = id
+        self.titre = titre
+        self.description = description
+        self.requirements = tuple(requirements or ())
+        self.text = f"{titre} {description or ''}".lower()
+
+
+def formation_tokens(record: FormationRecord) -> List[str]:
+    """Formations are matched on title + description."""
+    return tokenize(record.text)
+
+
+def job_tokens(record: JobRecord) -> List[str]:
+    """Jobs are matched on their requirements."""
+    return [token for req in record.requirements for token in tokenize(req)]
+
+
+class CatalogSnapshot:
+    """
+    Formations and jobs held in memory, with BM25 indexes for keyword scoring.
+
+    A snapshot is never modified once published: catalog writes produce a new
+    snapshot (see apply) that shares everything the write did not touch, down
+    to the record chunks and index columns, so a write costs the size of the
+    change rather than of the catalog. Rows of deleted records are left as None holes.
+    """
+
+    def __init__(self, formations: List[FormationRecord], jobs: List[JobRecord], version: int = 0):
+        self.version = version
+        self.formations: Sequence[Optional[FormationRecord]] = ChunkedList(formations)
+        self.jobs: Sequence[Optional[JobRecord]] = ChunkedList(jobs)
+        # id -> position, also used to validate IDs returned by the AI
+        self.formation_rows: OverlayMap = OverlayMap({f.id: row for row, f in enumerate(formations)})
+        self.job_rows: OverlayMap = OverlayMap({j.id: row for row, j in enumerate(jobs)})
+        self.formation_index = BM25Index(formation_tokens(f) for f in formations)
+        self.job_index = BM25Index(job_tokens(j) for j in jobs)
+
+    def iter_formations(self) -> Iterator[FormationRecord]:
+        """Live formations in catalog order."""
+        return (f for f in self.formations if f is not None)
+
+    def iter_jobs(self) -> Iterator[JobRecord]:
+        """Live jobs in catalog order."""
+        return (j for j in self.jobs if j is not None)
+
+    def apply(self, events: List[CatalogEvent]) -> "CatalogSnapshot":
+        """Return a new snapshot (next version) with the events applied incrementally."""
+        snapshot = copy.copy(self)
+        snapshot.version = self.version + 1
+        formation_events = [e for e in events if e.kind == "formation"]
+        if formation_events:
+            snapshot.formations, snapshot.formation_rows, snapshot.formation_index = _apply_events(
+                self.formations, self.formation_rows, self.formation_index,
+                formation_events, FormationRecord, formation_tokens
+            )
+        job_events = [e for e in events if e.kind == "job"]
+        if job_events:
+            snapshot.jobs, snapshot.job_rows, snapshot.job_index = _apply_events(
+                self.jobs, self.job_rows, self.job_index,
+                job_events, JobRecord, job_tokens
+            )
+        return snapshot
+
+    def marker(self) -> CatalogMarker:
+        """Row counts and highest ids, as load_catalog_marker() reads them from the database."""
+        return (
+            len(self.formation_rows), max(self.formation_rows, default=0),
+            len(self.job_rows), max(self.job_rows, default=0),
+        )
+
+    def memory_usage(self) -> Dict[str, float]:
+        """Approximate memory held by the snapshot, in bytes."""
+        records_bytes = sys.getsizeof(self.formations) + sys.getsizeof(self.jobs)
+        records_bytes += sum(_record_size(r) for r in self.iter_formations())
+        records_bytes += sum(_record_size(r) for r in self.iter_jobs())
+        index_bytes = sys.getsizeof(self.formation_rows) + sys.getsizeof(self.job_rows)
+        index_bytes += self.formation_index.memory_usage() + self.job_index.memory_usage()
+        rows = len(self.formation_rows) + len(self.job_rows)
+        total = records_bytes + index_bytes
+        return {
+            "records_bytes": records_bytes,
+            "index_bytes": index_bytes,
+            "total_bytes": total,
+            "bytes_per_row": round(total / rows, 1) if rows else 0.0,
+        }
+
+
+def _apply_events(
+    records: ChunkedList,
+    rows: OverlayMap,
+    index: BM25Index,
+    events: List[CatalogEvent],
+    make_record: Callable,
+    tokens_of: Callable
+) -> Tuple[ChunkedList, OverlayMap, BM25Index]:
+    """Apply events of one kind: new records/rows/index sharing everything the events did not touch."""
+    changed: Dict[int, Optional[object]] = {}  # row -> record (None once deleted)
+    assigned: Dict[int, int] = {}  # id -> row of records added by the events
+    deleted: Set[int] = set()
+    removed: Dict[int, List[str]] = {}
+    added: Dict[int, List[str]] = {}
+    n_rows = len(records)
+    for event in events:
+        row = assigned.get(event.id)
+        if row is None and event.id not in deleted:
+            row = rows.get(event.id)
+        if row is not None and row not in removed and row not in added:
+            # First change to an indexed document in this batch
+            removed[row] = tokens_of(records[row])
+        if event.action == "delete":
+            if row is not None:
+                changed[row] = None
+                if assigned.pop(event.id, None) is None:
+                    deleted.add(event.id)
+                added.pop(row, None)
+        else:
+            if row is None:
+                row = n_rows
+                n_rows += 1
+                assigned[event.id] = row
+            record = make_record(event.id, **event.values)
+            changed[row] = record
+            added[row] = tokens_of(record)
+    return records.updated(changed), rows.updated(assigned, deleted), index.update(removed, added)
+
+
+def _record_size(record) -> int:
+    """Size of a record and the values it holds."""
+    size = sys.getsizeof(record)
+    for slot in record.__slots__:
+        value = getattr(record, slot)
+        size += sys.getsizeof(value)
+        if isinstance(value, tuple):
+            size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+async def load_catalog(sessionmaker: async_sessionmaker = AsyncSessionLocal) -> CatalogSnapshot:
+    """Load the catalog with column-only projections (no ORM objects)."""
+    async with sessionmaker() as session:
+        result = await session.stream(
+            select(Formation.id, Formation.titre, Formation.description)
+            .order_by(Formation.id)
+            .execution_options(yield_per=LOAD_BATCH_SIZE)
+        )
+        formations = [FormationRecord(*row) async for row in result]
+
+        result = await session.stream(
+            select(Job.id, Job.titre, Job.description, Job.requirements)
+            .order_by(Job.id)
+            .execution_options(yield_per=LOAD_BATCH_SIZE)
+        )
+        jobs = [JobRecord(*row) async for row in result]
+    return CatalogSnapshot(formations, jobs)
+
+
+async def load_catalog_marker() -> CatalogMarker:
+    """Row counts and highest ids of the formations and jobs tables (on the primary)."""
+    async with AsyncSessionLocal() as session:
+        formations = (await session.execute(select(func.count(Formation.id), func.max(Formation.id)))).one()
+        jobs = (await session.execute(select(func.count(Job.id), func.max(Job.id)))).one()
+    return (formations[0], formations[1] or 0, jobs[0], jobs[1] or 0)
+
+
+_catalog: Optional[CatalogSnapshot] = None
+# time.monotonic() of the last full load
+_loaded_at = 0.0
+_watch_task: Optional[asyncio.Task] = None
+_catalog_lock = asyncio.Lock()
+# Bumped on every catalog write so a load racing with a write is redone
+_generation = 0
+_refresh_task: Optional[asyncio.Task] = None
+
+
+async def refresh_catalog() -> CatalogSnapshot:
+    """Reload the snapshot from the database and swap it in."""
+    global _catalog, _loaded_at
+    async with _catalog_lock:
+        sessionmaker = read_sessionmaker()
+        while True:
+            generation = _generation
+            catalog = await load_catalog(sessionmaker)
+            if generation == _generation:
+                break
+            # The replica may not have the racing write yet
+            sessionmaker = AsyncSessionLocal
+        catalog.version = _catalog.version + 1 if _catalog is not None else 1
+        _catalog = catalog
+        _loaded_at = time.monotonic()
+    usage = catalog.memory_usage()
+    logger.info(
+        "Catalog snapshot loaded: %d rows, %.1f bytes/row",
+        len(catalog.formation_rows) + len(catalog.job_rows), usage["bytes_per_row"]
+    )
+    return catalog
+
+
+async def get_catalog() -> CatalogSnapshot:
+    """
+    Return the process-wide snapshot. Only the very first call hits the database;
+    afterwards the snapshot follows published writes and the watch task (see
+    CATALOG_CHECK_SECONDS).
+    """
+    catalog = _catalog
+    if catalog is None:
+        # Concurrent first callers share a single load
+        catalog = await asyncio.shield(_start_refresh())
+    return catalog
+
+
+def peek_catalog() -> Optional[CatalogSnapshot]:
+    """Return the current snapshot without loading it."""
+    return _catalog
+
+
+def _start_refresh() -> asyncio.Task:
+    """Start a refresh unless one is already running."""
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(refresh_catalog())
+        _refresh_task.add_done_callback(_log_refresh_error)
+    return _refresh_task
+
+
+def _log_refresh_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Catalog snapshot refresh failed", exc_info=task.exception())
+
+
+async def _catalog_is_stale(catalog: CatalogSnapshot) -> bool:
+    if CATALOG_MAX_AGE_SECONDS > 0 and time.monotonic() - _loaded_at >= CATALOG_MAX_AGE_SECONDS:
+        return True
+    # Published writes keep the snapshot's marker in step with the database's
+    return await load_catalog_marker() != catalog.marker()
+
+
+async def _watch_catalog() -> None:
+    while True:
+        await asyncio.sleep(CATALOG_CHECK_SECONDS)
+        catalog = _catalog
+        if catalog is None:
+            continue
+        try:
+            if await _catalog_is_stale(catalog):
+                logger.info("Catalog changed outside this process, reloading the snapshot")
+                await asyncio.shield(_start_refresh())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Catalog snapshot check failed: %s", e)
+
+
+def start_catalog_watch() -> None:
+    """Start checking the snapshot against the database (app startup)."""
+    global _watch_task
+    if CATALOG_CHECK_SECONDS > 0 and (_watch_task is None or _watch_task.done()):
+        _watch_task = asyncio.create_task(_watch_catalog())
+
+
+async def stop_catalog_watch() -> None:
+    global _watch_task
+    task, _watch_task = _watch_task, None
+    if task is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+def _apply_catalog_events(events: List[CatalogEvent]) -> None:
+    """
+    Apply committed catalog writes to the snapshot.
+    The new version is swapped in with a single assignment, so readers see
+    either the previous snapshot or the fully updated one.
+    """
+    global _catalog, _generation
+    _generation += 1
+    if _catalog is not None:
+        try:
+            _catalog = _catalog.apply(events)
+        except Exception:
+            logger.exception("Could not apply catalog events, reloading the snapshot")
+            _start_refresh()
+
+
+subscribe(_apply_catalog_events)
@@ -0,0 +1,37 @@
+import logging
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogEvent(NamedTuple):
+    """A committed change to a formation or job."""
+    kind: str  # "formation" or "job"
+    action: str  # "upsert" or "delete"
+    id: int
+    values: Optional[Dict] = None  # Column values for upserts
+
+
+CatalogHandler = Callable[[List[CatalogEvent]], None]
+
+_handlers: List[CatalogHandler] = []
+
+
+def subscribe(handler: CatalogHandler) -> None:
+    """Register a handler called with every batch of published events."""
+    _handlers.append(handler)
+
+
+def publish(*events: CatalogEvent) -> None:
+    """
+    Publish events as one batch. Call after the change is committed: a failing
+    handler is logged and skipped, it cannot fail the write that was made.
+    """
+    batch = list(events)
+    if not batch:
+        return
+    for handler in _handlers:
+        try:
+            handler(batch)
+        except Exception:
+            logger.exception("Catalog event handler %s failed", getattr(handler, "__qualname__", handler))
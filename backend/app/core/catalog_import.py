@@ -0,0 +1,218 @@
+import codecs
+import csv
+import json
+import os
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import exc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud import formation as crud_formation
+from app.crud import job as crud_job
+from app.models.category import Category
+from app.schemas.formation import FormationCreate
+from app.schemas.job import JobCreate
+
+# Rows per multi-row INSERT and commit
+IMPORT_CHUNK_ROWS = int(os.getenv("IMPORT_CHUNK_ROWS", "500"))
+# Row errors listed in the report; further errors are only counted
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+# Longest line (or quoted CSV record) accepted, so a malformed upload cannot fill memory
+IMPORT_MAX_RECORD_CHARS = 1024 * 1024
+
+IMPORT_SCHEMAS = {"formations": FormationCreate, "jobs": JobCreate}
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# CSV cells holding a list: a JSON array, or values separated by ";"
+CSV_LIST_FIELDS = {"requirements"}
+
+Record = Tuple[int, Union[Dict, Exception]]
+
+
+class ImportAborted(ValueError):
+    """The upload cannot be read any further (not UTF-8, oversized record)."""
+
+
+class ImportReport:
+    """Row counts and the first IMPORT_MAX_ERRORS row errors of an import."""
+
+    def __init__(self, kind: str, upload_format: str):
+        self.kind = kind
+        self.format = upload_format
+        self.rows = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[Dict] = []
+        self.aborted: Optional[str] = None
+
+    def fail(self, row: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+    def to_dict(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "format": self.format,
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "aborted": self.aborted,
+        }
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode an UTF-8 byte stream (BOM allowed) into lines, holding one partial line at most."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line.rstrip("\r")
+            if len(pending) > IMPORT_MAX_RECORD_CHARS:
+                raise ImportAborted(f"Line longer than {IMPORT_MAX_RECORD_CHARS} characters")
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise ImportAborted("Upload is not valid UTF-8")
+    if pending.strip():
+        yield pending.rstrip("\r")
+
+
+def _csv_cell(field: str, value: str):
+    if field in CSV_LIST_FIELDS:
+        if value == "":
+            return []
+        if value.lstrip().startswith("["):
+            return json.loads(value)
+        return [item.strip() for item in value.split(";") if item.strip()]
+    return value if value != "" else None
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    """
+    (row number, column dict or error) for each CSV row after the header.
+    Lines are joined while a quoted field is open, so cells may contain newlines.
+    """
+    header: Optional[List[str]] = None
+    record: Optional[str] = None
+    row = 0
+    async for line in lines:
+        record = line if record is None else record + "\n" + line
+        if record.count('"') % 2:
+            if len(record) > IMPORT_MAX_RECORD_CHARS:
+                raise ImportAborted(f"CSV record longer than {IMPORT_MAX_RECORD_CHARS} characters")
+            continue
+        text, record = record, None
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        try:
+            yield row, {field: _csv_cell(field, value) for field, value in zip(header, values)}
+        except ValueError as e:
+            yield row, ValueError(f"Invalid list: {e}")
+    if record is not None:
+        yield row + 1, ValueError("Unterminated quoted field")
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    """(row number, object or error) for each non-blank NDJSON line."""
+    row = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            value = json.loads(line)
+        except ValueError as e:
+            yield row, ValueError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(value, dict):
+            yield row, ValueError("Expected a JSON object")
+            continue
+        yield row, value
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+async def _insert_chunk(
+    db: AsyncSession,
+    kind: str,
+    chunk: List[Tuple[int, BaseModel]],
+    report: ImportReport
+) -> None:
+    create = crud_formation.bulk_create_formations if kind == "formations" else crud_job.bulk_create_jobs
+    try:
+        await create(db, [item for _, item in chunk])
+        report.inserted += len(chunk)
+        return
+    except exc.DBAPIError:
+        await db.rollback()
+    # The database rejected the chunk: insert its rows one by one to report the bad ones
+    for row, item in chunk:
+        try:
+            await create(db, [item])
+            report.inserted += 1
+        except exc.DBAPIError as e:
+            await db.rollback()
+            report.fail(row, str(e.orig))
+
+
+async def import_catalog(
+    db: AsyncSession,
+    kind: str,
+    upload_format: str,
+    chunks: AsyncIterator[bytes]
+) -> Dict:
+    """
+    Validate streamed CSV or NDJSON rows with the Create schema of kind and insert
+    them IMPORT_CHUNK_ROWS at a time, each chunk in one multi-row INSERT and commit.
+    Only the current chunk is held in memory. Returns the report as a dict.
+    """
+    schema = IMPORT_SCHEMAS[kind]
+    report = ImportReport(kind, upload_format)
+    category_ids = set()
+    if kind == "formations":
+        category_ids = set((await db.execute(select(Category.id))).scalars())
+
+    lines = iter_lines(chunks)
+    records = iter_csv_records(lines) if upload_format == "csv" else iter_ndjson_records(lines)
+    chunk: List[Tuple[int, BaseModel]] = []
+    try:
+        async for row, value in records:
+            report.rows = row
+            if isinstance(value, Exception):
+                report.fail(row, str(value))
+                continue
+            try:
+                item = schema.model_validate(value)
+            except ValidationError as e:
+                report.fail(row, _validation_message(e))
+                continue
+            if kind == "formations" and item.category_id not in category_ids:
+                report.fail(row, f"category_id: Category {item.category_id} not found")
+                continue
+            chunk.append((row, item))
+            if len(chunk) >= IMPORT_CHUNK_ROWS:
+                await _insert_chunk(db, kind, chunk, report)
+                chunk = []
+    except ImportAborted as e:
+        # Rows already read are still inserted; the rest of the upload is ignored
+        report.aborted = str(e)
+    if chunk:
+        await _insert_chunk(db, kind, chunk, report)
+    return report.to_dict()
@@ -0,0 +1,260 @@
+import re
+import sys
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+from scipy import sparse
+from app.core.persistent import OverlayMap
+
+# Words are runs of letters/digits; keep "+", "#" and "." inside a word so
+# skills such as "c++", "c#" or "node.js" survive tokenization.
+TOKEN_RE = re.compile(r"\w[\w+#.]*")
+
+# BM25 parameters (term frequency saturation and length normalization)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_EMPTY_ROWS = np.empty(0, dtype=np.int32)
+_EMPTY_TFS = np.empty(0, dtype=np.float32)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase tokens."""
+    if not text:
+        return []
+    return [token.rstrip(".") for token in TOKEN_RE.findall(text.lower())]
+
+
+class BM25Index:
+    """
+    Document-term matrix over a list of documents, scored with BM25.
+
+    The matrix is stored column by column (CSC layout): each token maps to the
+    rows of the documents containing it, the term frequency in each and the
+    document's length. A column is the token's posting list, so scoring a query
+    only touches the postings of the query tokens, and a write only the postings
+    of the tokens it changes.
+    """
+
+    def __init__(self, documents: Iterable[List[str]], k1: float = BM25_K1, b: float = BM25_B):
+        """
+        Build the index.
+
+        Args:
+            documents: One list of tokens per document, in catalog order.
+                       Rows in results refer to the position of the document.
+        """
+        self.k1 = k1
+        self.b = b
+        postings: Dict[str, Tuple[List[int], List[int], List[int]]] = {}
+        n_rows = 0
+        total_len = 0
+        for row, tokens in enumerate(documents):
+            for token, tf in Counter(tokens).items():
+                rows, tfs, lens = postings.setdefault(token, ([], [], []))
+                rows.append(row)
+                tfs.append(tf)
+                lens.append(len(tokens))
+            n_rows += 1
+            total_len += len(tokens)
+
+        # token -> (rows, term frequencies, document lengths)
+        self.columns: OverlayMap = OverlayMap({
+            token: (
+                np.asarray(rows, dtype=np.int32),
+                np.asarray(tfs, dtype=np.float32),
+                np.asarray(lens, dtype=np.float32)
+            )
+            for token, (rows, tfs, lens) in postings.items()
+        })
+        self.n_rows = n_rows
+        # Live documents; rows of removed documents stay as empty holes
+        self.size = n_rows
+        self.total_len = float(total_len)
+
+    @property
+    def avg_doc_len(self) -> float:
+        """Average length of the live documents."""
+        return self.total_len / self.size if self.size and self.total_len else 1.0
+
+    def update(self, removed: Dict[int, List[str]], added: Dict[int, List[str]]) -> "BM25Index":
+        """
+        Return a new index with documents removed and/or (re)added.
+
+        Only the columns of the touched tokens are rewritten; every other column
+        is shared with this index (see OverlayMap), which is left unchanged for
+        current readers. The cost follows the size of the change, not of the index.
+
+        Args:
+            removed: row -> tokens the document was indexed with
+            added: row -> new tokens (rows past the end extend the index)
+        """
+        n_rows = max([self.n_rows] + [row + 1 for row in added])
+        size = self.size
+        total_len = self.total_len
+
+        dropped: Dict[str, List[int]] = {}
+        for row, tokens in removed.items():
+            for token in set(tokens):
+                dropped.setdefault(token, []).append(row)
+            total_len -= len(tokens)
+            size -= 1
+
+        appended: Dict[str, Tuple[List[int], List[int], List[int]]] = {}
+        for row, tokens in added.items():
+            for token, tf in Counter(tokens).items():
+                rows, tfs, lens = appended.setdefault(token, ([], [], []))
+                rows.append(row)
+                tfs.append(tf)
+                lens.append(len(tokens))
+            total_len += len(tokens)
+            size += 1
+
+        changed: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        emptied: List[str] = []
+        for token in dropped.keys() | appended.keys():
+            rows, tfs, lens = self.columns.get(token, (_EMPTY_ROWS, _EMPTY_TFS, _EMPTY_TFS))
+            if token in dropped:
+                keep = ~np.isin(rows, dropped[token])
+                rows, tfs, lens = rows[keep], tfs[keep], lens[keep]
+            if token in appended:
+                new_rows, new_tfs, new_lens = appended[token]
+                rows = np.concatenate((rows, np.asarray(new_rows, dtype=np.int32)))
+                tfs = np.concatenate((tfs, np.asarray(new_tfs, dtype=np.float32)))
+                lens = np.concatenate((lens, np.asarray(new_lens, dtype=np.float32)))
+            if len(rows):
+                changed[token] = (rows, tfs, lens)
+            else:
+                emptied.append(token)
+
+        index = BM25Index.__new__(BM25Index)
+        index.k1 = self.k1
+        index.b = self.b
+        index.columns = self.columns.updated(changed, emptied)
+        index.n_rows = n_rows
+        index.size = size
+        index.total_len = total_len
+        return index
+
+    def memory_usage(self) -> int:
+        """Approximate memory held by the index, in bytes."""
+        # getsizeof() of an array owning its buffer includes the data
+        size = sys.getsizeof(self.columns)
+        for token, column in self.columns.items():
+            size += sys.getsizeof(token) + sys.getsizeof(column) + sum(sys.getsizeof(a) for a in column)
+        return size
+
+    def idf(self, df: np.ndarray) -> np.ndarray:
+        """BM25 inverse document frequency (always positive)."""
+        return np.log1p((self.size - df + 0.5) / (df + 0.5))
+
+    def _postings(self, tokens: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        BM25 weights of the postings of the given (indexed) tokens, concatenated
+        token after token: (rows, weights, postings per token, idf per token).
+        """
+        columns = [self.columns[token] for token in tokens]
+        rows = np.concatenate([column[0] for column in columns])
+        tf = np.concatenate([column[1] for column in columns])
+        doc_len = np.concatenate([column[2] for column in columns])
+        counts = np.array([len(column[0]) for column in columns])
+        idf = self.idf(counts.astype(np.float32))
+
+        length_norm = self.k1 * (1 - self.b + self.b * doc_len / self.avg_doc_len)
+        data = np.repeat(idf, counts) * tf * (self.k1 + 1) / (tf + length_norm)
+        return rows, data, counts, idf
+
+    def _term_matrix(self, tokens: List[str]) -> Tuple[sparse.csc_matrix, np.ndarray]:
+        """BM25 weights of the given (indexed) tokens: documents x tokens matrix and idf per token."""
+        rows, data, counts, idf = self._postings(tokens)
+        indptr = np.concatenate(([0], np.cumsum(counts)))
+        matrix = sparse.csc_matrix((data, rows, indptr), shape=(self.n_rows, len(tokens)))
+        return matrix, idf
+
+    def score(self, query: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score every document sharing a token with the query.
+
+        Args:
+            query: token -> query weight
+
+        Returns:
+            (rows, scores) of matching documents, scores normalized to 0-1
+        """
+        tokens = [token for token in query if token in self.columns]
+        if not tokens:
+            return _EMPTY_ROWS, _EMPTY_TFS
+
+        # Sum the weighted postings of the query tokens per document, so the cost
+        # grows with the postings touched, not with the catalog
+        rows, data, counts, idf = self._postings(tokens)
+        weights = np.array([query[token] for token in tokens], dtype=np.float32)
+        data = data * np.repeat(weights, counts)
+        if len(tokens) == 1:
+            hits, scores = rows, data  # A posting list holds each row once
+        elif len(rows) * 8 >= self.n_rows:
+            # Postings cover a large share of the catalog: a dense sum beats sorting them
+            scores = np.bincount(rows, weights=data, minlength=self.n_rows)
+            hits = np.flatnonzero(scores)
+            scores = scores[hits]
+        else:
+            hits, inverse = np.unique(rows, return_inverse=True)
+            scores = np.bincount(inverse, weights=data)
+
+        # A document matching every query term once at average length scores 1.0
+        max_score = float(np.dot(weights, idf))
+        return hits, np.minimum(scores / max_score, 1.0)
+
+    def top_k(self, query: Dict[str, float], k: int) -> List[Tuple[int, float]]:
+        """Best k (row, score) pairs, highest score first, ties in catalog order."""
+        return _select_top_k(*self.score(query), k)
+
+    def top_k_batch(self, queries: List[Dict[str, float]], k: int) -> List[List[Tuple[int, float]]]:
+        """
+        top_k() for many queries at once.
+
+        All queries are scored with a single sparse product
+        X[:, union of query terms] @ Q, where Q is the terms x queries weight matrix.
+        """
+        vocabulary: Dict[str, int] = {}
+        term_idx, query_idx, weights = [], [], []
+        for q, query in enumerate(queries):
+            for token, weight in query.items():
+                if token in self.columns:
+                    term_idx.append(vocabulary.setdefault(token, len(vocabulary)))
+                    query_idx.append(q)
+                    weights.append(weight)
+        if not vocabulary:
+            return [[] for _ in queries]
+
+        matrix, idf = self._term_matrix(list(vocabulary))
+        query_matrix = sparse.csc_matrix(
+            (np.asarray(weights, dtype=np.float32), (term_idx, query_idx)),
+            shape=(len(vocabulary), len(queries))
+        )
+        scores = (matrix @ query_matrix).tocsc()
+        max_scores = query_matrix.T @ idf
+
+        results = []
+        for q in range(len(queries)):
+            start, end = scores.indptr[q], scores.indptr[q + 1]
+            if start == end:
+                results.append([])
+                continue
+            rows = scores.indices[start:end]
+            normalized = np.minimum(scores.data[start:end] / max_scores[q], 1.0)
+            results.append(_select_top_k(rows, normalized, k))
+        return results
+
+
+def _select_top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """Best k (row, score) pairs, highest score first, ties in catalog order."""
+    if k <= 0 or len(rows) == 0:
+        return []
+    if len(rows) > k:
+        # Keep everything scoring at least the k-th best, so ties are cut by row
+        threshold = -np.partition(-scores, k - 1)[k - 1]
+        best = np.flatnonzero(scores >= threshold)
+        rows, scores = rows[best], scores[best]
+    order = np.lexsort((rows, -scores))[:k]
+    return [(int(rows[i]), float(scores[i])) for i in order]
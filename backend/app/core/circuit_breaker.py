@@ -0,0 +1,298 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Set, Tuple
+from fastapi import HTTPException, status
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class UpstreamUnavailable(HTTPException):
+    """Raised instead of calling an upstream that is failing or saturated."""
+
+    def __init__(self, detail: str):
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker driven by error rate and latency.
+
+    Outcomes of the last window_seconds are kept. The breaker opens when at least
+    min_calls were made and the share of failed or slow calls reaches its
+    threshold. After open_seconds it lets up to half_open_calls probes through:
+    the first probe to finish closes it if it succeeded, or opens it again.
+    Calls are admitted with a ticket (see allow); outcomes of calls that are not
+    the current probes, e.g. started before the breaker opened, do not move a
+    half-open breaker.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float,
+        min_calls: int,
+        error_rate: float,
+        slow_rate: float,
+        slow_call_seconds: float,
+        open_seconds: float,
+        half_open_calls: int = 1
+    ):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.opened_until = 0.0
+        self.times_opened = 0
+        # Tickets of the probes admitted since the breaker went half-open
+        self._probe_tickets: Set[int] = set()
+        self._last_ticket = 0
+        # (finished_at, ok, slow)
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque()
+
+    def allow(self) -> Optional[int]:
+        """
+        Admit a call: returns its ticket, to pass to record(), or None when the
+        call may not go upstream now. Half-open probes get a non-zero ticket.
+        """
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now < self.opened_until:
+                return None
+            self.state = HALF_OPEN
+            self._probe_tickets.clear()
+        if self.state == HALF_OPEN:
+            if len(self._probe_tickets) >= self.half_open_calls:
+                return None
+            self._last_ticket += 1
+            self._probe_tickets.add(self._last_ticket)
+            return self._last_ticket
+        return 0
+
+    def release_probe(self, ticket: int) -> None:
+        """Return the slot of a probe whose call never reached the upstream."""
+        self._probe_tickets.discard(ticket)
+
+    def decides(self, ticket: int) -> bool:
+        """
+        Whether the outcome of the call with this ticket may change the state:
+        while half-open (or for a probe ticket) only a current probe's does.
+        """
+        if self.state == HALF_OPEN or ticket:
+            return ticket in self._probe_tickets
+        return True
+
+    def record(self, ok: bool, latency: float, ticket: int = 0) -> None:
+        """Record the outcome of an admitted call."""
+        if not self.decides(ticket):
+            return
+        now = time.monotonic()
+        slow = latency >= self.slow_call_seconds
+        if self.state == HALF_OPEN:
+            self._probe_tickets.clear()
+            if ok and not slow:
+                self.state = CLOSED
+                self._outcomes.clear()
+            else:
+                self.open(self.open_seconds)
+            return
+
+        self._outcomes.append((now, ok, slow))
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            self._outcomes.popleft()
+        calls = len(self._outcomes)
+        if self.state == CLOSED and calls >= self.min_calls:
+            failures = sum(1 for _, call_ok, _ in self._outcomes if not call_ok)
+            slow_calls = sum(1 for _, _, call_slow in self._outcomes if call_slow)
+            if failures / calls >= self.error_rate or slow_calls / calls >= self.slow_rate:
+                self.open(self.open_seconds)
+
+    def open(self, seconds: float) -> None:
+        """Stop calls for the given time (e.g. an upstream Retry-After)."""
+        if self.state != OPEN:
+            self.times_opened += 1
+        self.state = OPEN
+        self.opened_until = max(self.opened_until, time.monotonic() + seconds)
+        self._outcomes.clear()
+        self._probe_tickets.clear()
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker lets a probe through."""
+        return max(self.opened_until - time.monotonic(), 0.0) if self.state == OPEN else 0.0
+
+
+class AIMDLimiter:
+    """
+    Adaptive limit on in-flight calls: additive increase, multiplicative decrease.
+
+    Each good call raises the limit by 1/limit (about +1 per limit's worth of
+    calls); a failed, slow or throttled call multiplies it by backoff_ratio.
+    Calls over the limit are rejected rather than queued.
+    """
+
+    def __init__(self, initial: float, minimum: float, maximum: float, backoff_ratio: float = 0.5):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff_ratio = backoff_ratio
+        self.in_flight = 0
+        self.rejected = 0
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, good: bool) -> None:
+        self.in_flight -= 1
+        self.adjust(good)
+
+    def adjust(self, good: bool) -> None:
+        """Move the limit after a call's outcome."""
+        if good:
+            self.limit = min(self.limit + 1 / self.limit, self.maximum)
+        else:
+            self.limit = max(self.limit * self.backoff_ratio, self.minimum)
+
+
+class UpstreamGuard:
+    """
+    Circuit breaker and concurrency limit in front of one upstream service.
+
+        with guard.call() as call:
+            response = await client.post(...)
+            if response.status_code == 429:
+                call.throttled(retry_after)
+
+    Streamed calls report call.first_byte() when the first chunk arrives.
+
+    call() raises UpstreamUnavailable at once when the breaker is open or the
+    concurrency limit is reached, so callers can fall back without waiting.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        breaker: CircuitBreaker,
+        limiter: AIMDLimiter,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0
+    ):
+        self.name = name
+        self.breaker = breaker
+        self.limiter = limiter
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.throttles = 0
+        self._consecutive_throttles = 0
+        self.calls = 0
+        self.short_circuited = 0
+
+    def call(self) -> "_GuardedCall":
+        ticket = self.breaker.allow()
+        if ticket is None:
+            self.short_circuited += 1
+            raise UpstreamUnavailable(
+                f"{self.name} circuit open, retry in {self.breaker.retry_in():.1f} s"
+            )
+        if not self.limiter.try_acquire():
+            self.breaker.release_probe(ticket)
+            raise UpstreamUnavailable(
+                f"{self.name} concurrency limit reached ({int(self.limiter.limit)} in flight)"
+            )
+        self.calls += 1
+        return _GuardedCall(self, ticket)
+
+    def _throttled(self, retry_after: Optional[float], ticket: int = 0) -> None:
+        """Honor a 429: pause calls for Retry-After, or an exponential backoff."""
+        self.throttles += 1
+        if not self.breaker.decides(ticket):
+            return
+        self._consecutive_throttles += 1
+        if retry_after is None:
+            retry_after = min(self.backoff_base * 2 ** (self._consecutive_throttles - 1), self.backoff_max)
+        self.breaker.open(retry_after)
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.breaker.state,
+            "retry_in_seconds": round(self.breaker.retry_in(), 1),
+            "times_opened": self.breaker.times_opened,
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "in_flight": self.limiter.in_flight,
+            "calls": self.calls,
+            "short_circuited": self.short_circuited,
+            "rejected_over_limit": self.limiter.rejected,
+            "throttled": self.throttles,
+        }
+
+
+class _GuardedCall:
+    """One upstream call: measures it and reports the outcome on exit (or at first_byte)."""
+
+    def __init__(self, guard: UpstreamGuard, ticket: int):
+        self.guard = guard
+        self.ticket = ticket
+        self.retry_after: Optional[float] = None
+        self.is_throttled = False
+        self.settled = False
+        self.start = time.monotonic()
+
+    def throttled(self, retry_after: Optional[float] = None) -> None:
+        """Mark the call as rate limited by the upstream (HTTP 429)."""
+        self.is_throttled = True
+        self.retry_after = retry_after
+
+    def first_byte(self) -> None:
+        """
+        Settle a streamed call when its first chunk arrives, with the time to first
+        byte as its latency: how long the rest of the stream takes to generate and
+        to be read by our client says nothing about the upstream's health. The
+        concurrency slot stays taken until the call exits.
+        """
+        if not self.settled:
+            self.settled = True
+            self._report(True, time.monotonic() - self.start)
+
+    def __enter__(self) -> "_GuardedCall":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        guard = self.guard
+        if self.settled:
+            guard.limiter.in_flight -= 1
+            return
+        if exc_type is not None and issubclass(exc_type, (asyncio.CancelledError, GeneratorExit)):
+            # Abandoned by our side: says nothing about the upstream's health
+            guard.limiter.in_flight -= 1
+            guard.breaker.release_probe(self.ticket)
+            return
+        guard.limiter.in_flight -= 1
+        self._report(exc_type is None and not self.is_throttled, time.monotonic() - self.start)
+
+    def _report(self, ok: bool, latency: float) -> None:
+        guard = self.guard
+        slow = latency >= guard.breaker.slow_call_seconds
+        guard.limiter.adjust(ok and not slow)
+        if self.is_throttled:
+            guard._throttled(self.retry_after, self.ticket)
+        else:
+            guard._consecutive_throttles = 0
+            guard.breaker.record(ok, latency, self.ticket)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delay-seconds form only)."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
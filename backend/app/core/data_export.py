@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+import logging
+import os
+import zlib
+from typing import AsyncIterator, Dict, List, Sequence, Tuple
+from sqlalchemy import select
+from app.config.database import read_sessionmaker
+from app.models.formation import Formation
+from app.models.job import Job
+from app.models.parcours import Parcours
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip from the server-side cursor, and serialized per chunk
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "1000"))
+EXPORT_GZIP_LEVEL = 6
+
+# Exported columns per table; users are exported without their password hash
+EXPORT_COLUMNS: Dict[str, Tuple[type, List[str]]] = {
+    "formations": (Formation, ["id", "titre", "description", "video", "category_id"]),
+    "jobs": (Job, ["id", "titre", "description", "requirements", "company", "location"]),
+    "parcours": (Parcours, ["id", "titre", "description", "listedeformations"]),
+    "users": (User, ["id", "nom", "prenom", "email", "competence", "interests", "role"]),
+}
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _ndjson_chunk(columns: List[str], rows: Sequence) -> str:
+    return "".join(json.dumps(dict(zip(columns, row))) + "\n" for row in rows)
+
+
+def _csv_chunk(columns: List[str], rows: Sequence) -> str:
+    # List cells are written as JSON arrays, which the CSV import reads back
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows(
+        [json.dumps(value) if isinstance(value, (list, dict)) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue()
+
+
+async def export_rows(kind: str, export_format: str) -> AsyncIterator[str]:
+    """
+    Serialized rows of a table in id order, EXPORT_BATCH_ROWS at a time.
+    Rows come from a server-side cursor (yield_per), so memory stays flat whatever
+    the table size. The session is opened here, for as long as the response streams,
+    on the read replica when it is usable.
+    """
+    model, columns = EXPORT_COLUMNS[kind]
+    serialize = _csv_chunk if export_format == "csv" else _ndjson_chunk
+    if export_format == "csv":
+        yield _csv_chunk(columns, [columns])
+    async with read_sessionmaker()() as session:
+        result = await session.stream(
+            select(*(getattr(model, column) for column in columns))
+            .order_by(model.id)
+            .execution_options(yield_per=EXPORT_BATCH_ROWS)
+        )
+        async for rows in result.partitions():
+            yield serialize(columns, rows)
+
+
+async def gzip_stream(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """Encode and gzip a text stream chunk by chunk."""
+    compressor = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def export_stream(kind: str, export_format: str, gzip: bool) -> AsyncIterator:
+    """Body of an export response. A failure mid-stream can only end the body, so it is logged."""
+    chunks = export_rows(kind, export_format)
+    if gzip:
+        chunks = gzip_stream(chunks)
+    try:
+        async for chunk in chunks:
+            yield chunk
+    except Exception:
+        logger.exception("Export of %s failed mid-stream", kind)
+        raise
@@ -1,17 +1,133 @@
+import copy
 import os
 import json
+import logging
 import httpx
-from typing import Dict, Optional, List
+from typing import AsyncIterator, Dict, Optional, List
 from fastapi import HTTPException, status
+from app.core.prompt_cache import prompt_cache, prompt_key
+from app.core.single_flight import SingleFlight
+from app.core.prompt_budget import PROMPT_CANDIDATE_TOKENS, candidate_line, pack_candidates
+from app.core.circuit_breaker import (
+    AIMDLimiter, CircuitBreaker, UpstreamGuard, UpstreamUnavailable, parse_retry_after
+)
+from app.schemas.skillpath import SKILLPATH_RESPONSE_SCHEMA, SKILLPATH_SCHEMA_VERSION, skillpath_adapter
+
+logger = logging.getLogger(__name__)
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-MOCK_MODE = os.getenv("MOCK_MODE", "false").lower() == "true"
 # Use gemini-1.5-flash (faster) or gemini-1.5-pro (more capable)
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
-GEMINI_API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
+GEMINI_API_URL = os.getenv(
+    "GEMINI_API_URL",
+    f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
+)
+GEMINI_STREAM_URL = os.getenv(
+    "GEMINI_STREAM_URL",
+    GEMINI_API_URL.replace(":generateContent", ":streamGenerateContent")
+)
+
+# Shared HTTP client settings: keep-alive pool, timeouts (seconds) and HTTP/2
+GEMINI_CONNECT_TIMEOUT = float(os.getenv("GEMINI_CONNECT_TIMEOUT", "5"))
+GEMINI_READ_TIMEOUT = float(os.getenv("GEMINI_READ_TIMEOUT", "30"))
+GEMINI_MAX_CONNECTIONS = int(os.getenv("GEMINI_MAX_CONNECTIONS", "20"))
+GEMINI_MAX_KEEPALIVE = int(os.getenv("GEMINI_MAX_KEEPALIVE", "10"))
+GEMINI_KEEPALIVE_EXPIRY = float(os.getenv("GEMINI_KEEPALIVE_EXPIRY", "30"))
+GEMINI_HTTP2 = os.getenv("GEMINI_HTTP2", "false").lower() == "true"
+# Ask Gemini for application/json constrained by the skillpath response schema
+GEMINI_STRUCTURED_OUTPUT = os.getenv("GEMINI_STRUCTURED_OUTPUT", "true").lower() == "true"
+
+_client: Optional[httpx.AsyncClient] = None
+
+# Circuit breaker: opens when, over the last GEMINI_BREAKER_WINDOW seconds, at least
+# GEMINI_BREAKER_MIN_CALLS calls were made and too many failed or were slow
+GEMINI_BREAKER_WINDOW = float(os.getenv("GEMINI_BREAKER_WINDOW", "30"))
+GEMINI_BREAKER_MIN_CALLS = int(os.getenv("GEMINI_BREAKER_MIN_CALLS", "10"))
+GEMINI_BREAKER_ERROR_RATE = float(os.getenv("GEMINI_BREAKER_ERROR_RATE", "0.5"))
+GEMINI_BREAKER_SLOW_RATE = float(os.getenv("GEMINI_BREAKER_SLOW_RATE", "0.5"))
+GEMINI_SLOW_CALL_SECONDS = float(os.getenv("GEMINI_SLOW_CALL_SECONDS", "10"))
+GEMINI_BREAKER_OPEN_SECONDS = float(os.getenv("GEMINI_BREAKER_OPEN_SECONDS", "30"))
+# Adaptive (AIMD) limit on in-flight Gemini calls
+GEMINI_CONCURRENCY_INITIAL = float(os.getenv("GEMINI_CONCURRENCY_INITIAL", "10"))
+GEMINI_CONCURRENCY_MIN = float(os.getenv("GEMINI_CONCURRENCY_MIN", "1"))
+GEMINI_CONCURRENCY_MAX = float(os.getenv("GEMINI_CONCURRENCY_MAX", str(GEMINI_MAX_CONNECTIONS)))
+
+gemini_guard = UpstreamGuard(
+    "Gemini",
+    CircuitBreaker(
+        window_seconds=GEMINI_BREAKER_WINDOW,
+        min_calls=GEMINI_BREAKER_MIN_CALLS,
+        error_rate=GEMINI_BREAKER_ERROR_RATE,
+        slow_rate=GEMINI_BREAKER_SLOW_RATE,
+        slow_call_seconds=GEMINI_SLOW_CALL_SECONDS,
+        open_seconds=GEMINI_BREAKER_OPEN_SECONDS
+    ),
+    AIMDLimiter(GEMINI_CONCURRENCY_INITIAL, GEMINI_CONCURRENCY_MIN, GEMINI_CONCURRENCY_MAX)
+)
+
+# Coalesces concurrent Gemini calls for the same prompt (keyed like the prompt cache)
+skillpath_flights = SingleFlight()
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package (pip install h2)."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("GEMINI_HTTP2 is set but the h2 package is not installed, using HTTP/1.1")
+        return False
+    return True
+
+
+def create_gemini_client() -> httpx.AsyncClient:
+    """Create an HTTP client with the configured pool limits and timeouts."""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            connect=GEMINI_CONNECT_TIMEOUT,
+            read=GEMINI_READ_TIMEOUT,
+            write=GEMINI_READ_TIMEOUT,
+            pool=GEMINI_CONNECT_TIMEOUT
+        ),
+        limits=httpx.Limits(
+            max_connections=GEMINI_MAX_CONNECTIONS,
+            max_keepalive_connections=GEMINI_MAX_KEEPALIVE,
+            keepalive_expiry=GEMINI_KEEPALIVE_EXPIRY
+        ),
+        http2=GEMINI_HTTP2 and _http2_available()
+    )
 
 
-def build_gemini_prompt(goal: str, competences: List[str], interests: List[str], candidates: List[Dict]) -> str:
+async def start_gemini_client() -> None:
+    """Open the application-wide Gemini client (app startup)."""
+    global _client
+    if _client is None:
+        _client = create_gemini_client()
+
+
+async def close_gemini_client() -> None:
+    """Close the application-wide Gemini client and its pooled connections (app shutdown)."""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+
+def get_gemini_client() -> httpx.AsyncClient:
+    """Shared client reused by every Gemini call, so connections are kept alive."""
+    global _client
+    if _client is None:
+        # Used outside the app (scripts): open it on first use
+        _client = create_gemini_client()
+    return _client
+
+
+def build_gemini_prompt(
+    goal: str,
+    competences: List[str],
+    interests: List[str],
+    candidates: List[Dict],
+    token_budget: int = PROMPT_CANDIDATE_TOKENS
+) -> str:
     """
     Build Gemini prompt for skillpath generation using the template from prompt.txt.
     
@@ -19,24 +135,30 @@ def build_gemini_prompt(goal: str, competences: List[str], interests: List[str],
         goal: User's goal (free text)
         competences: List of current skills
         interests: List of interests
-        candidates: List of job/formation candidates with id, type, title, description, skills
+        candidates: List of job/formation candidates with id, type, title, description, skills,
+                    most relevant first
+        token_budget: Estimated tokens the candidate list may use (see pack_candidates)
     """
     competences_json = json.dumps(competences)
     interests_json = json.dumps(interests)
     
     # Format candidates
     candidates_list = []
-    for c in candidates[:30]:  # Limit to 30 candidates
+    for c in candidates:
         candidate_obj = {
             "id": c.get("id"),
             "type": c.get("type", "formation"),
             "title": c.get("title", c.get("titre", "")),
-            "description": (c.get("description") or "")[:200],
-            "skills": c.get("requirements", c.get("skills", []))
+            "description": c.get("description") or ""
         }
+        skills = c.get("requirements", c.get("skills", []))
+        if skills:
+            candidate_obj["skills"] = skills
         candidates_list.append(candidate_obj)
     
-    candidates_json = json.dumps(candidates_list, indent=2)
+    # Most relevant candidates that fit the token budget, one compact JSON object per line
+    packed = pack_candidates(candidates_list, token_budget)
+    candidates_json = "[\n" + ",\n".join(candidate_line(c) for c in packed) + "\n]"
     
     prompt = f"""System: You are an assistant that outputs ONLY valid JSON.
 
@@ -87,49 +209,53 @@ End."""
     return prompt
 
 
+def _request_body(prompt: str) -> Dict:
+    """generateContent request body, with structured output unless disabled."""
+    body = {
+        "contents": [{
+            "parts": [{"text": prompt}]
+        }]
+    }
+    if GEMINI_STRUCTURED_OUTPUT:
+        body["generationConfig"] = {
+            "responseMimeType": "application/json",
+            "responseSchema": SKILLPATH_RESPONSE_SCHEMA
+        }
+    return body
+
+
+def _cache_key(prompt: str) -> str:
+    # Cached skillpaths are validated: entries of an older schema are not reused
+    return prompt_key(f"{GEMINI_MODEL}/skillpath-v{SKILLPATH_SCHEMA_VERSION}", prompt)
+
+
 async def send_skillpath_request(prompt: str) -> Dict:
     """
     Send a skillpath request to Gemini API and return the response.
     
     Returns:
-        Parsed JSON response from Gemini with skillpath structure
+        Skillpath validated against app.schemas.skillpath.Skillpath: every field
+        is present, with resources of a known type
     """
-    if MOCK_MODE:
-        # Return deterministic mock response for testing
-        return {
-            "title": "Become Backend Developer",
-            "summary": "A structured path to master backend development with Python and FastAPI.",
-            "steps": [
-                {
-                    "id": "step-1",
-                    "title": "Learn Python basics",
-                    "duration_weeks": 2,
-                    "progress_estimate": "beginner->intermediate",
-                    "resources": [
-                        {"type": "formation", "id": 1, "titre": "Python Fundamentals", "url": None, "score": 0.9},
-                        {"type": "external", "id": None, "titre": "Python Official Docs", "url": "https://docs.python.org", "score": 0.8}
-                    ],
-                    "explanation": "Master Python fundamentals before moving to frameworks"
-                },
-                {
-                    "id": "step-2",
-                    "title": "Learn FastAPI framework",
-                    "duration_weeks": 3,
-                    "progress_estimate": "intermediate->advanced",
-                    "resources": [
-                        {"type": "formation", "id": 2, "titre": "FastAPI for Beginners", "url": None, "score": 0.95}
-                    ],
-                    "explanation": "Build REST APIs with FastAPI"
-                }
-            ],
-            "recommended_jobs": [
-                {"id": 1, "titre": "Backend Developer", "score": 0.95, "match_reason": "Perfect match for Python backend skills"}
-            ],
-            "recommended_formations": [
-                {"id": 1, "titre": "Python Fundamentals", "score": 0.9, "match_reason": "Essential foundation for backend development"}
-            ]
-        }
+    # Same prompt and model -> same validated skillpath: serve it from the prompt cache
+    key = _cache_key(prompt)
+    cached = await prompt_cache.get(key)
+    if cached is not None:
+        return cached
     
+    # Identical prompts in flight share one upstream call; each caller gets its own copy
+    result = await skillpath_flights.do(key, lambda: _generate_and_cache(key, prompt))
+    return copy.deepcopy(result)
+
+
+async def _generate_and_cache(key: str, prompt: str) -> Dict:
+    result = await _generate_skillpath(prompt)
+    await prompt_cache.set(key, result)
+    return result
+
+
+async def _generate_skillpath(prompt: str) -> Dict:
+    """Call the Gemini API and parse the skillpath JSON it returns."""
     if not GEMINI_API_KEY:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -137,61 +263,42 @@ async def send_skillpath_request(prompt: str) -> Dict:
         )
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        client = get_gemini_client()
+        # Fails fast while Gemini is failing, throttling us or saturated
+        with gemini_guard.call() as call:
             response = await client.post(
                 f"{GEMINI_API_URL}?key={GEMINI_API_KEY}",
-                json={
-                    "contents": [{
-                        "parts": [{"text": prompt}]
-                    }]
-                },
+                json=_request_body(prompt),
                 headers={"Content-Type": "application/json"}
             )
             
+            if response.status_code == 429:
+                call.throttled(parse_retry_after(response.headers.get("Retry-After")))
             if response.status_code != 200:
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail=f"Gemini API error: {response.text}"
                 )
-            
-            data = response.json()
-            
-            # Extract text from Gemini response
-            if "candidates" in data and len(data["candidates"]) > 0:
-                text_content = data["candidates"][0]["content"]["parts"][0]["text"]
-                
-                # Try to extract JSON from the response
-                # Remove markdown code blocks if present
-                text_content = text_content.strip()
-                if text_content.startswith("```"):
-                    # Remove markdown code blocks
-                    lines = text_content.split("\n")
-                    text_content = "\n".join(lines[1:-1]) if lines[-1].startswith("```") else "\n".join(lines[1:])
-                
-                # Parse JSON
-                try:
-                    result = json.loads(text_content)
-                    return result
-                except json.JSONDecodeError:
-                    # Try to find JSON object in the text
-                    start = text_content.find("{")
-                    end = text_content.rfind("}") + 1
-                    if start >= 0 and end > start:
-                        result = json.loads(text_content[start:end])
-                        return result
-                    else:
-                        raise ValueError("No valid JSON found in response")
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Invalid response from Gemini API"
-                )
+        
+        data = response.json()
+        
+        # Extract text from Gemini response
+        if "candidates" in data and len(data["candidates"]) > 0:
+            text_content = data["candidates"][0]["content"]["parts"][0]["text"]
+            return parse_skillpath(text_content)
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Invalid response from Gemini API"
+            )
     
     except httpx.TimeoutException:
         raise HTTPException(
             status_code=status.HTTP_504_GATEWAY_TIMEOUT,
             detail="Gemini API request timeout"
         )
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -199,36 +306,57 @@ async def send_skillpath_request(prompt: str) -> Dict:
         )
 
 
-# Keep the old function for backward compatibility
-async def send_to_gemini(prompt: str) -> Dict:
+def parse_skillpath(text_content: str) -> Dict:
     """
-    Send a prompt to Gemini API and return the response.
+    Validate Gemini's skillpath output with the compiled Skillpath model.
     
-    Returns:
-        Parsed JSON response from Gemini
+    Structured output is bare JSON and is parsed and validated in one pass; other
+    output (markdown fences, text around the object) is extracted first.
+    Raises ValueError when the text holds no valid skillpath.
     """
-    return await send_skillpath_request(prompt)
+    if text_content.lstrip().startswith("{"):
+        try:
+            return skillpath_adapter.dump_python(skillpath_adapter.validate_json(text_content))
+        except ValueError:
+            pass
+    skillpath = skillpath_adapter.validate_python(_parse_skillpath_text(text_content))
+    return skillpath_adapter.dump_python(skillpath)
 
 
-async def send_to_gemini(prompt: str) -> Dict:
+def _parse_skillpath_text(text_content: str) -> Dict:
+    """Extract the JSON object from Gemini's text output."""
+    # Remove markdown code blocks if present
+    text_content = text_content.strip()
+    if text_content.startswith("```"):
+        lines = text_content.split("\n")
+        text_content = "\n".join(lines[1:-1]) if lines[-1].startswith("```") else "\n".join(lines[1:])
+    
+    # Parse JSON
+    try:
+        return json.loads(text_content)
+    except json.JSONDecodeError:
+        # Try to find JSON object in the text
+        start = text_content.find("{")
+        end = text_content.rfind("}") + 1
+        if start >= 0 and end > start:
+            return json.loads(text_content[start:end])
+        else:
+            raise ValueError("No valid JSON found in response")
+
+
+async def stream_skillpath_request(prompt: str) -> AsyncIterator[str]:
     """
-    Send a prompt to Gemini API and return the response.
+    Stream a skillpath request to Gemini (streamGenerateContent over SSE).
     
-    Returns:
-        Parsed JSON response from Gemini
+    Yields:
+        Chunks of the skillpath JSON text as the model generates them.
+        Cached prompts yield the whole document at once.
     """
-    if MOCK_MODE:
-        # Return deterministic mock response for testing
-        return {
-            "jobs": [
-                {"id": 1, "type": "job", "score": 0.95, "explanation": "Perfect match for Python backend skills"},
-                {"id": 2, "type": "job", "score": 0.75, "explanation": "Good fit for full stack development"}
-            ],
-            "formations": [
-                {"id": 1, "type": "formation", "score": 0.90, "explanation": "Covers FastAPI and SQL topics"},
-                {"id": 2, "type": "formation", "score": 0.80, "explanation": "Advanced Python programming course"}
-            ]
-        }
+    key = _cache_key(prompt)
+    cached = await prompt_cache.get(key)
+    if cached is not None:
+        yield json.dumps(cached)
+        return
     
     if not GEMINI_API_KEY:
         raise HTTPException(
@@ -236,65 +364,57 @@ async def send_to_gemini(prompt: str) -> Dict:
             detail="GEMINI_API_KEY not configured"
         )
     
+    parts = []
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{GEMINI_API_URL}?key={GEMINI_API_KEY}",
-                json={
-                    "contents": [{
-                        "parts": [{"text": prompt}]
-                    }]
-                },
+        client = get_gemini_client()
+        with gemini_guard.call() as call:
+            async with client.stream(
+                "POST",
+                f"{GEMINI_STREAM_URL}?alt=sse&key={GEMINI_API_KEY}",
+                json=_request_body(prompt),
                 headers={"Content-Type": "application/json"}
-            )
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Gemini API error: {response.text}"
-                )
-            
-            data = response.json()
-            
-            # Extract text from Gemini response
-            if "candidates" in data and len(data["candidates"]) > 0:
-                text_content = data["candidates"][0]["content"]["parts"][0]["text"]
+            ) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    if response.status_code == 429:
+                        call.throttled(parse_retry_after(response.headers.get("Retry-After")))
+                    raise HTTPException(
+                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        detail=f"Gemini API error: {body.decode(errors='replace')}"
+                    )
                 
-                # Try to extract JSON from the response
-                # Remove markdown code blocks if present
-                text_content = text_content.strip()
-                if text_content.startswith("```"):
-                    # Remove markdown code blocks
-                    lines = text_content.split("\n")
-                    text_content = "\n".join(lines[1:-1]) if lines[-1].startswith("```") else "\n".join(lines[1:])
-                
-                # Parse JSON
-                try:
-                    result = json.loads(text_content)
-                    return result
-                except json.JSONDecodeError:
-                    # Try to find JSON object in the text
-                    start = text_content.find("{")
-                    end = text_content.rfind("}") + 1
-                    if start >= 0 and end > start:
-                        result = json.loads(text_content[start:end])
-                        return result
-                    else:
-                        raise ValueError("No valid JSON found in response")
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Invalid response from Gemini API"
-                )
-    
+                # Each SSE event carries a partial GenerateContentResponse
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = json.loads(line[5:])
+                    for candidate in data.get("candidates", [])[:1]:
+                        for part in candidate.get("content", {}).get("parts", []):
+                            if part.get("text"):
+                                parts.append(part["text"])
+                                # The outcome is the time to first byte, not the stream's
+                                call.first_byte()
+                                yield part["text"]
     except httpx.TimeoutException:
         raise HTTPException(
             status_code=status.HTTP_504_GATEWAY_TIMEOUT,
             detail="Gemini API request timeout"
         )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error calling Gemini API: {str(e)}"
-        )
+    
+    # Cache the complete document, as send_skillpath_request does
+    try:
+        result = parse_skillpath("".join(parts))
+    except ValueError:
+        return
+    await prompt_cache.set(key, result)
 
+
+# Keep the old function for backward compatibility
+async def send_to_gemini(prompt: str) -> Dict:
+    """
+    Send a prompt to Gemini API and return the response.
+    
+    Returns:
+        Parsed JSON response from Gemini
+    """
+    return await send_skillpath_request(prompt)
@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from statistics import median, quantiles
+from typing import Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+from fastapi import HTTPException, status
+from app.config.database import AsyncSessionLocal
+from app.crud import skillpath_job as crud_skillpath_job
+from app.models.skillpath_job import SkillpathJob
+
+logger = logging.getLogger(__name__)
+
+# Workers running jobs concurrently, and queued jobs accepted before submissions get a 503
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_MAX_DEPTH = int(os.getenv("JOB_QUEUE_MAX_DEPTH", "100"))
+# Jobs running for longer than this at startup are assumed lost with their worker and rerun
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "600"))
+# Finished jobs are deleted after this long (at startup)
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "86400"))
+# Wait and run times kept for the percentiles in stats()
+JOB_TIMING_SAMPLES = 1000
+
+FINISHED_STATUSES = ("done", "failed")
+
+
+def _utcnow() -> datetime:
+    """Naive UTC timestamp, as stored in the DateTime columns."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def request_key(request: Dict) -> str:
+    """Hash of a normalized job request, used to deduplicate submissions."""
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+
+def _percentiles(samples: Deque[float]) -> Dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0}
+    p95 = quantiles(samples, n=20)[-1] if len(samples) > 1 else samples[0]
+    return {"p50": round(median(samples), 1), "p95": round(p95, 1)}
+
+
+class SkillpathJobQueue:
+    """
+    Bounded queue of AI skillpath jobs run by in-process workers.
+
+    Job state lives in the skillpath_jobs table, so results can be read from any
+    worker process and jobs survive restarts: queued jobs are picked up again at
+    startup. Workers claim a job with a conditional update, so a job runs once
+    even when several processes recover the same queue.
+    Listeners (SSE clients) are woken whenever a job of this process changes state.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[Dict], Awaitable[Dict]],
+        workers: int = JOB_WORKERS,
+        max_depth: int = JOB_QUEUE_MAX_DEPTH
+    ):
+        self.runner = runner
+        self.workers = workers
+        self.max_depth = max_depth
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._tasks: Set[asyncio.Task] = set()
+        self._running: Set[str] = set()
+        self._listeners: Dict[str, Set[asyncio.Queue]] = {}
+        # Serializes the dedup check and insert of submissions
+        self._submit_lock = asyncio.Lock()
+        self._wait_ms: Deque[float] = deque(maxlen=JOB_TIMING_SAMPLES)
+        self._run_ms: Deque[float] = deque(maxlen=JOB_TIMING_SAMPLES)
+        self.counts = {"submitted": 0, "deduplicated": 0, "rejected": 0, "done": 0, "failed": 0}
+
+    async def submit(self, user_id: int, request: Dict) -> Tuple[SkillpathJob, bool]:
+        """
+        Queue a job, or return the user's queued or running job for the same request.
+        Returns (job, deduplicated). Raises HTTP 503 when the queue is full.
+        """
+        key = request_key(request)
+        async with self._submit_lock:
+            async with AsyncSessionLocal() as db:
+                pending = await crud_skillpath_job.get_pending_skillpath_job(db, user_id, key)
+                if pending is not None:
+                    self.counts["deduplicated"] += 1
+                    return pending, True
+                if self._queue.qsize() >= self.max_depth:
+                    self.counts["rejected"] += 1
+                    raise HTTPException(
+                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        detail="Too many skillpath jobs queued, try again later",
+                        headers={"Retry-After": "5"}
+                    )
+                job = await crud_skillpath_job.create_skillpath_job(
+                    db, uuid.uuid4().hex, user_id, key, request, _utcnow()
+                )
+        self.counts["submitted"] += 1
+        self._queue.put_nowait(job.id)
+        return job, False
+
+    async def get(self, job_id: str) -> Optional[SkillpathJob]:
+        async with AsyncSessionLocal() as db:
+            return await crud_skillpath_job.get_skillpath_job(db, job_id)
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Queue receiving the new status each time the job changes state in this process."""
+        updates: asyncio.Queue = asyncio.Queue()
+        self._listeners.setdefault(job_id, set()).add(updates)
+        return updates
+
+    def unsubscribe(self, job_id: str, updates: asyncio.Queue) -> None:
+        listeners = self._listeners.get(job_id)
+        if listeners is not None:
+            listeners.discard(updates)
+            if not listeners:
+                del self._listeners[job_id]
+
+    def _notify(self, job_id: str, job_status: str) -> None:
+        for updates in self._listeners.get(job_id, ()):
+            updates.put_nowait(job_status)
+
+    async def start(self) -> None:
+        """Requeue unfinished jobs, delete expired ones and start the workers (app startup)."""
+        if self._tasks:
+            return
+        now = _utcnow()
+        async with AsyncSessionLocal() as db:
+            expired = await crud_skillpath_job.delete_finished_skillpath_jobs(
+                db, now - timedelta(seconds=JOB_RETENTION_SECONDS)
+            )
+            queued = await crud_skillpath_job.recover_skillpath_jobs(
+                db, now - timedelta(seconds=JOB_STALE_SECONDS)
+            )
+        for job_id in queued:
+            self._queue.put_nowait(job_id)
+        if queued or expired:
+            logger.info("Skillpath jobs: %d requeued, %d expired deleted", len(queued), expired)
+        for _ in range(self.workers):
+            self._tasks.add(asyncio.create_task(self._work()))
+
+    async def stop(self) -> None:
+        """Stop the workers; jobs they were running go back to the queue (app shutdown)."""
+        tasks, self._tasks = self._tasks, set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        interrupted, self._running = list(self._running), set()
+        async with AsyncSessionLocal() as db:
+            await crud_skillpath_job.requeue_skillpath_jobs(db, interrupted)
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Skillpath job %s could not be run", job_id)
+
+    async def _run(self, job_id: str) -> None:
+        started_at = _utcnow()
+        async with AsyncSessionLocal() as db:
+            if not await crud_skillpath_job.claim_skillpath_job(db, job_id, started_at):
+                return  # Taken by another process, or no longer queued
+            job = await crud_skillpath_job.get_skillpath_job(db, job_id)
+        self._running.add(job_id)
+        self._wait_ms.append((started_at - job.created_at).total_seconds() * 1000)
+        self._notify(job_id, "running")
+
+        start = time.perf_counter()
+        result, error = None, None
+        try:
+            result = await self.runner(job.request)
+        except Exception as e:
+            logger.warning("Skillpath job %s failed: %s", job_id, e)
+            error = str(e) or type(e).__name__
+        self._run_ms.append((time.perf_counter() - start) * 1000)
+
+        async with AsyncSessionLocal() as db:
+            await crud_skillpath_job.finish_skillpath_job(db, job_id, _utcnow(), result, error)
+        self._running.discard(job_id)
+        job_status = "failed" if error is not None else "done"
+        self.counts[job_status] += 1
+        self._notify(job_id, job_status)
+
+    def stats(self) -> Dict:
+        return {
+            "workers": len(self._tasks),
+            "queue_depth": self._queue.qsize(),
+            "max_depth": self.max_depth,
+            "running": len(self._running),
+            **self.counts,
+            "wait_ms": _percentiles(self._wait_ms),
+            "run_ms": _percentiles(self._run_ms),
+        }
@@ -0,0 +1,124 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+_WHITESPACE = " \t\r\n"
+
+
+class JsonObjectStream:
+    """
+    Incremental parser for a JSON object arriving in chunks.
+
+    feed() returns the parts of the top-level object completed so far, without
+    waiting for the end of the document:
+      ("field", key, value) for a top-level value other than an array
+      ("item", key, value) for each element of a top-level array
+    Text before the opening brace (e.g. a ```json fence) is skipped.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._done = False
+        # Top-level state
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._key_start = -1
+        self._value_start = -1
+        self._value_is_array = False
+        self._item_start = -1
+
+    @property
+    def done(self) -> bool:
+        """True once the closing brace of the object was parsed."""
+        return self._done
+
+    def feed(self, chunk: str) -> List[Tuple[str, str, Any]]:
+        """Parse the next chunk of text and return the newly completed parts."""
+        self._text += chunk
+        events: List[Tuple[str, str, Any]] = []
+        text = self._text
+        pos = self._pos
+        while pos < len(text) and not self._done:
+            char = text[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._end_string(pos, events)
+            elif char == '"':
+                self._in_string = True
+                self._start_value(pos)
+                if self._depth == 1 and self._expect_key:
+                    self._key_start = pos
+            elif char in "{[":
+                self._start_value(pos)
+                self._depth += 1
+                if self._depth == 2 and char == "[" and self._value_start == pos:
+                    self._value_is_array = True
+            elif char in "}]":
+                self._end_literal(pos, events)
+                self._depth -= 1
+                if self._depth == 0:
+                    self._done = True
+                elif self._depth == 2 and self._value_is_array and self._item_start >= 0:
+                    self._emit_item(text[self._item_start:pos + 1], events)
+                elif self._depth == 1:
+                    if self._value_is_array:
+                        self._value_is_array = False
+                    elif self._value_start >= 0:
+                        events.append(("field", self._key, json.loads(text[self._value_start:pos + 1])))
+                    self._value_start = -1
+            elif self._depth == 1:
+                if char == ":":
+                    self._expect_key = False
+                elif char == ",":
+                    self._end_literal(pos, events)
+                    self._expect_key = True
+                elif char not in _WHITESPACE:
+                    self._start_value(pos)
+            elif self._depth == 2 and self._value_is_array:
+                if char == ",":
+                    self._end_literal(pos, events)
+                elif char not in _WHITESPACE:
+                    self._start_value(pos)
+            pos += 1
+        self._pos = pos
+        return events
+
+    def _start_value(self, pos: int) -> None:
+        """Record where a top-level value or array element starts."""
+        if self._depth == 0:
+            # Opening brace of the document
+            self._expect_key = True
+        elif self._depth == 1 and not self._expect_key and self._value_start < 0:
+            self._value_start = pos
+        elif self._depth == 2 and self._value_is_array and self._item_start < 0:
+            self._item_start = pos
+
+    def _end_string(self, pos: int, events: List) -> None:
+        if self._depth == 1 and self._key_start >= 0:
+            self._key = json.loads(self._text[self._key_start:pos + 1])
+            self._key_start = -1
+        elif self._depth == 1 and self._value_start >= 0:
+            events.append(("field", self._key, json.loads(self._text[self._value_start:pos + 1])))
+            self._value_start = -1
+        elif self._depth == 2 and self._value_is_array and self._item_start >= 0:
+            self._emit_item(self._text[self._item_start:pos + 1], events)
+
+    def _end_literal(self, pos: int, events: List) -> None:
+        """Complete a number, true, false or null ending at pos."""
+        if self._depth == 1 and self._value_start >= 0 and not self._value_is_array:
+            events.append(("field", self._key, json.loads(self._text[self._value_start:pos])))
+            self._value_start = -1
+        elif self._depth == 2 and self._value_is_array and self._item_start >= 0:
+            self._emit_item(self._text[self._item_start:pos], events)
+
+    def _emit_item(self, text: str, events: List) -> None:
+        events.append(("item", self._key, json.loads(text)))
+        self._item_start = -1
@@ -0,0 +1,40 @@
+from typing import Dict, List, Set
+import ahocorasick
+
+
+class KeywordMatcher:
+    """
+    Compiled Aho-Corasick automaton over a list of keywords.
+
+    find() reports every keyword occurring in a text (as a substring, like
+    `keyword in text`) in a single pass over the text, so the cost per text
+    does not grow with the number of keywords. Matching is case-sensitive:
+    pass lowercased keywords and text.
+    """
+
+    def __init__(self, keywords: List[str]):
+        self.keywords = keywords
+        # Empty keywords are contained in every text
+        self.always: Set[int] = {i for i, keyword in enumerate(keywords) if not keyword}
+
+        # Duplicated keywords share one pattern reporting all their indices
+        patterns: Dict[str, List[int]] = {}
+        for i, keyword in enumerate(keywords):
+            if keyword:
+                patterns.setdefault(keyword, []).append(i)
+
+        self._automaton = None
+        if patterns:
+            automaton = ahocorasick.Automaton()
+            for keyword, indices in patterns.items():
+                automaton.add_word(keyword, tuple(indices))
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def find(self, text: str) -> Set[int]:
+        """Indices of the keywords occurring in text."""
+        found = set(self.always)
+        if self._automaton is not None and text:
+            for _, indices in self._automaton.iter(text):
+                found.update(indices)
+        return found
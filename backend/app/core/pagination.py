@@ -0,0 +1,123 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, and_, or_
+
+# Response header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort: str, value: Any, last_id: int) -> str:
+    """Opaque cursor pointing after the row with this sort value and id."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, last_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    """(sort value, id) of the row a cursor points after. Raises ValueError when invalid."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, last_id = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort or type(last_id) is not int:
+        raise ValueError("Cursor does not match the sort order")
+    return value, last_id
+
+
+def _cursor_value(column, value: Any) -> Any:
+    """A cursor's sort value as the column's Python type (int, str or datetime from ISO text)."""
+    python_type = column.type.python_type
+    if python_type is datetime and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if python_type in (int, str) and type(value) is python_type:
+        return value
+    raise ValueError("Invalid cursor")
+
+
+def keyset(stmt: Select, model, sort: str = "id", after: Optional[Tuple[Any, int]] = None) -> Select:
+    """
+    Order stmt by the sort key (then id, to break ties) and, given a cursor
+    position, keep the rows after it. With an index on the sort key the database
+    seeks straight to the position, so every page costs the same however deep it is.
+    sort is a column name, prefixed with "-" for descending order.
+    """
+    descending = sort.startswith("-")
+    name = sort.lstrip("-")
+    column = getattr(model, name)
+    if name == "id":
+        order = [column.desc() if descending else column]
+    else:
+        order = [column.desc(), model.id.desc()] if descending else [column, model.id]
+    stmt = stmt.order_by(*order)
+    if after is not None:
+        value, last_id = after
+        if name != "id":
+            try:
+                value = _cursor_value(column, value)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if name == "id":
+            stmt = stmt.where(column < last_id if descending else column > last_id)
+        elif descending:
+            stmt = stmt.where(or_(column < value, and_(column == value, model.id < last_id)))
+        else:
+            stmt = stmt.where(or_(column > value, and_(column == value, model.id > last_id)))
+    return stmt
+
+
+class Page:
+    """Pagination of a list route: a cursor (keyset) or skip (offset), a page size and a sort key."""
+
+    def __init__(self, skip: int, limit: int, sort: str, after: Optional[Tuple[Any, int]]):
+        self.skip = skip
+        self.limit = limit
+        self.sort = sort
+        self.after = after
+
+    def next_cursor(self, rows: Sequence) -> Optional[str]:
+        """Cursor after the last row, or None when this was the last page."""
+        if not rows or len(rows) < self.limit:
+            return None
+        last = rows[-1]
+        return encode_cursor(self.sort, getattr(last, self.sort.lstrip("-")), last.id)
+
+    def set_next_cursor(self, response: Response, rows: Sequence) -> None:
+        cursor = self.next_cursor(rows)
+        if cursor is not None:
+            response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
+def pagination(*sort_keys: str):
+    """
+    Dependency reading the skip, limit, cursor and sort query parameters of a list route.
+    Only indexed columns should be offered as sort keys, since keyset pages seek on them.
+    """
+    allowed = ("id", "-id") + sort_keys + tuple(f"-{key}" for key in sort_keys)
+
+    def dependency(
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort: str = "id"
+    ) -> Page:
+        if sort not in allowed:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"sort must be one of {', '.join(allowed)}"
+            )
+        after = None
+        if cursor:
+            try:
+                after = decode_cursor(cursor, sort)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+            # The cursor gives the position; skip only applies without one
+            skip = 0
+        return Page(skip, limit, sort, after)
+
+    return dependency
@@ -0,0 +1,148 @@
+import sys
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Rows per ChunkedList chunk (a power of two)
+CHUNK_BITS = 10
+CHUNK_SIZE = 1 << CHUNK_BITS
+# OverlayMap folds its changes into a new base dict once they outnumber
+# max(OVERLAY_MIN_CHANGES, sqrt(base size)): each write copies at most that many
+# entries, and the O(n) fold is spread over as many writes.
+OVERLAY_MIN_CHANGES = 256
+
+
+class _Deleted:
+    """Marks a key removed from an OverlayMap base (pickled by reference)."""
+
+
+class ChunkedList(Sequence):
+    """
+    Read-only list stored in chunks of CHUNK_SIZE items.
+
+    updated() returns a new list that copies only the chunk table and the chunks
+    it changes, sharing every other chunk with this list.
+    """
+
+    __slots__ = ("_chunks", "_len")
+
+    def __init__(self, items: Iterable = ()):
+        items = list(items)
+        self._chunks: List[list] = [items[i:i + CHUNK_SIZE] for i in range(0, len(items), CHUNK_SIZE)]
+        self._len = len(items)
+
+    def __getitem__(self, row: int):
+        if row < 0:
+            row += self._len
+        if not 0 <= row < self._len:
+            raise IndexError(row)
+        return self._chunks[row >> CHUNK_BITS][row & (CHUNK_SIZE - 1)]
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator:
+        for chunk in self._chunks:
+            yield from chunk
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + sum(sys.getsizeof(chunk) for chunk in self._chunks)
+
+    def updated(self, changes: Dict[int, object]) -> "ChunkedList":
+        """
+        A new list with row -> item changes applied. Rows past the end extend it,
+        rows skipped in between are None.
+        """
+        chunks = list(self._chunks)
+        length = max([self._len] + [row + 1 for row in changes])
+        copied = set()
+        for row, item in changes.items():
+            c = row >> CHUNK_BITS
+            while c >= len(chunks):
+                chunks.append([])
+            if c not in copied:
+                chunks[c] = list(chunks[c])
+                copied.add(c)
+            chunk = chunks[c]
+            offset = row & (CHUNK_SIZE - 1)
+            if offset >= len(chunk):
+                chunk.extend([None] * (offset + 1 - len(chunk)))
+            chunk[offset] = item
+        for c in range(max(len(self._chunks) - 1, 0), len(chunks) - 1):
+            # Only the last chunk may be partly filled
+            if len(chunks[c]) < CHUNK_SIZE:
+                if c not in copied:
+                    chunks[c] = list(chunks[c])
+                chunks[c].extend([None] * (CHUNK_SIZE - len(chunks[c])))
+        result = ChunkedList.__new__(ChunkedList)
+        result._chunks = chunks
+        result._len = length
+        return result
+
+
+class OverlayMap(Mapping):
+    """
+    Read-only dict made of a shared base dict and the changes made since.
+
+    updated() copies the changes only; they are folded into a new base once
+    there are more than max(OVERLAY_MIN_CHANGES, sqrt(len(base))) of them.
+    """
+
+    __slots__ = ("_base", "_changes", "_len")
+
+    def __init__(self, base: Optional[Dict] = None):
+        self._base = base if base is not None else {}
+        self._changes: Dict = {}
+        self._len = len(self._base)
+
+    def __getitem__(self, key):
+        value = self._changes.get(key, self._base.get(key, _Deleted))
+        if value is _Deleted:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        value = self._changes.get(key, self._base.get(key, _Deleted))
+        return default if value is _Deleted else value
+
+    def __contains__(self, key) -> bool:
+        return self._changes.get(key, self._base.get(key, _Deleted)) is not _Deleted
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator:
+        changes = self._changes
+        for key in self._base:
+            if key not in changes:
+                yield key
+        for key, value in changes.items():
+            if value is not _Deleted:
+                yield key
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + sys.getsizeof(self._base) + sys.getsizeof(self._changes)
+
+    def updated(self, values: Dict, deleted: Iterable = ()) -> "OverlayMap":
+        """A new map with values set and the deleted keys removed."""
+        changes = dict(self._changes)
+        length = self._len
+        for key in deleted:
+            if changes.get(key, self._base.get(key, _Deleted)) is not _Deleted:
+                length -= 1
+            if key in self._base:
+                changes[key] = _Deleted
+            else:
+                changes.pop(key, None)
+        for key, value in values.items():
+            if changes.get(key, self._base.get(key, _Deleted)) is _Deleted:
+                length += 1
+            changes[key] = value
+        result = OverlayMap.__new__(OverlayMap)
+        if len(changes) > max(OVERLAY_MIN_CHANGES, int(len(self._base) ** 0.5)):
+            base = {key: value for key, value in self._base.items() if key not in changes}
+            base.update((key, value) for key, value in changes.items() if value is not _Deleted)
+            result._base, result._changes = base, {}
+        else:
+            result._base, result._changes = self._base, changes
+        result._len = length
+        return result
@@ -0,0 +1,49 @@
+import json
+import math
+import os
+from typing import Dict, List
+
+# Rough size of a token for the estimator (Gemini averages about 4 characters)
+PROMPT_CHARS_PER_TOKEN = float(os.getenv("PROMPT_CHARS_PER_TOKEN", "4"))
+# Tokens the candidate list of an AI prompt may use
+PROMPT_CANDIDATE_TOKENS = int(os.getenv("PROMPT_CANDIDATE_TOKENS", "1500"))
+# Longest description sent for a candidate, and shortest worth sending when trimming
+PROMPT_DESCRIPTION_CHARS = int(os.getenv("PROMPT_DESCRIPTION_CHARS", "200"))
+PROMPT_MIN_DESCRIPTION_CHARS = 40
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of model tokens in text."""
+    return math.ceil(len(text) / PROMPT_CHARS_PER_TOKEN)
+
+
+def candidate_line(candidate: Dict) -> str:
+    """Compact JSON line of a candidate, as written in the prompt."""
+    return json.dumps(candidate, ensure_ascii=False, separators=(",", ":"))
+
+
+def pack_candidates(candidates: List[Dict], budget_tokens: int = PROMPT_CANDIDATE_TOKENS) -> List[Dict]:
+    """
+    Keep candidates, most relevant first, while their prompt lines fit in budget_tokens.
+
+    Descriptions are cut to PROMPT_DESCRIPTION_CHARS, and further (down to
+    PROMPT_MIN_DESCRIPTION_CHARS) when that lets one more candidate fit.
+    Candidates that do not fit even with a short description are skipped.
+    """
+    packed = []
+    used = 0
+    for candidate in candidates:
+        description = (candidate.get("description") or "")[:PROMPT_DESCRIPTION_CHARS]
+        item = {**candidate, "description": description}
+        cost = estimate_tokens(candidate_line(item))
+        if used + cost > budget_tokens and len(description) > PROMPT_MIN_DESCRIPTION_CHARS:
+            # Trim the description to the characters left in the budget
+            over = (used + cost - budget_tokens) * PROMPT_CHARS_PER_TOKEN
+            keep = max(int(len(description) - over), PROMPT_MIN_DESCRIPTION_CHARS)
+            item["description"] = description[:keep]
+            cost = estimate_tokens(candidate_line(item))
+        if used + cost > budget_tokens:
+            continue
+        packed.append(item)
+        used += cost
+    return packed
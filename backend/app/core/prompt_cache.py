@@ -0,0 +1,233 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from app.core.result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+# Disk tier: a SQLite file shared by every worker on the host ("" disables it).
+# Relative paths are resolved against the backend directory, not the working
+# directory, so every worker opens the same file wherever uvicorn is started.
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROMPT_CACHE_PATH = os.getenv("PROMPT_CACHE_PATH", "prompt_cache.sqlite3")
+if PROMPT_CACHE_PATH:
+    PROMPT_CACHE_PATH = os.path.join(BACKEND_DIR, PROMPT_CACHE_PATH)
+PROMPT_CACHE_TTL = float(os.getenv("PROMPT_CACHE_TTL", str(24 * 3600)))
+PROMPT_CACHE_MAX_BYTES = int(os.getenv("PROMPT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# A disk hit refreshes the entry's LRU time at most this often; refreshes are queued
+# and written with the next set, or together once DISK_ACCESS_FLUSH_ENTRIES are pending
+DISK_ACCESS_REFRESH_SECONDS = 60.0
+DISK_ACCESS_FLUSH_ENTRIES = 64
+# Expired entries are purged every DISK_EVICT_EVERY_SETS writes; when the size bound
+# is passed, the least recently read entries go until DISK_EVICT_TARGET of it is left
+DISK_EVICT_EVERY_SETS = 100
+DISK_EVICT_TARGET = 0.9
+# Memory tier, per worker
+PROMPT_CACHE_MEMORY_BYTES = int(os.getenv("PROMPT_CACHE_MEMORY_BYTES", str(16 * 1024 * 1024)))
+
+
+def prompt_key(model: str, prompt: str) -> str:
+    """Content address of a prompt sent to a model."""
+    return hashlib.sha256(f"{model}\0{prompt}".encode()).hexdigest()
+
+
+class DiskCache:
+    """
+    Key -> JSON text store in a SQLite file, with TTL and a total size bound.
+
+    WAL mode lets several processes read while one writes. Once the stored
+    values exceed max_bytes, the least recently read entries are deleted.
+    Reads only queue their accessed_at refresh (see DISK_ACCESS_REFRESH_SECONDS),
+    and eviction runs every DISK_EVICT_EVERY_SETS writes or when the size estimate
+    passes max_bytes, so most calls are a single statement.
+    Methods are blocking; call them from a thread.
+    """
+
+    def __init__(self, path: str, ttl: float, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS prompt_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_prompt_cache_accessed ON prompt_cache (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_prompt_cache_expires ON prompt_cache (expires_at)")
+        # key -> read time, waiting to be written to accessed_at
+        self._accessed: Dict[str, float] = {}
+        self._sets = 0
+        # Stored bytes as of the last eviction plus this process's writes since;
+        # other processes' writes are only counted at the next eviction
+        self._bytes = self._stored_bytes()
+
+    def _stored_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM prompt_cache").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, accessed_at FROM prompt_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is not None and now - row[1] >= DISK_ACCESS_REFRESH_SECONDS:
+                self._accessed[key] = now
+                if len(self._accessed) >= DISK_ACCESS_FLUSH_ENTRIES:
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        self._flush_accessed()
+                        self._conn.execute("COMMIT")
+                    except BaseException:
+                        self._conn.execute("ROLLBACK")
+                        raise
+        return row[0] if row is not None else None
+
+    def _flush_accessed(self) -> None:
+        """Write the queued read times (inside a transaction)."""
+        if self._accessed:
+            self._conn.executemany(
+                "UPDATE prompt_cache SET accessed_at = MAX(accessed_at, ?) WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._accessed.items()]
+            )
+            self._accessed = {}
+
+    def _evict(self, now: float) -> None:
+        """Delete expired entries, then the least recently read ones down to DISK_EVICT_TARGET of max_bytes."""
+        self._conn.execute("DELETE FROM prompt_cache WHERE expires_at <= ?", (now,))
+        if self._stored_bytes() > self.max_bytes:
+            # Keep the most recently read entries that fit in the target size
+            self._conn.execute(
+                "DELETE FROM prompt_cache WHERE key IN ("
+                " SELECT key FROM ("
+                "  SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key) AS running"
+                "  FROM prompt_cache)"
+                " WHERE running > ?)",
+                (int(self.max_bytes * DISK_EVICT_TARGET),)
+            )
+        self._bytes = self._stored_bytes()
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO prompt_cache (key, value, size, expires_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value), now + self.ttl, now)
+                )
+                self._accessed.pop(key, None)
+                self._flush_accessed()
+                self._bytes += len(value)
+                self._sets += 1
+                if self._bytes > self.max_bytes or self._sets % DISK_EVICT_EVERY_SETS == 0:
+                    self._evict(now)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def usage(self) -> Dict[str, int]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM prompt_cache"
+            ).fetchone()
+        return {"entries": entries, "bytes": size}
+
+
+class PromptCache:
+    """
+    Two-tier cache of parsed model responses, keyed by prompt_key().
+    Lookups try the in-memory LRU first, then the shared disk tier.
+    Cache errors are logged and treated as misses: they never fail a request.
+    """
+
+    def __init__(self, path: str, ttl: float, max_bytes: int, memory_bytes: int):
+        # The memory tier holds JSON text so every hit returns a fresh, mutable object
+        self.memory = ResultCache(memory_bytes, ttl)
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._disk: Optional[DiskCache] = None
+        self._disk_opened = False
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def disk(self) -> Optional[DiskCache]:
+        """Disk tier, opened on first use (None if disabled or unavailable)."""
+        if not self._disk_opened:
+            self._disk_opened = True
+            if self.path:
+                try:
+                    self._disk = DiskCache(self.path, self.ttl, self.max_bytes)
+                except sqlite3.Error:
+                    logger.exception("Prompt cache disk tier unavailable, using memory only")
+        return self._disk
+
+    async def get(self, key: str) -> Optional[Dict]:
+        """Cached response for key, or None."""
+        text = self.memory.get(key)
+        if text is not None:
+            self.memory_hits += 1
+            return json.loads(text)
+        if self.disk is not None:
+            try:
+                text = await asyncio.to_thread(self.disk.get, key)
+            except sqlite3.Error:
+                logger.exception("Prompt cache read failed")
+            if text is not None:
+                self.disk_hits += 1
+                self.memory.set(key, text)
+                return json.loads(text)
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Dict) -> None:
+        """Store a response in both tiers."""
+        text = json.dumps(value)
+        self.memory.set(key, text)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.set, key, text)
+            except sqlite3.Error:
+                logger.exception("Prompt cache write failed")
+
+    async def stats(self) -> Dict[str, float]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        stats = {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "memory_entries": self.memory.stats()["entries"],
+            "memory_bytes": self.memory.bytes,
+            "disk_entries": 0,
+            "disk_bytes": 0,
+        }
+        if self.disk is not None:
+            try:
+                usage = await asyncio.to_thread(self.disk.usage)
+                stats["disk_entries"] = usage["entries"]
+                stats["disk_bytes"] = usage["bytes"]
+            except sqlite3.Error:
+                logger.exception("Prompt cache usage query failed")
+        return stats
+
+
+prompt_cache = PromptCache(
+    PROMPT_CACHE_PATH, PROMPT_CACHE_TTL, PROMPT_CACHE_MAX_BYTES, PROMPT_CACHE_MEMORY_BYTES
+)
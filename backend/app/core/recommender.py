@@ -1,6 +1,21 @@
-from typing import List, Dict, Tuple, Optional
+import heapq
+from typing import AsyncIterator, List, Dict, Tuple, Optional
 from app.models.formation import Formation
 from app.models.job import Job
+from app.core.catalog import CatalogSnapshot
+from app.core.catalog_index import tokenize
+from app.core.keyword_matcher import KeywordMatcher
+from app.core.scoring_executor import run_scoring, work_size
+
+# Query weights, same ratio as the legacy scorer
+COMPETENCE_WEIGHT = 2.0
+INTEREST_WEIGHT = 1.0
+# Words of the free-text goal, only used by AI candidates and the template generator
+GOAL_WEIGHT = 0.5
+# Template skillpaths: formations per learning step, and at most this many steps
+TEMPLATE_FORMATIONS_PER_STEP = 2
+TEMPLATE_MAX_STEPS = 4
+TEMPLATE_PROGRESS = ("beginner->intermediate", "intermediate", "intermediate->advanced", "advanced")
 
 
 def score_formation(formation: Formation, competences: List[str], interests: List[str]) -> Tuple[Formation, float]:
@@ -50,15 +65,104 @@ def score_job(job: Job, competences: List[str], interests: List[str]) -> Tuple[J
     return job, normalized_score
 
 
-async def recommend_keyword(
+def build_query(competences: List[str], interests: List[str]) -> Dict[str, float]:
+    """Turn a user profile into BM25 query weights (token -> weight)."""
+    query: Dict[str, float] = {}
+    for keywords, weight in ((competences, COMPETENCE_WEIGHT), (interests, INTEREST_WEIGHT)):
+        for keyword in keywords:
+            for token in tokenize(keyword):
+                query[token] = max(query.get(token, 0.0), weight)
+    return query
+
+
+def build_goal_query(competences: List[str], interests: List[str], goal: Optional[str]) -> Dict[str, float]:
+    """build_query() plus the words of the goal, weighted GOAL_WEIGHT."""
+    query = build_query(competences, interests)
+    for token in tokenize(goal or ""):
+        query.setdefault(token, GOAL_WEIGHT)
+    return query
+
+
+def select_candidates(
+    catalog: CatalogSnapshot,
+    competences: List[str],
+    interests: List[str],
+    goal: Optional[str],
+    per_kind: int
+) -> List[Tuple[str, object]]:
+    """
+    Preselect up to per_kind formations and jobs for an AI prompt, as ("formation"|"job", record).
+    Records matching the profile (BM25 over competences, interests and goal) come
+    first, best score first across both kinds; the rest is filled in catalog order.
+    """
+    query = build_goal_query(competences, interests, goal)
+    
+    ranked = []
+    fill = []
+    for kind, records, index, live_records in (
+        ("formation", catalog.formations, catalog.formation_index, catalog.iter_formations),
+        ("job", catalog.jobs, catalog.job_index, catalog.iter_jobs),
+    ):
+        top = index.top_k(query, per_kind)
+        ranked.extend((score, kind, records[row]) for row, score in top)
+        chosen = {records[row].id for row, _ in top}
+        missing = per_kind - len(top)
+        for record in live_records():
+            if missing <= 0:
+                break
+            if record.id not in chosen:
+                fill.append((kind, record))
+                missing -= 1
+    
+    ranked.sort(key=lambda entry: -entry[0])
+    return [(kind, record) for _, kind, record in ranked] + fill
+
+
+class ProfileMatcher:
+    """
+    Finds a profile's competences and interests in texts with one automaton.
+    A single pass over a text yields both the legacy keyword score and the
+    competences used in the match reason, however many tags the user sent.
+    """
+
+    def __init__(self, competences: List[str], interests: List[str]):
+        self.competences = competences
+        keywords = [comp.lower() for comp in competences] + [interest.lower() for interest in interests]
+        # Competence matches weigh 2, interest matches 1 (as in score_formation)
+        self.weights = [2] * len(competences) + [1] * len(interests)
+        self.max_score = len(keywords) * 2
+        self.matcher = KeywordMatcher(keywords)
+
+    def match(self, text: str) -> Tuple[float, List[str]]:
+        """Normalized keyword score (0-1) and competences found in the lowercased text."""
+        found = sorted(self.matcher.find(text))
+        score = sum(self.weights[i] for i in found)
+        normalized_score = score / self.max_score if self.max_score > 0 else 0.0
+        matched = [self.competences[i] for i in found if i < len(self.competences)]
+        return normalized_score, matched
+
+    def reason(self, text: str) -> str:
+        """Explain a match by the first competences found in the lowercased text."""
+        return _reason(self.match(text)[1])
+
+
+def _reason(matched: List[str]) -> str:
+    return f"Matches your skills: {', '.join(matched[:2])}"
+
+
+def _match_reason(competences: List[str], text: str) -> str:
+    """Explain a match by the first competences found in the (lowercased) text."""
+    return f"Matches your skills: {', '.join([c for c in competences if c.lower() in text][:2])}"
+
+
+def rank_scan(
     formations: List[Formation],
     jobs: List[Job],
     competences: List[str],
     interests: List[str],
-    goal: Optional[str] = None,
     top_n: int = 5
-) -> Dict:
-    """Recommend formations and jobs based on keyword matching. Returns skillpath structure."""
+) -> Tuple[List[Dict], List[Dict]]:
+    """Legacy ranking: score every row with score_formation/score_job and sort."""
     # Score formations
     scored_formations = [
         score_formation(formation, competences, interests)
@@ -72,7 +176,7 @@ async def recommend_keyword(
             "id": f.id,
             "titre": f.titre,
             "score": round(score, 2),
-            "match_reason": f"Matches your skills: {', '.join([c for c in competences if c.lower() in (f.titre + ' ' + (f.description or '')).lower()][:2])}"
+            "match_reason": _match_reason(competences, (f.titre + ' ' + (f.description or '')).lower())
         }
         for f, score in scored_formations[:top_n] if score > 0
     ]
@@ -90,12 +194,143 @@ async def recommend_keyword(
             "id": job.id,
             "titre": job.titre,
             "score": round(score, 2),
-            "match_reason": f"Matches your skills: {', '.join([c for c in competences if c.lower() in (job.titre + ' ' + (job.description or '')).lower()][:2])}"
+            "match_reason": _match_reason(competences, (job.titre + ' ' + (job.description or '')).lower())
         }
         for job, score in scored_jobs[:top_n] if score > 0
     ]
     
-    # Build simple skillpath structure
+    return top_formations, top_jobs
+
+
+def _ranked_items(records: List, ranked: List[Tuple[int, float]], matcher: ProfileMatcher) -> List[Dict]:
+    """Recommendation items for ranked (row, score) pairs of a snapshot."""
+    items = []
+    for row, score in ranked:
+        record = records[row]
+        items.append({
+            "id": record.id,
+            "titre": record.titre,
+            "score": round(score, 2),
+            "match_reason": matcher.reason(record.text)
+        })
+    return items
+
+
+def rank_catalog(
+    catalog: CatalogSnapshot,
+    competences: List[str],
+    interests: List[str],
+    top_n: int = 5
+) -> Tuple[List[Dict], List[Dict]]:
+    """Rank the catalog with the BM25 indexes, only touching matching documents."""
+    query = build_query(competences, interests)
+    matcher = ProfileMatcher(competences, interests)
+    
+    top_formations = _ranked_items(catalog.formations, catalog.formation_index.top_k(query, top_n), matcher)
+    top_jobs = _ranked_items(catalog.jobs, catalog.job_index.top_k(query, top_n), matcher)
+    
+    return top_formations, top_jobs
+
+
+def rank_catalog_batch(
+    catalog: CatalogSnapshot,
+    profiles: List[Tuple[List[str], List[str], int]]
+) -> List[Tuple[List[Dict], List[Dict]]]:
+    """
+    rank_catalog() for many (competences, interests, top_n) profiles at once:
+    each index scores all profiles with one profiles x catalog sparse product.
+    """
+    queries = [build_query(competences, interests) for competences, interests, _ in profiles]
+    k = max((top_n for _, _, top_n in profiles), default=0)
+    ranked_formations = catalog.formation_index.top_k_batch(queries, k)
+    ranked_jobs = catalog.job_index.top_k_batch(queries, k)
+    
+    results = []
+    for (competences, interests, top_n), formations, jobs in zip(profiles, ranked_formations, ranked_jobs):
+        matcher = ProfileMatcher(competences, interests)
+        results.append((
+            _ranked_items(catalog.formations, formations[:top_n], matcher),
+            _ranked_items(catalog.jobs, jobs[:top_n], matcher)
+        ))
+    return results
+
+
+async def _stream_top_n(batches: AsyncIterator[List], score, top_n: int) -> List[Tuple]:
+    """
+    Keep the top_n rows of a stream of row batches, best first.
+    score(row) returns (score, details); results are (row, score, details).
+    """
+    # Min-heap of (score, -position, row, details): the root is the weakest kept row.
+    # On equal scores the earlier row wins, like the stable sort in rank_scan.
+    heap: List[Tuple] = []
+    position = 0
+    async for batch in batches:
+        for row in batch:
+            position += 1
+            row_score, details = score(row)
+            if row_score <= 0:
+                continue
+            entry = (row_score, -position, row, details)
+            if len(heap) < top_n:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+    return [
+        (row, row_score, details)
+        for row_score, _, row, details in sorted(heap, key=lambda e: e[:2], reverse=True)
+    ]
+
+
+async def rank_stream(
+    formation_batches: AsyncIterator[List],
+    job_batches: AsyncIterator[List],
+    competences: List[str],
+    interests: List[str],
+    top_n: int = 5
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Legacy scoring over the whole catalog read as a stream of batches.
+    Memory stays O(top_n + batch size) whatever the catalog size.
+    """
+    matcher = ProfileMatcher(competences, interests)
+    
+    top_formations = [
+        {
+            "id": f.id,
+            "titre": f.titre,
+            "score": round(score, 2),
+            "match_reason": _reason(matched)
+        }
+        for f, score, matched in await _stream_top_n(
+            formation_batches,
+            lambda f: matcher.match(f"{f.titre} {f.description or ''}".lower()),
+            top_n
+        )
+    ]
+    
+    top_jobs = [
+        {
+            "id": job.id,
+            "titre": job.titre,
+            "score": round(score, 2),
+            "match_reason": matcher.reason(f"{job.titre} {job.description or ''}".lower())
+        }
+        for job, score, _ in await _stream_top_n(
+            job_batches, lambda job: (score_job(job, competences, interests)[1], None), top_n
+        )
+    ]
+    
+    return top_formations, top_jobs
+
+
+def build_skillpath(
+    top_formations: List[Dict],
+    top_jobs: List[Dict],
+    competences: List[str],
+    interests: List[str],
+    goal: Optional[str] = None
+) -> Dict:
+    """Build the skillpath structure from ranked formations and jobs."""
     goal_text = goal or "Achieve your career goals"
     steps = []
     if top_formations:
@@ -131,3 +366,89 @@ async def recommend_keyword(
         "recommended_formations": top_formations
     }
 
+
+def template_skillpath(
+    catalog: CatalogSnapshot,
+    competences: List[str],
+    interests: List[str],
+    goal: Optional[str] = None,
+    top_n: int = 5
+) -> Dict:
+    """
+    Multi-step skillpath built from the catalog without a model: the formations
+    best matching the profile and goal, in learning steps of
+    TEMPLATE_FORMATIONS_PER_STEP, then a step with the best matching jobs.
+    The same inputs always give the same path.
+    """
+    query = build_goal_query(competences, interests, goal)
+    matcher = ProfileMatcher(competences, interests)
+    per_step = TEMPLATE_FORMATIONS_PER_STEP
+    formations = _ranked_items(
+        catalog.formations, catalog.formation_index.top_k(query, max(per_step * TEMPLATE_MAX_STEPS, top_n)), matcher
+    )
+    jobs = _ranked_items(catalog.jobs, catalog.job_index.top_k(query, top_n), matcher)
+    
+    steps = []
+    for start in range(0, min(len(formations), per_step * TEMPLATE_MAX_STEPS), per_step):
+        group = formations[start:start + per_step]
+        level = len(steps)
+        steps.append({
+            "id": f"step-{level + 1}",
+            "title": group[0]["titre"][:60],
+            "duration_weeks": 2 * len(group),
+            "progress_estimate": TEMPLATE_PROGRESS[min(level, len(TEMPLATE_PROGRESS) - 1)],
+            "resources": [
+                {"type": "formation", "id": f["id"], "titre": f["titre"], "url": None, "score": f["score"]}
+                for f in group
+            ],
+            "explanation": group[0]["match_reason"]
+        })
+    if jobs:
+        steps.append({
+            "id": f"step-{len(steps) + 1}",
+            "title": "Apply to matching roles",
+            "duration_weeks": 2,
+            "progress_estimate": "job-ready",
+            "resources": [
+                {"type": "job", "id": j["id"], "titre": j["titre"], "url": None, "score": j["score"]}
+                for j in jobs[:3]
+            ],
+            "explanation": "Roles matching the skills built in the previous steps"
+        })
+    
+    goal_text = goal or "your career goals"
+    return {
+        "title": goal_text[:50],
+        "summary": f"A {len(steps)}-step path towards {goal_text}, built from the catalog entries that best match your profile.",
+        "steps": steps,
+        "recommended_jobs": jobs,
+        "recommended_formations": formations[:top_n]
+    }
+
+
+async def recommend_keyword(
+    catalog: CatalogSnapshot,
+    competences: List[str],
+    interests: List[str],
+    goal: Optional[str] = None,
+    top_n: int = 5
+) -> Dict:
+    """Recommend formations and jobs based on keyword matching. Returns skillpath structure."""
+    # Large catalogs are scored in the scoring executor, not on the event loop
+    top_formations, top_jobs = await run_scoring(
+        rank_catalog, catalog, competences, interests, top_n, size=work_size(catalog)
+    )
+    return build_skillpath(top_formations, top_jobs, competences, interests, goal)
+
+
+async def recommend_streaming(
+    formation_batches: AsyncIterator[List],
+    job_batches: AsyncIterator[List],
+    competences: List[str],
+    interests: List[str],
+    goal: Optional[str] = None,
+    top_n: int = 5
+) -> Dict:
+    """Recommend by scanning every catalog row in batches. Returns skillpath structure."""
+    top_formations, top_jobs = await rank_stream(formation_batches, job_batches, competences, interests, top_n)
+    return build_skillpath(top_formations, top_jobs, competences, interests, goal)
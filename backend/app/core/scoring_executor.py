@@ -0,0 +1,221 @@
+import asyncio
+import functools
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+from app.core.catalog import CatalogSnapshot, peek_catalog
+from app.core.catalog_events import CatalogEvent, subscribe
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Where CPU-bound scoring runs: "inline" (event loop), "thread" or "process".
+# The BM25 engine spends its time in numpy/scipy kernels, which release the GIL,
+# so threads are the default; "process" isolates pure-Python scoring completely.
+SCORING_EXECUTOR = os.getenv("SCORING_EXECUTOR", "thread").lower()
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Work below this size (catalog rows x profiles) is scored inline: shipping it
+# to a worker would cost more than the scoring itself.
+SCORING_INLINE_THRESHOLD = int(os.getenv("SCORING_INLINE_THRESHOLD", "20000"))
+
+# Process mode: catalog writes are sent to the workers with each call and applied
+# there (CatalogSnapshot.apply), so a write does not restart the pool. The pool is
+# replaced, at most every SCORING_POOL_MIN_REBUILD_SECONDS, only after a full catalog
+# reload or once more than SCORING_MAX_DELTA_EVENTS events are pending; until then
+# calls the workers cannot serve are scored in threads.
+SCORING_MAX_DELTA_EVENTS = int(os.getenv("SCORING_MAX_DELTA_EVENTS", "2000"))
+SCORING_POOL_MIN_REBUILD_SECONDS = float(os.getenv("SCORING_POOL_MIN_REBUILD_SECONDS", "60"))
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+# Catalog version the pool's workers were started with
+_process_pool_version: Optional[int] = None
+_process_pool_started = 0.0
+# Replaced pool finishing its calls; while it has some, no further pool is started
+_retired_pool: Optional[ProcessPoolExecutor] = None
+_in_flight: Dict[int, int] = {}
+# (catalog version, events) of the writes since _process_pool_version, in order,
+# dropped once every worker has applied them
+_deltas: List[Tuple[int, List[CatalogEvent]]] = []
+_delta_events = 0
+# Highest catalog version the workers can reach by applying _deltas
+_delta_head: Optional[int] = None
+# Latest catalog version reported by each worker process
+_worker_versions: Dict[int, int] = {}
+# Highest catalog version sent to the pool: workers only move forward, so calls
+# for an older snapshot (a /batch request scoring chunks over time) go to threads
+_dispatched_version: Optional[int] = None
+
+# Snapshot held by each worker process, set by the pool initializer and then
+# moved forward by the deltas sent with each call
+_worker_catalog: Optional[CatalogSnapshot] = None
+
+
+class WorkerCatalogMismatch(Exception):
+    """A worker's snapshot cannot be brought to the version of the call."""
+
+    def __init__(self, pid: int, version: int):
+        super().__init__(pid, version)
+        self.pid = pid
+        self.version = version
+
+
+def _init_worker(catalog: CatalogSnapshot) -> None:
+    global _worker_catalog
+    _worker_catalog = catalog
+
+
+def _score_in_worker(
+    func: Callable[..., T],
+    version: int,
+    deltas: List[Tuple[int, List[CatalogEvent]]],
+    args: tuple
+) -> Tuple[int, int, T]:
+    """
+    Bring the worker's snapshot up to version with the deltas it has not applied
+    yet, then run func(snapshot, *args). Returns (pid, snapshot version, result).
+    """
+    global _worker_catalog
+    for delta_version, events in deltas:
+        if delta_version == _worker_catalog.version + 1:
+            _worker_catalog = _worker_catalog.apply(events)
+    if _worker_catalog.version != version:
+        raise WorkerCatalogMismatch(os.getpid(), _worker_catalog.version)
+    return os.getpid(), _worker_catalog.version, func(_worker_catalog, *args)
+
+
+def _record_catalog_events(events: List[CatalogEvent]) -> None:
+    """Queue published writes for the workers (runs after the catalog has applied them)."""
+    global _delta_events, _delta_head
+    catalog = peek_catalog()
+    if _process_pool is None or catalog is None:
+        return
+    if catalog.version != _delta_head + 1:
+        return  # A full reload came in between: only a new pool can catch up
+    _deltas.append((catalog.version, events))
+    _delta_events += len(events)
+    _delta_head = catalog.version
+
+
+def _trim_deltas() -> None:
+    """Drop the deltas every worker has applied."""
+    global _delta_events
+    if len(_worker_versions) < SCORING_WORKERS:
+        return  # Some worker has not run yet and still holds the starting version
+    applied = min(_worker_versions.values())
+    while _deltas and _deltas[0][0] <= applied:
+        _delta_events -= len(_deltas.pop(0)[1])
+
+
+def _get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=SCORING_WORKERS, thread_name_prefix="scoring")
+    return _thread_pool
+
+
+def _get_process_pool(catalog: CatalogSnapshot) -> Optional[ProcessPoolExecutor]:
+    """
+    Process pool whose workers can reach this catalog version, or None when the
+    call has to be scored in a thread instead. The snapshot is pickled once per
+    worker when a pool starts.
+    """
+    global _process_pool, _process_pool_version, _process_pool_started, _retired_pool
+    global _deltas, _delta_events, _delta_head, _worker_versions, _dispatched_version
+    if _process_pool is not None:
+        if _dispatched_version <= catalog.version <= _delta_head and _delta_events <= SCORING_MAX_DELTA_EVENTS:
+            return _process_pool
+        if catalog.version < _dispatched_version:
+            return None  # Snapshot older than one the workers may already hold
+        if time.monotonic() - _process_pool_started < SCORING_POOL_MIN_REBUILD_SECONDS:
+            return None
+        if _retired_pool is not None and _in_flight.get(id(_retired_pool)):
+            return None  # The previous pool is still finishing its calls
+        _process_pool.shutdown(wait=False)
+        _retired_pool = _process_pool
+    _process_pool = ProcessPoolExecutor(
+        max_workers=SCORING_WORKERS,
+        initializer=_init_worker,
+        initargs=(catalog,)
+    )
+    _process_pool_version = _delta_head = _dispatched_version = catalog.version
+    _process_pool_started = time.monotonic()
+    _deltas, _delta_events, _worker_versions = [], 0, {}
+    logger.info("Scoring process pool started for catalog version %d", catalog.version)
+    return _process_pool
+
+
+async def _run_in_process_pool(
+    pool: ProcessPoolExecutor,
+    func: Callable[..., T],
+    catalog: CatalogSnapshot,
+    args: tuple
+) -> T:
+    global _dispatched_version
+    deltas = [delta for delta in _deltas if delta[0] <= catalog.version]
+    call = functools.partial(_score_in_worker, func, catalog.version, deltas, args)
+    _dispatched_version = max(_dispatched_version, catalog.version)
+    _in_flight[id(pool)] = _in_flight.get(id(pool), 0) + 1
+    try:
+        pid, version, result = await asyncio.get_running_loop().run_in_executor(pool, call)
+    except WorkerCatalogMismatch as e:
+        # Not expected (see _dispatched_version), and the snapshot itself is fine
+        logger.warning("Scoring worker %d holds catalog version %d, scoring in a thread", e.pid, e.version)
+        pid, version, result = e.pid, e.version, await _run_in_thread(func, catalog, args)
+    finally:
+        _in_flight[id(pool)] -= 1
+        if not _in_flight[id(pool)]:
+            del _in_flight[id(pool)]
+    if pool is _process_pool:
+        _worker_versions[pid] = max(version, _worker_versions.get(pid, version))
+        _trim_deltas()
+    return result
+
+
+async def _run_in_thread(func: Callable[..., T], catalog: CatalogSnapshot, args: tuple) -> T:
+    # Threads share the snapshot by reference: nothing is copied
+    call = functools.partial(func, catalog, *args)
+    return await asyncio.get_running_loop().run_in_executor(_get_thread_pool(), call)
+
+
+def work_size(catalog: CatalogSnapshot, profiles: int = 1) -> int:
+    """Amount of scoring work: catalog rows times number of profiles."""
+    return (len(catalog.formations) + len(catalog.jobs)) * profiles
+
+
+async def run_scoring(func: Callable[..., T], catalog: CatalogSnapshot, *args, size: int = 0) -> T:
+    """
+    Run func(catalog, *args) off the event loop when size reaches the inline threshold.
+    In process mode func must be a module-level (picklable) function.
+    """
+    if SCORING_EXECUTOR == "inline" or size < SCORING_INLINE_THRESHOLD:
+        return func(catalog, *args)
+
+    if SCORING_EXECUTOR == "process":
+        pool = _get_process_pool(catalog)
+        if pool is not None:
+            return await _run_in_process_pool(pool, func, catalog, args)
+    return await _run_in_thread(func, catalog, args)
+
+
+def shutdown_scoring() -> None:
+    """Stop the scoring pools (application shutdown)."""
+    global _thread_pool, _process_pool, _process_pool_version, _retired_pool
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+        _process_pool_version = None
+    if _retired_pool is not None:
+        _retired_pool.shutdown(wait=False, cancel_futures=True)
+        _retired_pool = None
+
+
+# Registered after the catalog's own handler (imported above), so peek_catalog()
+# already returns the version the events produced
+subscribe(_record_catalog_events)
@@ -5,7 +5,7 @@ import bcrypt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.config.database import get_db
+from app.config.database import AsyncSessionLocal, get_db
 from app.models.user import User
 from app.models.admin import Admin
 
@@ -141,6 +141,21 @@ async def get_current_admin(
         raise credentials_exception
 
 
+async def get_stream_user(token: str = Depends(oauth2_scheme)) -> User:
+    """
+    get_current_user for streaming routes: the user is loaded in a short session of
+    its own, so no pool connection is held while the response streams.
+    """
+    async with AsyncSessionLocal() as db:
+        return await get_current_user(token, db)
+
+
+async def get_stream_admin(token: str = Depends(oauth2_scheme)) -> Admin:
+    """get_current_admin for streaming routes (see get_stream_user)."""
+    async with AsyncSessionLocal() as db:
+        return await get_current_admin(token, db)
+
+
 async def get_current_content_creator(
     current_user: User = Depends(get_current_user)
 ) -> User:
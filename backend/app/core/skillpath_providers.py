@@ -0,0 +1,345 @@
+import copy
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from fastapi import HTTPException, status
+from app.core.catalog import CatalogSnapshot
+from app.core.recommender import select_candidates, template_skillpath
+from app.core.scoring_executor import run_scoring, work_size
+from app.core import gemini_client
+
+MOCK_MODE = os.getenv("MOCK_MODE", "false").lower() == "true"
+# Providers in order of preference (gemini, template, mock); later ones are failovers
+SKILLPATH_PROVIDERS = [
+    name.strip()
+    for name in os.getenv("SKILLPATH_PROVIDERS", "mock" if MOCK_MODE else "gemini").split(",")
+    if name.strip()
+]
+# priority: first available provider; latency: first whose p95 fits SKILLPATH_LATENCY_BUDGET_MS,
+# else the fastest; cost: cheapest available
+SKILLPATH_ROUTING = os.getenv("SKILLPATH_ROUTING", "priority")
+SKILLPATH_LATENCY_BUDGET_MS = float(os.getenv("SKILLPATH_LATENCY_BUDGET_MS", "3000"))
+# Relative cost of one call per provider, e.g. "gemini=1,template=0"
+SKILLPATH_PROVIDER_COSTS = os.getenv("SKILLPATH_PROVIDER_COSTS", "gemini=1,template=0,mock=0")
+# Calls observed before the latency policy trusts a provider's p95
+SKILLPATH_MIN_SAMPLES = 10
+
+# Candidates preselected per kind for AI prompts (then packed into the token budget)
+AI_CANDIDATES_PER_KIND = int(os.getenv("AI_CANDIDATES_PER_KIND", "30"))
+
+# Upper bounds (ms) of the latency histogram buckets; slower calls go in an overflow bucket
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+ROUTING_POLICIES = ("priority", "latency", "cost")
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram of a provider's successful calls, plus error count."""
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.errors = 0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (0 when empty)."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return float(self.bounds[min(i, len(self.bounds) - 1)])
+        return float(self.bounds[-1])
+
+    def snapshot(self) -> Dict:
+        buckets = {f"le_{bound}": count for bound, count in zip(self.bounds, self.counts)}
+        buckets["overflow"] = self.counts[-1]
+        return {
+            "calls": self.count,
+            "errors": self.errors,
+            "mean_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "buckets": buckets,
+        }
+
+
+class SkillpathProvider(ABC):
+    """
+    Generates a skillpath for a profile.
+
+    generate() returns a skillpath dict (title, summary, steps,
+    recommended_jobs, recommended_formations); stream() yields its JSON text in
+    chunks. Catalog IDs are checked by the caller, whatever the provider.
+    """
+
+    name = ""
+
+    def available(self) -> bool:
+        """Whether the provider can take a call now."""
+        return True
+
+    @abstractmethod
+    async def generate(
+        self, goal: str, competences: List[str], interests: List[str], catalog: CatalogSnapshot
+    ) -> Dict:
+        """The skillpath dict for the profile."""
+
+    async def stream(
+        self, goal: str, competences: List[str], interests: List[str], catalog: CatalogSnapshot
+    ) -> AsyncIterator[str]:
+        yield json.dumps(await self.generate(goal, competences, interests, catalog))
+
+
+def ai_candidates(
+    catalog: CatalogSnapshot,
+    competences: List[str],
+    interests: List[str],
+    goal: str
+) -> List[Dict]:
+    """Formations and jobs offered to Gemini as candidates, most relevant to the profile first."""
+    candidates = []
+    for kind, record in select_candidates(catalog, competences, interests, goal, AI_CANDIDATES_PER_KIND):
+        if kind == "formation":
+            candidates.append({
+                "id": record.id,
+                "type": "formation",
+                "title": record.titre,
+                "titre": record.titre,
+                "description": record.description or "",
+                "skills": []  # Formations don't have skills in current schema
+            })
+        else:
+            candidates.append({
+                "id": record.id,
+                "type": "job",
+                "title": record.titre,
+                "titre": record.titre,
+                "description": record.description or "",
+                "requirements": list(record.requirements),
+                "skills": list(record.requirements)
+            })
+    return candidates
+
+
+class GeminiProvider(SkillpathProvider):
+    """Gemini with the prompt built from the profile and preselected catalog candidates."""
+
+    name = "gemini"
+
+    def available(self) -> bool:
+        # An open breaker would reject the call at once: route around it instead
+        return bool(gemini_client.GEMINI_API_KEY) and gemini_client.gemini_guard.breaker.retry_in() == 0
+
+    def prompt(self, goal: str, competences: List[str], interests: List[str], catalog: CatalogSnapshot) -> str:
+        return gemini_client.build_gemini_prompt(
+            goal=goal,
+            competences=competences,
+            interests=interests,
+            candidates=ai_candidates(catalog, competences, interests, goal)
+        )
+
+    async def generate(self, goal, competences, interests, catalog) -> Dict:
+        return await gemini_client.send_skillpath_request(self.prompt(goal, competences, interests, catalog))
+
+    async def stream(self, goal, competences, interests, catalog) -> AsyncIterator[str]:
+        async for chunk in gemini_client.stream_skillpath_request(self.prompt(goal, competences, interests, catalog)):
+            yield chunk
+
+
+MOCK_SKILLPATH = {
+    "title": "Become Backend Developer",
+    "summary": "A structured path to master backend development with Python and FastAPI.",
+    "steps": [
+        {
+            "id": "step-1",
+            "title": "Learn Python basics",
+            "duration_weeks": 2,
+            "progress_estimate": "beginner->intermediate",
+            "resources": [
+                {"type": "formation", "id": 1, "titre": "Python Fundamentals", "url": None, "score": 0.9},
+                {"type": "external", "id": None, "titre": "Python Official Docs", "url": "https://docs.python.org", "score": 0.8}
+            ],
+            "explanation": "Master Python fundamentals before moving to frameworks"
+        },
+        {
+            "id": "step-2",
+            "title": "Learn FastAPI framework",
+            "duration_weeks": 3,
+            "progress_estimate": "intermediate->advanced",
+            "resources": [
+                {"type": "formation", "id": 2, "titre": "FastAPI for Beginners", "url": None, "score": 0.95}
+            ],
+            "explanation": "Build REST APIs with FastAPI"
+        }
+    ],
+    "recommended_jobs": [
+        {"id": 1, "titre": "Backend Developer", "score": 0.95, "match_reason": "Perfect match for Python backend skills"}
+    ],
+    "recommended_formations": [
+        {"id": 1, "titre": "Python Fundamentals", "score": 0.9, "match_reason": "Essential foundation for backend development"}
+    ]
+}
+
+
+class MockProvider(SkillpathProvider):
+    """Deterministic mock response for testing (MOCK_MODE)."""
+
+    name = "mock"
+
+    async def generate(self, goal, competences, interests, catalog) -> Dict:
+        return copy.deepcopy(MOCK_SKILLPATH)
+
+    async def stream(self, goal, competences, interests, catalog) -> AsyncIterator[str]:
+        text = json.dumps(MOCK_SKILLPATH)
+        for start in range(0, len(text), 64):
+            yield text[start:start + 64]
+
+
+class TemplateProvider(SkillpathProvider):
+    """Local multi-step paths from the catalog (template_skillpath): no network, same input same path."""
+
+    name = "template"
+
+    async def generate(self, goal, competences, interests, catalog) -> Dict:
+        return await run_scoring(
+            template_skillpath, catalog, competences, interests, goal, size=work_size(catalog)
+        )
+
+
+PROVIDERS = {provider.name: provider for provider in (GeminiProvider(), MockProvider(), TemplateProvider())}
+
+
+def parse_costs(value: str) -> Dict[str, float]:
+    """Parse "name=cost,name=cost"."""
+    costs = {}
+    for item in value.split(","):
+        name, _, cost = item.partition("=")
+        if name.strip():
+            costs[name.strip()] = float(cost or 0)
+    return costs
+
+
+class SkillpathRouter:
+    """
+    Picks the provider of each request by policy, fails over to the next one,
+    and records per-provider latency histograms to check the choices.
+    """
+
+    def __init__(
+        self,
+        providers: List[SkillpathProvider],
+        policy: str = "priority",
+        latency_budget_ms: float = SKILLPATH_LATENCY_BUDGET_MS,
+        costs: Optional[Dict[str, float]] = None
+    ):
+        if policy not in ROUTING_POLICIES:
+            raise ValueError(f"SKILLPATH_ROUTING must be one of {', '.join(ROUTING_POLICIES)}")
+        if not providers:
+            raise ValueError("SKILLPATH_PROVIDERS lists no provider")
+        self.providers = providers
+        self.policy = policy
+        self.latency_budget_ms = latency_budget_ms
+        self.costs = costs or {}
+        self.histograms = {provider.name: LatencyHistogram() for provider in providers}
+        self.chosen = {provider.name: 0 for provider in providers}
+
+    def plan(self) -> List[SkillpathProvider]:
+        """Available providers, in the order they should be tried."""
+        available = [provider for provider in self.providers if provider.available()]
+        if self.policy == "cost":
+            # Stable sort: configured order breaks ties
+            return sorted(available, key=lambda provider: self.costs.get(provider.name, 0.0))
+        if self.policy == "latency":
+            def p95(provider: SkillpathProvider) -> float:
+                histogram = self.histograms[provider.name]
+                # Too few calls to judge: assume it fits, so it gets measured
+                return histogram.percentile(95) if histogram.count >= SKILLPATH_MIN_SAMPLES else 0.0
+            fits = [provider for provider in available if p95(provider) <= self.latency_budget_ms]
+            return fits + sorted((p for p in available if p not in fits), key=p95)
+        return available
+
+    async def generate(
+        self, goal: str, competences: List[str], interests: List[str], catalog: CatalogSnapshot
+    ) -> Tuple[str, Dict]:
+        """(provider name, skillpath) from the first provider of the plan that succeeds."""
+        error: Optional[Exception] = None
+        for provider in self.plan():
+            histogram = self.histograms[provider.name]
+            start = time.perf_counter()
+            try:
+                skillpath = await provider.generate(goal, competences, interests, catalog)
+            except Exception as e:
+                histogram.errors += 1
+                error = e
+                continue
+            histogram.observe((time.perf_counter() - start) * 1000)
+            self.chosen[provider.name] += 1
+            return provider.name, skillpath
+        if error is not None:
+            raise error
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="No skillpath provider available"
+        )
+
+    def stream_provider(self) -> SkillpathProvider:
+        """Provider for a streamed request: the first of the plan (no failover once output is sent)."""
+        plan = self.plan()
+        if not plan:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="No skillpath provider available"
+            )
+        self.chosen[plan[0].name] += 1
+        return plan[0]
+
+    def record(self, name: str, ms: Optional[float]) -> None:
+        """Record a call made outside generate() (streams); None for a failed one."""
+        if ms is None:
+            self.histograms[name].errors += 1
+        else:
+            self.histograms[name].observe(ms)
+
+    def stats(self) -> Dict:
+        return {
+            "policy": self.policy,
+            "latency_budget_ms": self.latency_budget_ms,
+            "providers": [
+                {
+                    "name": provider.name,
+                    "available": provider.available(),
+                    "cost": self.costs.get(provider.name, 0.0),
+                    "chosen": self.chosen[provider.name],
+                    **self.histograms[provider.name].snapshot(),
+                }
+                for provider in self.providers
+            ],
+        }
+
+
+def _configured_providers() -> List[SkillpathProvider]:
+    unknown = [name for name in SKILLPATH_PROVIDERS if name not in PROVIDERS]
+    if unknown:
+        raise ValueError(f"Unknown SKILLPATH_PROVIDERS: {', '.join(unknown)} (use {', '.join(PROVIDERS)})")
+    return [PROVIDERS[name] for name in SKILLPATH_PROVIDERS]
+
+
+skillpath_router = SkillpathRouter(
+    _configured_providers(),
+    policy=SKILLPATH_ROUTING,
+    latency_budget_ms=SKILLPATH_LATENCY_BUDGET_MS,
+    costs=parse_costs(SKILLPATH_PROVIDER_COSTS)
+)
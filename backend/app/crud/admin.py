@@ -1,10 +1,14 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 from app.models.admin import Admin
+from app.core.pagination import keyset
 from app.schemas.admin import AdminCreate, AdminUpdate
 from app.core.security import get_password_hash
 
+# Indexed columns, besides id, the list can be sorted on
+SORT_KEYS = ("email",)
+
 
 async def create_admin(db: AsyncSession, admin: AdminCreate) -> Admin:
     """Create a new admin."""
@@ -33,9 +37,15 @@ async def get_admin_by_email(db: AsyncSession, email: str) -> Optional[Admin]:
     return result.scalar_one_or_none()
 
 
-async def get_admins(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Admin]:
-    """Get all admins."""
-    result = await db.execute(select(Admin).offset(skip).limit(limit))
+async def get_admins(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    sort: str = "id",
+    after: Optional[Tuple[Any, int]] = None
+) -> List[Admin]:
+    """Get all admins in sort order, after a cursor position (keyset) or skipping skip rows."""
+    result = await db.execute(keyset(select(Admin), Admin, sort, after).offset(skip).limit(limit))
     return result.scalars().all()
 
 
@@ -1,9 +1,13 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 from app.models.category import Category
+from app.core.pagination import keyset
 from app.schemas.category import CategoryCreate, CategoryUpdate
 
+# Indexed columns, besides id, the list can be sorted on
+SORT_KEYS = ("nom",)
+
 
 async def create_category(db: AsyncSession, category: CategoryCreate) -> Category:
     """Create a new category."""
@@ -20,9 +24,15 @@ async def get_category(db: AsyncSession, category_id: int) -> Optional[Category]
     return result.scalar_one_or_none()
 
 
-async def get_categories(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Category]:
-    """Get all categories."""
-    result = await db.execute(select(Category).offset(skip).limit(limit))
+async def get_categories(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    sort: str = "id",
+    after: Optional[Tuple[Any, int]] = None
+) -> List[Category]:
+    """Get all categories in sort order, after a cursor position (keyset) or skipping skip rows."""
+    result = await db.execute(keyset(select(Category), Category, sort, after).offset(skip).limit(limit))
     return result.scalars().all()
 
 
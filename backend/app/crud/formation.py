@@ -1,9 +1,22 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List, Optional
+from sqlalchemy import func, insert, select
+from typing import Any, AsyncIterator, List, Optional, Tuple
 from app.models.formation import Formation
+from app.core.pagination import keyset
+from app.core.catalog_events import CatalogEvent, publish
 from app.schemas.formation import FormationCreate, FormationUpdate
 
+# Indexed columns the list can be sorted on (category_id through its foreign key)
+SORT_KEYS = ("category_id",)
+
+
+def _upsert_event(db_formation: Formation) -> CatalogEvent:
+    """Catalog event carrying the columns used by the recommender."""
+    return CatalogEvent("formation", "upsert", db_formation.id, {
+        "titre": db_formation.titre,
+        "description": db_formation.description
+    })
+
 
 async def create_formation(db: AsyncSession, formation: FormationCreate) -> Formation:
     """Create a new formation."""
@@ -16,21 +29,65 @@ async def create_formation(db: AsyncSession, formation: FormationCreate) -> Form
     db.add(db_formation)
     await db.commit()
     await db.refresh(db_formation)
+    publish(_upsert_event(db_formation))
     return db_formation
 
 
+async def bulk_create_formations(db: AsyncSession, formations: List[FormationCreate]) -> None:
+    """
+    Create formations with one multi-row INSERT and commit.
+    The new rows are found by id (above the previous maximum) for the catalog events.
+    """
+    last_id = (await db.execute(select(func.max(Formation.id)))).scalar() or 0
+    await db.execute(insert(Formation).values([formation.model_dump() for formation in formations]))
+    await db.commit()
+    result = await db.execute(
+        select(Formation.id, Formation.titre, Formation.description).where(Formation.id > last_id)
+    )
+    publish(*(
+        CatalogEvent("formation", "upsert", row.id, {"titre": row.titre, "description": row.description})
+        for row in result
+    ))
+
+
 async def get_formation(db: AsyncSession, formation_id: int) -> Optional[Formation]:
     """Get a formation by ID."""
     result = await db.execute(select(Formation).where(Formation.id == formation_id))
     return result.scalar_one_or_none()
 
 
-async def get_formations(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Formation]:
-    """Get all formations."""
-    result = await db.execute(select(Formation).offset(skip).limit(limit))
+async def get_formations(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    sort: str = "id",
+    after: Optional[Tuple[Any, int]] = None
+) -> List[Formation]:
+    """Get all formations in sort order, after a cursor position (keyset) or skipping skip rows."""
+    result = await db.execute(keyset(select(Formation), Formation, sort, after).offset(skip).limit(limit))
     return result.scalars().all()
 
 
+async def iter_formation_batches(db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[List]:
+    """
+    Yield every formation in id order, batch_size rows at a time.
+    Uses keyset pagination and only selects the columns used by the recommender.
+    """
+    last_id = 0
+    while True:
+        result = await db.execute(
+            select(Formation.id, Formation.titre, Formation.description)
+            .where(Formation.id > last_id)
+            .order_by(Formation.id)
+            .limit(batch_size)
+        )
+        rows = result.all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
 async def update_formation(db: AsyncSession, formation_id: int, formation_update: FormationUpdate) -> Optional[Formation]:
     """Update a formation."""
     db_formation = await get_formation(db, formation_id)
@@ -43,6 +100,7 @@ async def update_formation(db: AsyncSession, formation_id: int, formation_update
     
     await db.commit()
     await db.refresh(db_formation)
+    publish(_upsert_event(db_formation))
     return db_formation
 
 
@@ -54,4 +112,5 @@ async def delete_formation(db: AsyncSession, formation_id: int) -> bool:
     
     await db.delete(db_formation)
     await db.commit()
+    publish(CatalogEvent("formation", "delete", formation_id))
     return True
@@ -1,9 +1,23 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List, Optional
+from sqlalchemy import func, insert, select
+from typing import Any, AsyncIterator, List, Optional, Tuple
 from app.models.job import Job
+from app.core.pagination import keyset
+from app.core.catalog_events import CatalogEvent, publish
 from app.schemas.job import JobCreate, JobUpdate
 
+# Indexed columns, besides id, the list can be sorted on
+SORT_KEYS = ()
+
+
+def _upsert_event(db_job: Job) -> CatalogEvent:
+    """Catalog event carrying the columns used by the recommender."""
+    return CatalogEvent("job", "upsert", db_job.id, {
+        "titre": db_job.titre,
+        "description": db_job.description,
+        "requirements": db_job.requirements
+    })
+
 
 async def create_job(db: AsyncSession, job: JobCreate) -> Job:
     """Create a new job."""
@@ -17,21 +31,69 @@ async def create_job(db: AsyncSession, job: JobCreate) -> Job:
     db.add(db_job)
     await db.commit()
     await db.refresh(db_job)
+    publish(_upsert_event(db_job))
     return db_job
 
 
+async def bulk_create_jobs(db: AsyncSession, jobs: List[JobCreate]) -> None:
+    """
+    Create jobs with one multi-row INSERT and commit.
+    The new rows are found by id (above the previous maximum) for the catalog events.
+    """
+    last_id = (await db.execute(select(func.max(Job.id)))).scalar() or 0
+    await db.execute(insert(Job).values([job.model_dump() for job in jobs]))
+    await db.commit()
+    result = await db.execute(
+        select(Job.id, Job.titre, Job.description, Job.requirements).where(Job.id > last_id)
+    )
+    publish(*(
+        CatalogEvent("job", "upsert", row.id, {
+            "titre": row.titre,
+            "description": row.description,
+            "requirements": row.requirements
+        })
+        for row in result
+    ))
+
+
 async def get_job(db: AsyncSession, job_id: int) -> Optional[Job]:
     """Get a job by ID."""
     result = await db.execute(select(Job).where(Job.id == job_id))
     return result.scalar_one_or_none()
 
 
-async def get_jobs(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Job]:
-    """Get all jobs."""
-    result = await db.execute(select(Job).offset(skip).limit(limit))
+async def get_jobs(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    sort: str = "id",
+    after: Optional[Tuple[Any, int]] = None
+) -> List[Job]:
+    """Get all jobs in sort order, after a cursor position (keyset) or skipping skip rows."""
+    result = await db.execute(keyset(select(Job), Job, sort, after).offset(skip).limit(limit))
     return result.scalars().all()
 
 
+async def iter_job_batches(db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[List]:
+    """
+    Yield every job in id order, batch_size rows at a time.
+    Uses keyset pagination and only selects the columns used by the recommender.
+    """
+    last_id = 0
+    while True:
+        result = await db.execute(
+            select(Job.id, Job.titre, Job.description, Job.requirements)
+            .where(Job.id > last_id)
+            .order_by(Job.id)
+            .limit(batch_size)
+        )
+        rows = result.all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
 async def update_job(db: AsyncSession, job_id: int, job_update: JobUpdate) -> Optional[Job]:
     """Update a job."""
     db_job = await get_job(db, job_id)
@@ -44,6 +106,7 @@ async def update_job(db: AsyncSession, job_id: int, job_update: JobUpdate) -> Op
     
     await db.commit()
     await db.refresh(db_job)
+    publish(_upsert_event(db_job))
     return db_job
 
 
@@ -55,5 +118,6 @@ async def delete_job(db: AsyncSession, job_id: int) -> bool:
     
     await db.delete(db_job)
     await db.commit()
+    publish(CatalogEvent("job", "delete", job_id))
     return True
 
@@ -1,9 +1,13 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 from app.models.parcours import Parcours
+from app.core.pagination import keyset
 from app.schemas.parcours import ParcoursCreate, ParcoursUpdate
 
+# Indexed columns, besides id, the list can be sorted on
+SORT_KEYS = ()
+
 
 async def create_parcours(db: AsyncSession, parcours: ParcoursCreate) -> Parcours:
     """Create a new parcours."""
@@ -24,9 +28,15 @@ async def get_parcours(db: AsyncSession, parcours_id: int) -> Optional[Parcours]
     return result.scalar_one_or_none()
 
 
-async def get_parcours_list(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Parcours]:
-    """Get all parcours."""
-    result = await db.execute(select(Parcours).offset(skip).limit(limit))
+async def get_parcours_list(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    sort: str = "id",
+    after: Optional[Tuple[Any, int]] = None
+) -> List[Parcours]:
+    """Get all parcours in sort order, after a cursor position (keyset) or skipping skip rows."""
+    result = await db.execute(keyset(select(Parcours), Parcours, sort, after).offset(skip).limit(limit))
     return result.scalars().all()
 
 
@@ -0,0 +1,125 @@
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete
+from typing import Dict, List, Optional
+from app.models.skillpath_job import SkillpathJob
+
+PENDING_STATUSES = ("queued", "running")
+
+
+async def create_skillpath_job(
+    db: AsyncSession,
+    job_id: str,
+    user_id: int,
+    request_key: str,
+    request: Dict,
+    created_at: datetime
+) -> SkillpathJob:
+    """Create a queued skillpath job."""
+    db_job = SkillpathJob(
+        id=job_id,
+        user_id=user_id,
+        request_key=request_key,
+        request=request,
+        status="queued",
+        created_at=created_at
+    )
+    db.add(db_job)
+    await db.commit()
+    await db.refresh(db_job)
+    return db_job
+
+
+async def get_skillpath_job(db: AsyncSession, job_id: str) -> Optional[SkillpathJob]:
+    """Get a skillpath job by ID."""
+    result = await db.execute(select(SkillpathJob).where(SkillpathJob.id == job_id))
+    return result.scalar_one_or_none()
+
+
+async def get_pending_skillpath_job(db: AsyncSession, user_id: int, request_key: str) -> Optional[SkillpathJob]:
+    """Get a queued or running job of the user for the same request."""
+    result = await db.execute(
+        select(SkillpathJob)
+        .where(
+            SkillpathJob.user_id == user_id,
+            SkillpathJob.request_key == request_key,
+            SkillpathJob.status.in_(PENDING_STATUSES)
+        )
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def claim_skillpath_job(db: AsyncSession, job_id: str, started_at: datetime) -> bool:
+    """Move a queued job to running. False if another worker already took it."""
+    result = await db.execute(
+        update(SkillpathJob)
+        .where(SkillpathJob.id == job_id, SkillpathJob.status == "queued")
+        .values(status="running", started_at=started_at)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def finish_skillpath_job(
+    db: AsyncSession,
+    job_id: str,
+    finished_at: datetime,
+    result: Optional[Dict] = None,
+    error: Optional[str] = None
+) -> None:
+    """Store the result (status done) or the error (status failed) of a running job."""
+    await db.execute(
+        update(SkillpathJob)
+        .where(SkillpathJob.id == job_id)
+        .values(
+            status="failed" if error is not None else "done",
+            result=result,
+            error=error,
+            finished_at=finished_at
+        )
+    )
+    await db.commit()
+
+
+async def requeue_skillpath_jobs(db: AsyncSession, job_ids: List[str]) -> None:
+    """Put running jobs back in the queue (worker stopped before finishing them)."""
+    if not job_ids:
+        return
+    await db.execute(
+        update(SkillpathJob)
+        .where(SkillpathJob.id.in_(job_ids), SkillpathJob.status == "running")
+        .values(status="queued", started_at=None)
+    )
+    await db.commit()
+
+
+async def recover_skillpath_jobs(db: AsyncSession, stale_before: datetime) -> List[str]:
+    """
+    Requeue jobs left running since before stale_before (their worker died) and
+    return the IDs of all queued jobs, oldest first.
+    """
+    await db.execute(
+        update(SkillpathJob)
+        .where(SkillpathJob.status == "running", SkillpathJob.started_at < stale_before)
+        .values(status="queued", started_at=None)
+    )
+    await db.commit()
+    result = await db.execute(
+        select(SkillpathJob.id)
+        .where(SkillpathJob.status == "queued")
+        .order_by(SkillpathJob.created_at)
+    )
+    return list(result.scalars().all())
+
+
+async def delete_finished_skillpath_jobs(db: AsyncSession, finished_before: datetime) -> int:
+    """Delete done and failed jobs finished before finished_before."""
+    result = await db.execute(
+        delete(SkillpathJob).where(
+            SkillpathJob.status.in_(("done", "failed")),
+            SkillpathJob.finished_at < finished_before
+        )
+    )
+    await db.commit()
+    return result.rowcount
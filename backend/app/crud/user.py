@@ -1,10 +1,14 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 from app.models.user import User
+from app.core.pagination import keyset
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import get_password_hash
 
+# Indexed columns, besides id, the list can be sorted on
+SORT_KEYS = ("email",)
+
 
 async def create_user(db: AsyncSession, user: UserCreate) -> User:
     """Create a new user."""
@@ -36,9 +40,15 @@ async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     return result.scalar_one_or_none()
 
 
-async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
-    """Get all users."""
-    result = await db.execute(select(User).offset(skip).limit(limit))
+async def get_users(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    sort: str = "id",
+    after: Optional[Tuple[Any, int]] = None
+) -> List[User]:
+    """Get all users in sort order, after a cursor position (keyset) or skipping skip rows."""
+    result = await db.execute(keyset(select(User), User, sort, after).offset(skip).limit(limit))
     return result.scalars().all()
 
 
@@ -1,20 +1,29 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from dotenv import load_dotenv
 import os
 
 # Load environment variables from .env file
 load_dotenv()
 
-from app.config.database import engine, Base
-from app.routes import auth, users, formations, jobs, parcours, recommend, statistics, admin_stats
+from app.config.database import (
+    engine, Base, client_key, read_replica, last_write_token,
+    LAST_WRITE_COOKIE, LAST_WRITE_HEADER, READ_STICKY_SECONDS
+)
+from app.routes import auth, users, formations, jobs, parcours, recommend, statistics, admin_stats, admin_import, admin_export
 from app.crud import category as crud_category
+from app.core.catalog import get_catalog, start_catalog_watch, stop_catalog_watch
+from app.core.scoring_executor import shutdown_scoring
+from app.core.gemini_client import start_gemini_client, close_gemini_client
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.config.database import get_db
+from app.config.database import get_db, get_read_db
 from app.core.security import get_current_user, get_current_admin
+from app.core.pagination import NEXT_CURSOR_HEADER, Page, pagination
 from app.models.user import User
 from app.models.admin import Admin
 
@@ -37,8 +46,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, LAST_WRITE_HEADER],
 )
 
+# Methods that never write; any other successful request counts as a write for read routing
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class ReadYourWritesMiddleware:
+    """
+    Stamp successful writes with a signed last-write token (LAST_WRITE_HEADER and
+    cookie), which keeps the client's next reads on the primary database.
+    Plain ASGI, so streamed response bodies pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or read_replica.engine is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_token(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                token = last_write_token(client_key(Request(scope)))
+                headers = MutableHeaders(scope=message)
+                headers.append(LAST_WRITE_HEADER, token)
+                headers.append(
+                    "set-cookie",
+                    f"{LAST_WRITE_COOKIE}={token}; Max-Age={int(READ_STICKY_SECONDS) + 1}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_token)
+
+
+app.add_middleware(ReadYourWritesMiddleware)
+
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -48,6 +95,8 @@ app.include_router(parcours.router)
 app.include_router(recommend.router)
 app.include_router(statistics.router)
 app.include_router(admin_stats.router)
+app.include_router(admin_import.router)
+app.include_router(admin_export.router)
 
 # Categories router (inline for simplicity)
 categories_router = APIRouter(prefix="/categories", tags=["categories"])
@@ -65,20 +114,23 @@ async def create_category(
 
 @categories_router.get("/", response_model=List[CategoryResponse])
 async def get_categories(
-    skip: int = 0, 
-    limit: int = 100, 
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    page: Page = Depends(pagination(*crud_category.SORT_KEYS)),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all categories (Authenticated users only)."""
-    categories = await crud_category.get_categories(db, skip=skip, limit=limit)
+    categories = await crud_category.get_categories(
+        db, skip=page.skip, limit=page.limit, sort=page.sort, after=page.after
+    )
+    page.set_next_cursor(response, categories)
     return categories
 
 
 @categories_router.get("/{category_id}", response_model=CategoryResponse)
 async def get_category(
     category_id: int, 
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a category by ID (Authenticated users only)."""
@@ -129,9 +181,27 @@ app.include_router(categories_router)
 
 @app.on_event("startup")
 async def startup():
-    """Create database tables on startup."""
+    """
+    Create database tables, check the read replica, warm the recommender catalog
+    and start watching it, open the Gemini client and start the skillpath job
+    workers on startup.
+    """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    await read_replica.check()
+    await get_catalog()
+    start_catalog_watch()
+    await start_gemini_client()
+    await recommend.skillpath_jobs.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the skillpath job workers, catalog watch and scoring workers and close the Gemini client."""
+    await recommend.skillpath_jobs.stop()
+    await stop_catalog_watch()
+    shutdown_scoring()
+    await close_gemini_client()
 
 
 @app.get("/")
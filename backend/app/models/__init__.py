@@ -4,6 +4,7 @@ from app.models.category import Category
 from app.models.formation import Formation
 from app.models.parcours import Parcours
 from app.models.job import Job
+from app.models.skillpath_job import SkillpathJob
 
-__all__ = ["User", "Admin", "Category", "Formation", "Parcours", "Job"]
+__all__ = ["User", "Admin", "Category", "Formation", "Parcours", "Job", "SkillpathJob"]
 
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, ForeignKey
+from app.config.database import Base
+
+
+class SkillpathJob(Base):
+    """AI skillpath generation queued by POST /api/recommend/jobs."""
+    __tablename__ = "skillpath_jobs"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Hash of the normalized request: identical submissions of a user share a job
+    request_key = Column(String(64), nullable=False, index=True)
+    request = Column(JSON, nullable=False)
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, done, failed
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
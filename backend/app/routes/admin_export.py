@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from app.core.security import get_current_admin
+from app.core.data_export import EXPORT_COLUMNS, EXPORT_FORMATS, export_stream
+from app.models.admin import Admin
+
+router = APIRouter(prefix="/api/admin/export", tags=["admin"])
+
+
+@router.get("/{kind}")
+async def export_table(
+    kind: str,
+    format: str = "ndjson",
+    gzip: bool = False,
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """
+    Export every formation, job, parcours or user (without passwords) as NDJSON
+    or CSV (with a header row), optionally gzipped. Rows are streamed in id
+    order as they are read. Admin only.
+    """
+    if kind not in EXPORT_COLUMNS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Export kind must be one of {', '.join(EXPORT_COLUMNS)}"
+        )
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of {', '.join(EXPORT_FORMATS)}"
+        )
+    filename = f"{kind}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export_stream(kind, format, gzip),
+        media_type="application/gzip" if gzip else EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.config.database import get_db
+from app.core.security import get_current_admin
+from app.core.catalog_import import IMPORT_FORMATS, IMPORT_SCHEMAS, import_catalog
+from app.models.admin import Admin
+from pydantic import BaseModel
+
+router = APIRouter(prefix="/api/admin/import", tags=["admin"])
+
+
+class ImportRowError(BaseModel):
+    row: int  # 1-based data row (CSV header and blank lines not counted)
+    error: str
+
+
+class ImportReportResponse(BaseModel):
+    kind: str
+    format: str
+    rows: int
+    inserted: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool  # more rows failed than are listed
+    aborted: Optional[str] = None  # why reading stopped early (invalid UTF-8, oversized line)
+
+
+@router.post("/{kind}", response_model=ImportReportResponse)
+async def import_rows(
+    kind: str,
+    request: Request,
+    format: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """
+    Bulk create formations or jobs from a streamed CSV (with a header row) or
+    NDJSON body. format defaults from the Content-Type. Valid rows are inserted,
+    invalid ones are listed in the report. Admin only.
+    """
+    if kind not in IMPORT_SCHEMAS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Import kind must be one of {', '.join(IMPORT_SCHEMAS)}"
+        )
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    if format not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of {', '.join(IMPORT_FORMATS)}"
+        )
+    return await import_catalog(db, kind, format, request.stream())
@@ -1,14 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
-from typing import Dict, List
-from app.config.database import get_db
+from typing import Dict, List, Optional
+from app.config.database import get_read_db, pool_stats
 from app.core.security import get_current_admin
 from app.models.user import User
 from app.models.formation import Formation
 from app.models.category import Category
 from app.models.parcours import Parcours
 from app.models.admin import Admin
+from app.core.catalog import get_catalog
+from app.core.prompt_cache import prompt_cache
+from app.core.gemini_client import gemini_guard
+from app.core.skillpath_providers import skillpath_router
+from app.routes.recommend import skillpath_jobs
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
@@ -26,9 +31,103 @@ class AdvancedStatisticsResponse(BaseModel):
     recent_registrations: int  # Users registered in last 30 days (placeholder)
 
 
+class CatalogStatsResponse(BaseModel):
+    version: int
+    formations: int
+    jobs: int
+    memory: Dict[str, float]
+
+
+class PromptCacheStatsResponse(BaseModel):
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    hit_rate: float
+    memory_entries: int
+    memory_bytes: int
+    disk_entries: int
+    disk_bytes: int
+
+
+class UpstreamStatsResponse(BaseModel):
+    state: str  # "closed", "open" or "half_open"
+    retry_in_seconds: float
+    times_opened: int
+    concurrency_limit: float
+    in_flight: int
+    calls: int
+    short_circuited: int
+    rejected_over_limit: int
+    throttled: int
+
+
+class ProviderStats(BaseModel):
+    name: str
+    available: bool
+    cost: float
+    chosen: int
+    calls: int  # successful calls, in the histogram
+    errors: int
+    mean_ms: float
+    p50_ms: float  # bucket upper bounds
+    p95_ms: float
+    buckets: Dict[str, int]
+
+
+class ProviderStatsResponse(BaseModel):
+    policy: str  # "priority", "latency" or "cost"
+    latency_budget_ms: float
+    providers: List[ProviderStats]
+
+
+class ReadReplicaStats(BaseModel):
+    healthy: bool
+    lag_seconds: Optional[float] = None  # None while down or when replication is stopped
+    reads: Dict[str, int]  # reads sent to the replica, and to the primary by reason (sticky, lagging, down)
+    pool: str
+    size: Optional[int] = None
+    checked_out: Optional[int] = None
+    idle: Optional[int] = None
+    overflow: Optional[int] = None
+    max_overflow: Optional[int] = None
+    checkouts: int
+    overflow_connections: int
+    timeouts: int
+    wait_ms: Dict[str, float]
+
+
+class DatabasePoolStatsResponse(BaseModel):
+    profile: str  # DB_PROFILE: "dev", "test" or "prod"
+    pool: str
+    size: Optional[int] = None  # occupancy fields are absent without pooling (test profile)
+    checked_out: Optional[int] = None
+    idle: Optional[int] = None
+    overflow: Optional[int] = None
+    max_overflow: Optional[int] = None
+    checkouts: int
+    overflow_connections: int
+    timeouts: int
+    wait_ms: Dict[str, float]  # p50, p95 and max time waiting for a connection
+    replica: Optional[ReadReplicaStats] = None  # with READ_DATABASE_URL only
+
+
+class SkillpathJobStatsResponse(BaseModel):
+    workers: int
+    queue_depth: int
+    max_depth: int
+    running: int
+    submitted: int
+    deduplicated: int
+    rejected: int
+    done: int
+    failed: int
+    wait_ms: Dict[str, float]  # p50 and p95 of the time from submission to start
+    run_ms: Dict[str, float]
+
+
 @router.get("/statistics", response_model=AdvancedStatisticsResponse)
 async def get_admin_statistics(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Get advanced platform statistics. Admin only."""
@@ -87,3 +186,59 @@ async def get_admin_statistics(
             detail=f"Error fetching admin statistics: {str(e)}"
         )
 
+
+@router.get("/catalog", response_model=CatalogStatsResponse)
+async def get_catalog_statistics(
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Get the size and memory footprint of the recommender catalog snapshot. Admin only."""
+    catalog = await get_catalog()
+    return {
+        "version": catalog.version,
+        "formations": len(catalog.formation_rows),
+        "jobs": len(catalog.job_rows),
+        "memory": catalog.memory_usage()
+    }
+
+
+@router.get("/ai-cache", response_model=PromptCacheStatsResponse)
+async def get_ai_cache_statistics(
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Get Gemini prompt cache hit rate and size (hits are counted per worker). Admin only."""
+    return await prompt_cache.stats()
+
+
+@router.get("/ai-upstream", response_model=UpstreamStatsResponse)
+async def get_ai_upstream_statistics(
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Get the Gemini circuit breaker state and adaptive concurrency limit (per worker). Admin only."""
+    return gemini_guard.stats()
+
+
+@router.get("/ai-providers", response_model=ProviderStatsResponse)
+async def get_ai_provider_statistics(
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Get the skillpath routing policy and per-provider latency histograms (per worker). Admin only."""
+    return skillpath_router.stats()
+
+
+@router.get("/ai-jobs", response_model=SkillpathJobStatsResponse)
+async def get_ai_job_statistics(
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Get the skillpath job queue depth, outcomes and wait/run times (per worker). Admin only."""
+    return skillpath_jobs.stats()
+
+
+@router.get("/db-pool", response_model=DatabasePoolStatsResponse)
+async def get_database_pool_statistics(
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """
+    Get the database engine profile, pool occupancy and checkout waits, and the
+    read replica's health and routing (per worker). Admin only.
+    """
+    return pool_stats()
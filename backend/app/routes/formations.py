@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.config.database import get_db
+from app.config.database import get_db, get_read_db
 from app.core.security import get_current_admin
+from app.core.pagination import Page, pagination
 from app.models.admin import Admin
 from app.crud import formation as crud_formation
 from app.crud import category as crud_category
@@ -30,19 +31,22 @@ async def create_formation(
 
 @router.get("/", response_model=List[FormationResponse])
 async def get_formations(
-    skip: int = 0, 
-    limit: int = 100, 
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    page: Page = Depends(pagination(*crud_formation.SORT_KEYS)),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all formations (Public - no authentication required)."""
-    formations = await crud_formation.get_formations(db, skip=skip, limit=limit)
+    formations = await crud_formation.get_formations(
+        db, skip=page.skip, limit=page.limit, sort=page.sort, after=page.after
+    )
+    page.set_next_cursor(response, formations)
     return formations
 
 
 @router.get("/{formation_id}", response_model=FormationResponse)
 async def get_formation(
     formation_id: int, 
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a formation by ID (Public - no authentication required)."""
     formation = await crud_formation.get_formation(db, formation_id)
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.config.database import get_db
+from app.config.database import get_db, get_read_db
 from app.core.security import get_current_admin
+from app.core.pagination import Page, pagination
 from app.models.admin import Admin
 from app.crud import job as crud_job
 from app.schemas.job import JobCreate, JobUpdate, JobResponse
@@ -22,19 +23,22 @@ async def create_job(
 
 @router.get("/", response_model=List[JobResponse])
 async def get_jobs(
-    skip: int = 0, 
-    limit: int = 100, 
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    page: Page = Depends(pagination(*crud_job.SORT_KEYS)),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all jobs (Public - no authentication required)."""
-    jobs = await crud_job.get_jobs(db, skip=skip, limit=limit)
+    jobs = await crud_job.get_jobs(
+        db, skip=page.skip, limit=page.limit, sort=page.sort, after=page.after
+    )
+    page.set_next_cursor(response, jobs)
     return jobs
 
 
 @router.get("/{job_id}", response_model=JobResponse)
 async def get_job(
     job_id: int, 
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a job by ID (Public - no authentication required)."""
     job = await crud_job.get_job(db, job_id)
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.config.database import get_db
+from app.config.database import get_db, get_read_db
 from app.core.security import get_current_user, get_current_admin, get_current_content_creator
+from app.core.pagination import Page, pagination
 from app.models.user import User
 from app.models.admin import Admin
 from app.crud import parcours as crud_parcours
@@ -23,20 +24,23 @@ async def create_parcours(
 
 @router.get("/", response_model=List[ParcoursResponse])
 async def get_parcours_list(
-    skip: int = 0, 
-    limit: int = 100, 
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    page: Page = Depends(pagination(*crud_parcours.SORT_KEYS)),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all parcours (Authenticated users only)."""
-    parcours_list = await crud_parcours.get_parcours_list(db, skip=skip, limit=limit)
+    parcours_list = await crud_parcours.get_parcours_list(
+        db, skip=page.skip, limit=page.limit, sort=page.sort, after=page.after
+    )
+    page.set_next_cursor(response, parcours_list)
     return parcours_list
 
 
 @router.get("/{parcours_id}", response_model=ParcoursResponse)
 async def get_parcours(
     parcours_id: int, 
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a parcours by ID (Authenticated users only)."""
@@ -1,14 +1,33 @@
+import asyncio
+import json
+import logging
+import os
+import time
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 from pydantic import BaseModel
-from app.config.database import get_db
-from app.core.security import get_current_user
+from app.config.database import AsyncSessionLocal, get_db
+from app.core.security import get_current_user, get_stream_admin, get_stream_user
 from app.models.user import User
+from app.models.admin import Admin
 from app.crud import formation as crud_formation
 from app.crud import job as crud_job
-from app.core.recommender import recommend_keyword
-from app.core.gemini_client import build_gemini_prompt, send_skillpath_request
+from app.core.recommender import (
+    build_skillpath, rank_catalog_batch, recommend_keyword, recommend_streaming
+)
+from app.core.catalog import CatalogSnapshot, get_catalog
+from app.core.scoring_executor import run_scoring, work_size
+from app.core.result_cache import ResultCache, normalize_keywords
+from app.core.skillpath_providers import skillpath_router
+from app.core.json_stream import JsonObjectStream
+from app.core.job_queue import FINISHED_STATUSES, SkillpathJobQueue
+from app.crud import skillpath_job as crud_skillpath_job
+from app.models.skillpath_job import SkillpathJob
+from app.schemas.skillpath import recommended_item_adapter, step_adapter
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/recommend", tags=["recommendations"])
 
@@ -17,10 +36,59 @@ class RecommendSubmitRequest(BaseModel):
     goal: str
     competences: List[str] = []
     interests: List[str] = []
-    mode: str = "keyword"  # "keyword" or "ai"
+    mode: str = "keyword"  # "keyword", "ai", "hedged" or "streaming"
+    top_n: Optional[int] = 5
+
+
+class RecommendJobRequest(BaseModel):
+    goal: str
+    competences: List[str] = []
+    interests: List[str] = []
+    top_n: Optional[int] = 5
+
+
+class RecommendBatchProfile(BaseModel):
+    goal: str = ""
+    competences: List[str] = []
+    interests: List[str] = []
     top_n: Optional[int] = 5
 
 
+class RecommendBatchRequest(BaseModel):
+    profiles: List[RecommendBatchProfile]
+
+
+# Rows per database round trip in streaming mode
+STREAM_BATCH_SIZE = 1000
+
+# Results of /submit, keyed by normalized profile, mode, top_n and catalog version
+RECOMMEND_CACHE_MAX_BYTES = int(os.getenv("RECOMMEND_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+RECOMMEND_CACHE_TTL = float(os.getenv("RECOMMEND_CACHE_TTL", "300"))
+recommend_cache = ResultCache(RECOMMEND_CACHE_MAX_BYTES, RECOMMEND_CACHE_TTL)
+
+# Hedged mode: how long to wait for the AI before answering with the keyword result
+HEDGE_BUDGET_MS = float(os.getenv("HEDGE_BUDGET_MS", "2000"))
+# AI calls of hedged requests, kept until they finish
+_background_tasks: Set[asyncio.Task] = set()
+
+# Job events: how often a listener re-reads the job, in case another worker process runs it
+JOB_EVENTS_POLL_SECONDS = float(os.getenv("JOB_EVENTS_POLL_SECONDS", "2"))
+
+# Batch endpoint: profiles per request, and profiles scored per matrix product
+BATCH_MAX_PROFILES = 1000
+BATCH_CHUNK_SIZE = 100
+
+
+def _valid_resources(resources: List[Dict], catalog: CatalogSnapshot) -> List[Dict]:
+    """Keep external resources and formations/jobs that exist in the catalog."""
+    # The snapshot's id -> row maps double as the catalog's ID sets
+    known_ids = {"formation": catalog.formation_rows, "job": catalog.job_rows}
+    return [
+        resource for resource in resources
+        if resource["type"] == "external" or resource["id"] in known_ids[resource["type"]]
+    ]
+
+
 @router.post("/submit")
 async def recommend_submit(
     request: RecommendSubmitRequest,
@@ -30,103 +98,93 @@ async def recommend_submit(
     """
     Submit a recommendation request with user-provided form data.
     Returns a skillpath structure with steps, recommended jobs, and formations.
+    Identical profiles (after normalization) are served from a cache until the catalog changes.
     Requires authentication (non-guest).
     """
     # Validate inputs
-    if request.mode == "ai" and not request.goal:
+    if request.mode in ("ai", "hedged") and not request.goal:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Goal is required for AI mode"
         )
+    top_n = request.top_n if request.top_n is not None else 5
+    # Near-identical profiles share one result, so recommend from the normalized profile
+    competences = normalize_keywords(request.competences)
+    interests = normalize_keywords(request.interests)
     
-    # Get all formations and jobs from database
-    all_formations = await crud_formation.get_formations(db, skip=0, limit=1000)
-    all_jobs = await crud_job.get_jobs(db, skip=0, limit=1000)
+    # In-memory catalog snapshot scored by the keyword and AI modes; its version
+    # is part of the cache key, so any catalog write invalidates cached results
+    catalog = await get_catalog()
+    response, cached = await _recommend_cached(
+        request.mode, request.goal, competences, interests, top_n, catalog, db
+    )
     
-    if request.mode == "ai":
+    return {**response, "cached": cached, "cache": recommend_cache.stats()}
+
+
+async def _recommend_cached(
+    mode: str,
+    goal: str,
+    competences: List[str],
+    interests: List[str],
+    top_n: int,
+    catalog: CatalogSnapshot,
+    db: Optional[AsyncSession]
+) -> Tuple[Dict, bool]:
+    """_recommend through the result cache. Returns (response, served from cache)."""
+    key = (mode, goal, tuple(competences), tuple(interests), top_n, catalog.version)
+    response = recommend_cache.get(key)
+    if response is not None:
+        return response, True
+    response = await _recommend(mode, goal, competences, interests, top_n, catalog, db)
+    # Keyword fallbacks after an AI error are not cached: the next call retries the AI.
+    # Hedge timings describe this request only, so hits are returned without them.
+    if "fallback_reason" not in response:
+        recommend_cache.set(key, {k: v for k, v in response.items() if k != "hedge"})
+    return response, False
+
+
+async def _recommend(
+    mode: str,
+    goal: str,
+    competences: List[str],
+    interests: List[str],
+    top_n: int,
+    catalog: CatalogSnapshot,
+    db: AsyncSession
+) -> Dict:
+    """Compute a /submit response (source, skillpath and optional fallback_reason)."""
+    if mode == "streaming":
+        # Score every row straight from the database, batch by batch
+        skillpath = await recommend_streaming(
+            formation_batches=crud_formation.iter_formation_batches(db, STREAM_BATCH_SIZE),
+            job_batches=crud_job.iter_job_batches(db, STREAM_BATCH_SIZE),
+            competences=competences,
+            interests=interests,
+            goal=goal,
+            top_n=top_n
+        )
+        
+        return {
+            "source": "streaming",
+            "skillpath": skillpath
+        }
+    
+    if mode == "hedged":
+        return await _recommend_hedged(goal, competences, interests, top_n, catalog)
+    
+    if mode == "ai":
         try:
-            # Prepare candidates for Gemini
-            candidates = []
-            for formation in all_formations[:30]:
-                candidates.append({
-                    "id": formation.id,
-                    "type": "formation",
-                    "title": formation.titre,
-                    "titre": formation.titre,
-                    "description": formation.description or "",
-                    "skills": []  # Formations don't have skills in current schema
-                })
-            
-            for job in all_jobs[:30]:
-                candidates.append({
-                    "id": job.id,
-                    "type": "job",
-                    "title": job.titre,
-                    "titre": job.titre,
-                    "description": job.description or "",
-                    "requirements": job.requirements or [],
-                    "skills": job.requirements or []
-                })
-            
-            # Build prompt
-            prompt = build_gemini_prompt(
-                goal=request.goal,
-                competences=request.competences,
-                interests=request.interests,
-                candidates=candidates
-            )
-            
-            # Call Gemini
-            skillpath = await send_skillpath_request(prompt)
-            
-            # Validate and ensure IDs exist
-            # Verify formation IDs
-            valid_formation_ids = {f.id for f in all_formations}
-            valid_job_ids = {j.id for j in all_jobs}
-            
-            # Clean up steps resources
-            if "steps" in skillpath:
-                for step in skillpath["steps"]:
-                    if "resources" in step:
-                        valid_resources = []
-                        for resource in step["resources"]:
-                            if resource.get("type") == "formation" and resource.get("id"):
-                                if resource["id"] in valid_formation_ids:
-                                    valid_resources.append(resource)
-                            elif resource.get("type") == "job" and resource.get("id"):
-                                if resource["id"] in valid_job_ids:
-                                    valid_resources.append(resource)
-                            elif resource.get("type") == "external":
-                                valid_resources.append(resource)
-                        step["resources"] = valid_resources
-            
-            # Clean up recommended lists
-            if "recommended_formations" in skillpath:
-                skillpath["recommended_formations"] = [
-                    f for f in skillpath["recommended_formations"]
-                    if f.get("id") in valid_formation_ids
-                ]
-            
-            if "recommended_jobs" in skillpath:
-                skillpath["recommended_jobs"] = [
-                    j for j in skillpath["recommended_jobs"]
-                    if j.get("id") in valid_job_ids
-                ]
-            
-            return {
-                "source": "ai",
-                "skillpath": skillpath
-            }
+            return await _recommend_ai(goal, competences, interests, catalog)
         
         except Exception as e:
             # Fallback to keyword recommender
             skillpath = await recommend_keyword(
-                formations=all_formations,
-                jobs=all_jobs,
-                competences=request.competences,
-                interests=request.interests,
-                goal=request.goal,
-                top_n=request.top_n
+                catalog=catalog,
+                competences=competences,
+                interests=interests,
+                goal=goal,
+                top_n=top_n
             )
             
             return {
@@ -137,15 +195,382 @@ async def recommend_submit(
     
     else:  # keyword mode
         skillpath = await recommend_keyword(
-            formations=all_formations,
-            jobs=all_jobs,
-            competences=request.competences,
-            interests=request.interests,
-            goal=request.goal,
-            top_n=request.top_n
+            catalog=catalog,
+            competences=competences,
+            interests=interests,
+            goal=goal,
+            top_n=top_n
         )
         
         return {
             "source": "keyword",
             "skillpath": skillpath
         }
+
+
+async def _recommend_ai(
+    goal: str,
+    competences: List[str],
+    interests: List[str],
+    catalog: CatalogSnapshot
+) -> Dict:
+    """
+    AI-mode response: a skillpath from the provider picked by the router (source
+    "ai", provider name), with resources that are not in the catalog dropped.
+    """
+    provider, skillpath = await skillpath_router.generate(goal, competences, interests, catalog)
+    
+    # Ensure IDs exist
+    for step in skillpath["steps"]:
+        step["resources"] = _valid_resources(step["resources"], catalog)
+    skillpath["recommended_formations"] = [
+        f for f in skillpath["recommended_formations"] if f["id"] in catalog.formation_rows
+    ]
+    skillpath["recommended_jobs"] = [
+        j for j in skillpath["recommended_jobs"] if j["id"] in catalog.job_rows
+    ]
+    
+    return {
+        "source": "ai",
+        "provider": provider,
+        "skillpath": skillpath
+    }
+
+
+async def _recommend_hedged(
+    goal: str,
+    competences: List[str],
+    interests: List[str],
+    top_n: int,
+    catalog: CatalogSnapshot
+) -> Dict:
+    """
+    Run the AI and keyword recommenders side by side within HEDGE_BUDGET_MS.
+    The AI result wins if it arrives within the budget; otherwise the keyword
+    result is returned and the AI call finishes in the background, warming the
+    prompt cache for the next identical request.
+    """
+    start = time.perf_counter()
+    ai_task = asyncio.create_task(_recommend_ai(goal, competences, interests, catalog))
+    # Keep a reference so the AI call survives this request (timeout or client gone)
+    _background_tasks.add(ai_task)
+    ai_task.add_done_callback(_background_done)
+    
+    skillpath = await recommend_keyword(
+        catalog=catalog,
+        competences=competences,
+        interests=interests,
+        goal=goal,
+        top_n=top_n
+    )
+    keyword_ms = (time.perf_counter() - start) * 1000
+    
+    remaining = max(HEDGE_BUDGET_MS / 1000 - (time.perf_counter() - start), 0)
+    await asyncio.wait({ai_task}, timeout=remaining)
+    ai_ms = (time.perf_counter() - start) * 1000 if ai_task.done() else None
+    hedge = {
+        "winner": "keyword",
+        "budget_ms": HEDGE_BUDGET_MS,
+        "ai_ms": round(ai_ms, 1) if ai_ms is not None else None,
+        "keyword_ms": round(keyword_ms, 1)
+    }
+    
+    if not ai_task.done():
+        fallback_reason = f"AI exceeded the {HEDGE_BUDGET_MS:g} ms latency budget"
+    elif ai_task.exception() is not None:
+        fallback_reason = f"AI service error: {str(ai_task.exception())}"
+    else:
+        hedge["winner"] = "ai"
+        return {**ai_task.result(), "hedge": hedge}
+    
+    return {
+        "source": "keyword",
+        "fallback_reason": fallback_reason,
+        "hedge": hedge,
+        "skillpath": skillpath
+    }
+
+
+def _background_done(task: asyncio.Task) -> None:
+    """Forget a finished hedged AI call; its result is already in the prompt cache."""
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Background AI recommendation failed: %s", task.exception())
+
+
+@router.post("/batch")
+async def recommend_batch(
+    request: RecommendBatchRequest,
+    current_admin: Admin = Depends(get_stream_admin)
+):
+    """
+    Keyword recommendations for many profiles at once (Admin only).
+    Profiles are scored together against one catalog snapshot, and results
+    stream back as NDJSON: one {"index", "source", "skillpath"} line per profile,
+    in request order.
+    """
+    if len(request.profiles) > BATCH_MAX_PROFILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {BATCH_MAX_PROFILES} profiles per batch"
+        )
+    
+    # Every profile is ranked against the same snapshot, even if the catalog changes meanwhile
+    catalog = await get_catalog()
+    # Normalized like /submit, so a profile ranks the same through both endpoints
+    profiles = [
+        (normalize_keywords(p.competences), normalize_keywords(p.interests),
+         p.top_n if p.top_n is not None else 5, p.goal)
+        for p in request.profiles
+    ]
+    
+    async def lines():
+        for start in range(0, len(profiles), BATCH_CHUNK_SIZE):
+            chunk = profiles[start:start + BATCH_CHUNK_SIZE]
+            ranked = await run_scoring(
+                rank_catalog_batch,
+                catalog,
+                [(competences, interests, top_n) for competences, interests, top_n, _ in chunk],
+                size=work_size(catalog, len(chunk))
+            )
+            for offset, (profile, (top_formations, top_jobs)) in enumerate(zip(chunk, ranked)):
+                competences, interests, _, goal = profile
+                skillpath = build_skillpath(top_formations, top_jobs, competences, interests, goal)
+                yield json.dumps({
+                    "index": start + offset,
+                    "source": "keyword",
+                    "skillpath": skillpath
+                }) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _sse(event: str, data: Dict) -> str:
+    """Format a Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# Compiled validators for the streamed skillpath lists
+_STREAM_ITEM_ADAPTERS = {
+    "steps": step_adapter,
+    "recommended_formations": recommended_item_adapter,
+    "recommended_jobs": recommended_item_adapter,
+}
+
+
+def _stream_event(kind: str, key: str, value, catalog: CatalogSnapshot) -> Optional[Tuple[str, Dict]]:
+    """SSE event (name, data) for a parsed part of the skillpath, or None to skip it."""
+    if kind == "field" and key in ("title", "summary"):
+        return "meta", {key: value}
+    if kind != "item" or key not in _STREAM_ITEM_ADAPTERS:
+        return None
+    # Parts are validated one at a time, as they arrive
+    try:
+        item = _STREAM_ITEM_ADAPTERS[key].validate_python(value)
+    except ValueError:
+        return None
+    if key == "steps":
+        step = item.model_dump()
+        step["resources"] = _valid_resources(step["resources"], catalog)
+        return "step", {"step": step}
+    if key == "recommended_formations" and item.id in catalog.formation_rows:
+        return "formation", {"formation": item.model_dump()}
+    if key == "recommended_jobs" and item.id in catalog.job_rows:
+        return "job", {"job": item.model_dump()}
+    return None
+
+
+@router.post("/stream")
+async def recommend_stream(
+    request: RecommendSubmitRequest,
+    current_user: User = Depends(get_stream_user)
+):
+    """
+    AI skillpath generation streamed as Server-Sent Events.
+    Each part is sent as soon as the AI provider has generated it and its IDs are
+    validated: "meta" (title, summary), "step", "formation" and "job" events, then
+    "done" with the provider and the time to first step. If the provider fails, an
+    "error" event is followed by a "fallback" event carrying the keyword skillpath.
+    Requires authentication (non-guest).
+    """
+    if not request.goal:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Goal is required for AI mode"
+        )
+    top_n = request.top_n if request.top_n is not None else 5
+    competences = normalize_keywords(request.competences)
+    interests = normalize_keywords(request.interests)
+    
+    catalog = await get_catalog()
+    
+    async def events():
+        start = time.perf_counter()
+        first_step_ms = None
+        counts = {"step": 0, "formation": 0, "job": 0}
+        provider = None
+        try:
+            provider = skillpath_router.stream_provider()
+            parser = JsonObjectStream()
+            async for chunk in provider.stream(request.goal, competences, interests, catalog):
+                for kind, key, value in parser.feed(chunk):
+                    event = _stream_event(kind, key, value, catalog)
+                    if event is None:
+                        continue
+                    name, data = event
+                    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+                    if name in counts:
+                        counts[name] += 1
+                    if name == "step" and first_step_ms is None:
+                        first_step_ms = elapsed_ms
+                    yield _sse(name, {**data, "elapsed_ms": elapsed_ms})
+            if not parser.done:
+                raise ValueError(f"Incomplete JSON in {provider.name} response")
+            skillpath_router.record(provider.name, (time.perf_counter() - start) * 1000)
+        except Exception as e:
+            if provider is not None:
+                skillpath_router.record(provider.name, None)
+            yield _sse("error", {"detail": f"AI service error: {str(e)}"})
+            skillpath = await recommend_keyword(
+                catalog=catalog,
+                competences=competences,
+                interests=interests,
+                goal=request.goal,
+                top_n=top_n
+            )
+            yield _sse("fallback", {"source": "keyword", "skillpath": skillpath})
+        
+        yield _sse("done", {
+            "provider": provider.name if provider is not None else None,
+            "time_to_first_step_ms": first_step_ms,
+            "total_ms": round((time.perf_counter() - start) * 1000, 1),
+            "steps": counts["step"],
+            "formations": counts["formation"],
+            "jobs": counts["job"]
+        })
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _run_skillpath_job(request: Dict) -> Dict:
+    """Run a queued job: the /submit AI-mode response, through the result cache."""
+    catalog = await get_catalog()
+    response, _ = await _recommend_cached(
+        "ai", request["goal"], request["competences"], request["interests"], request["top_n"], catalog, None
+    )
+    return response
+
+
+# AI skillpath jobs, started and stopped with the app
+skillpath_jobs = SkillpathJobQueue(_run_skillpath_job)
+
+
+def _job_payload(job: SkillpathJob) -> Dict:
+    """Job as returned by the jobs endpoints; the response is included once done."""
+    payload = {
+        "job_id": job.id,
+        "status": job.status,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.status == "done":
+        payload["response"] = job.result
+    elif job.status == "failed":
+        payload["error"] = job.error
+    return payload
+
+
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def recommend_job_submit(
+    request: RecommendJobRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Queue an AI skillpath generation and return its job ID at once.
+    Poll GET /jobs/{job_id} or listen to GET /jobs/{job_id}/events for the result.
+    Submitting the same request again while it is queued or running returns the
+    same job ("deduplicated": true). 503 when the queue is full.
+    Requires authentication (non-guest).
+    """
+    if not request.goal:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Goal is required for AI mode"
+        )
+    job_request = {
+        "goal": request.goal,
+        "competences": normalize_keywords(request.competences),
+        "interests": normalize_keywords(request.interests),
+        "top_n": request.top_n if request.top_n is not None else 5,
+    }
+    job, deduplicated = await skillpath_jobs.submit(current_user.id, job_request)
+    return {**_job_payload(job), "deduplicated": deduplicated}
+
+
+async def _get_user_job(db: AsyncSession, job_id: str, user: User) -> SkillpathJob:
+    job = await crud_skillpath_job.get_skillpath_job(db, job_id)
+    if job is None or job.user_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+
+@router.get("/jobs/{job_id}")
+async def recommend_job_status(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the status of a skillpath job: queued, running, done (with the /submit
+    response) or failed (with the error). Only the job's owner can read it.
+    """
+    return _job_payload(await _get_user_job(db, job_id, current_user))
+
+
+@router.get("/jobs/{job_id}/events")
+async def recommend_job_events(
+    job_id: str,
+    current_user: User = Depends(get_stream_user)
+):
+    """
+    Skillpath job status as Server-Sent Events: one event named after each new
+    status (queued, running, done or failed) carrying the job, until it finishes.
+    Sessions are only open while the job is read, not for the whole stream.
+    """
+    async with AsyncSessionLocal() as db:
+        await _get_user_job(db, job_id, current_user)
+    
+    async def events():
+        updates = skillpath_jobs.subscribe(job_id)
+        try:
+            sent = None
+            while True:
+                # The table is the source of truth; updates only say when to look again
+                job = await skillpath_jobs.get(job_id)
+                if job is None:
+                    return
+                if job.status != sent:
+                    sent = job.status
+                    yield _sse(job.status, _job_payload(job))
+                if job.status in FINISHED_STATUSES:
+                    return
+                try:
+                    await asyncio.wait_for(updates.get(), JOB_EVENTS_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            skillpath_jobs.unsubscribe(job_id, updates)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
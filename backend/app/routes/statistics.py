@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from typing import Dict
-from app.config.database import get_db
+from app.config.database import get_read_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.formation import Formation
@@ -23,7 +23,7 @@ class StatisticsResponse(BaseModel):
 
 @router.get("/", response_model=StatisticsResponse)
 async def get_statistics(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get platform statistics. Available to all authenticated users."""
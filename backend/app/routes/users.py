@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.config.database import get_db
+from app.config.database import get_db, get_read_db
 from app.core.security import get_current_user, get_current_admin
+from app.core.pagination import Page, pagination
 from app.models.user import User
 from app.models.admin import Admin
 from app.crud import user as crud_user
@@ -30,13 +31,16 @@ async def create_user(
 
 @router.get("/", response_model=List[UserResponse])
 async def get_users(
-    skip: int = 0, 
-    limit: int = 100, 
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    page: Page = Depends(pagination(*crud_user.SORT_KEYS)),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all users (Authenticated users only)."""
-    users = await crud_user.get_users(db, skip=skip, limit=limit)
+    users = await crud_user.get_users(
+        db, skip=page.skip, limit=page.limit, sort=page.sort, after=page.after
+    )
+    page.set_next_cursor(response, users)
     return users
 
 
@@ -51,7 +55,7 @@ async def get_current_user_info(
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int, 
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a user by ID (Authenticated users only)."""
@@ -0,0 +1,99 @@
+from pydantic import BaseModel, TypeAdapter
+from typing import Optional, List, Literal
+
+# Bump when the models below change, so cached skillpaths of the old shape are not reused
+SKILLPATH_SCHEMA_VERSION = 1
+
+
+class SkillpathResource(BaseModel):
+    type: Literal["formation", "job", "external"]
+    id: Optional[int] = None
+    titre: Optional[str] = None
+    url: Optional[str] = None
+    score: float = 0.0
+
+
+class SkillpathStep(BaseModel):
+    id: str = ""
+    title: str = ""
+    duration_weeks: int = 1
+    progress_estimate: str = ""
+    resources: List[SkillpathResource] = []
+    explanation: str = ""
+
+
+class RecommendedItem(BaseModel):
+    id: int
+    titre: str = ""
+    score: float = 0.0
+    match_reason: str = ""
+
+
+class Skillpath(BaseModel):
+    title: str = ""
+    summary: str = ""
+    steps: List[SkillpathStep] = []
+    recommended_jobs: List[RecommendedItem] = []
+    recommended_formations: List[RecommendedItem] = []
+
+
+# Validators compiled once, reused for every Gemini response
+skillpath_adapter = TypeAdapter(Skillpath)
+step_adapter = TypeAdapter(SkillpathStep)
+recommended_item_adapter = TypeAdapter(RecommendedItem)
+
+
+_RESOURCE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "type": {"type": "STRING", "enum": ["formation", "job", "external"]},
+        "id": {"type": "INTEGER", "nullable": True},
+        "titre": {"type": "STRING", "nullable": True},
+        "url": {"type": "STRING", "nullable": True},
+        "score": {"type": "NUMBER"},
+    },
+    "required": ["type", "id", "titre", "url", "score"],
+    "propertyOrdering": ["type", "id", "titre", "url", "score"],
+}
+
+_RECOMMENDED_ITEM_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "id": {"type": "INTEGER"},
+        "titre": {"type": "STRING"},
+        "score": {"type": "NUMBER"},
+        "match_reason": {"type": "STRING"},
+    },
+    "required": ["id", "titre", "score", "match_reason"],
+    "propertyOrdering": ["id", "titre", "score", "match_reason"],
+}
+
+# Gemini responseSchema (OpenAPI subset) matching Skillpath. The property
+# order puts title and steps first, so streamed responses show steps early.
+SKILLPATH_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "title": {"type": "STRING"},
+        "summary": {"type": "STRING"},
+        "steps": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "id": {"type": "STRING"},
+                    "title": {"type": "STRING"},
+                    "duration_weeks": {"type": "INTEGER"},
+                    "progress_estimate": {"type": "STRING"},
+                    "resources": {"type": "ARRAY", "items": _RESOURCE_SCHEMA},
+                    "explanation": {"type": "STRING"},
+                },
+                "required": ["id", "title", "duration_weeks", "progress_estimate", "resources", "explanation"],
+                "propertyOrdering": ["id", "title", "duration_weeks", "progress_estimate", "resources", "explanation"],
+            },
+        },
+        "recommended_jobs": {"type": "ARRAY", "items": _RECOMMENDED_ITEM_SCHEMA},
+        "recommended_formations": {"type": "ARRAY", "items": _RECOMMENDED_ITEM_SCHEMA},
+    },
+    "required": ["title", "summary", "steps", "recommended_jobs", "recommended_formations"],
+    "propertyOrdering": ["title", "summary", "steps", "recommended_jobs", "recommended_formations"],
+}
@@ -0,0 +1,87 @@
+"""
+Benchmark AI-mode Gemini call latency against a local stand-in Gemini server.
+Compares a fresh HTTP client per call (the previous behaviour) with the shared
+keep-alive client used by send_skillpath_request, then the time to the first
+parsed step of a streamed skillpath with the time to the full response.
+When streaming, the stand-in (gemini_standin.py) sends the first chunk after a
+quarter of latency_ms and spreads the rest over the remaining chunks.
+Run: python bench_gemini_client.py [requests] [latency_ms]   (default: 200 0)
+"""
+import asyncio
+import os
+import socket
+import sys
+import time
+from statistics import median, quantiles
+
+from gemini_standin import StandInSettings, start_in_thread
+
+HOST = "127.0.0.1"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+async def time_calls(call, requests: int) -> list:
+    timings = []
+    for i in range(requests):
+        start = time.perf_counter()
+        await call(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: list) -> None:
+    p95 = quantiles(timings, n=20)[-1]
+    print(f"{name:>16} | p50 {median(timings):7.2f} ms | p95 {p95:7.2f} ms")
+
+
+async def bench(requests: int) -> None:
+    from app.core import gemini_client
+    from app.core.json_stream import JsonObjectStream
+
+    async def fresh_client_call(i: int):
+        # One client per call: new connection (and TLS handshake on a real endpoint) every time
+        gemini_client._client = gemini_client.create_gemini_client()
+        try:
+            await gemini_client.send_skillpath_request(f"fresh {i}")
+        finally:
+            await gemini_client.close_gemini_client()
+
+    async def shared_client_call(i: int):
+        await gemini_client.send_skillpath_request(f"shared {i}")
+
+    await gemini_client.start_gemini_client()
+    await shared_client_call(-1)  # warm up the pool
+    for name, call in (("per-call client", fresh_client_call), ("shared client", shared_client_call)):
+        report(name, await time_calls(call, requests))
+
+    first_step, complete = [], []
+    for i in range(requests):
+        start = time.perf_counter()
+        parser = JsonObjectStream()
+        async for chunk in gemini_client.stream_skillpath_request(f"stream {i}"):
+            for kind, key, _ in parser.feed(chunk):
+                if key == "steps" and len(first_step) == i:
+                    first_step.append((time.perf_counter() - start) * 1000)
+        complete.append((time.perf_counter() - start) * 1000)
+    report("stream 1st step", first_step)
+    report("stream complete", complete)
+    await gemini_client.close_gemini_client()
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    port = free_port()
+    # Point the client at the stand-in before app.core.gemini_client reads its settings
+    os.environ["GEMINI_API_URL"] = f"http://{HOST}:{port}/v1beta/models/bench:generateContent"
+    os.environ["GEMINI_API_KEY"] = "bench"
+    # Distinct prompts and no disk tier: every call goes upstream
+    os.environ["PROMPT_CACHE_PATH"] = ""
+    server = start_in_thread(StandInSettings(host=HOST, port=port, latency_ms=latency_ms))
+    asyncio.run(bench(requests))
+    server.should_exit = True
@@ -0,0 +1,77 @@
+"""
+Benchmark list pagination at increasing page depth.
+Compares OFFSET pages (skip) with keyset pages (cursor) of get_formations on a
+synthetic formations table. Uses BENCH_DATABASE_URL when set (e.g. a scratch
+MySQL database, whose formations table is emptied and refilled), otherwise a
+temporary SQLite file.
+Run: python bench_pagination.py [rows]   (default: 200000)
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from statistics import median
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.config.database import Base
+from app.crud.formation import get_formations
+from app.models.category import Category
+from app.models.formation import Formation
+
+PAGE_SIZE = 100
+REPEAT = 20
+INSERT_BATCH = 10_000
+
+
+async def fill(session: AsyncSession, rows: int) -> None:
+    await session.execute(delete(Formation))
+    await session.execute(delete(Category))
+    await session.execute(insert(Category).values(id=1, nom="Bench"))
+    for start in range(0, rows, INSERT_BATCH):
+        await session.execute(insert(Formation), [
+            {"id": i + 1, "titre": f"Formation {i}", "description": "x" * 200, "category_id": 1}
+            for i in range(start, min(start + INSERT_BATCH, rows))
+        ])
+    await session.commit()
+
+
+async def time_page(session: AsyncSession, **page) -> float:
+    """Median time of one page in milliseconds."""
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        formations = await get_formations(session, limit=PAGE_SIZE, **page)
+        timings.append((time.perf_counter() - start) * 1000)
+        session.expunge_all()
+    assert len(formations) == PAGE_SIZE
+    return median(timings)
+
+
+async def bench(url: str, rows: int) -> None:
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with sessions() as session:
+        start = time.perf_counter()
+        await fill(session, rows)
+        print(f"{rows} formations inserted in {time.perf_counter() - start:.1f} s, "
+              f"pages of {PAGE_SIZE}, median of {REPEAT} runs")
+        for fraction in (0, 0.1, 0.5, 0.9, 1):
+            depth = min(int(rows * fraction), rows - PAGE_SIZE)
+            offset = await time_page(session, skip=depth)
+            # ids are 1..rows, so the cursor after row `depth` is (depth, depth)
+            cursor = await time_page(session, after=(depth, depth))
+            print(f"depth {depth:>9} | offset {offset:8.2f} ms | cursor {cursor:6.2f} ms")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    url = os.getenv("BENCH_DATABASE_URL")
+    if url:
+        asyncio.run(bench(url, rows))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            asyncio.run(bench(f"sqlite+aiosqlite:///{tmp}/bench.db", rows))
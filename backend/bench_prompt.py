@@ -0,0 +1,83 @@
+"""
+Benchmark AI prompt candidates on a synthetic catalog.
+Compares the previous selection (first 30 formations and 30 jobs by id, cut to
+30 and pretty-printed) with the BM25 prefilter packed into the token budget:
+estimated prompt tokens, candidates sharing a keyword with the profile, and
+preselection time.
+Run: python bench_prompt.py [rows]   (default: 100000)
+"""
+import json
+import sys
+import time
+from statistics import median
+from bench_recommender import PROFILES, make_catalog_rows
+from app.core.catalog import CatalogSnapshot
+from app.core.gemini_client import build_gemini_prompt
+from app.core.prompt_budget import estimate_tokens
+from app.core.recommender import ProfileMatcher, select_candidates
+
+GOAL = "Become a backend developer"
+
+
+def legacy_candidates_json(catalog: CatalogSnapshot) -> tuple:
+    """Candidates and JSON block of the previous prompt."""
+    formations = [f for f, _ in zip(catalog.iter_formations(), range(30))]
+    jobs = [j for j, _ in zip(catalog.iter_jobs(), range(30))]
+    records = [("formation", f) for f in formations] + [("job", j) for j in jobs]
+    records = records[:30]
+    candidates = [
+        {
+            "id": record.id,
+            "type": kind,
+            "title": record.titre,
+            "description": (record.description or "")[:200],
+            "skills": list(getattr(record, "requirements", ())),
+        }
+        for kind, record in records
+    ]
+    return records, json.dumps(candidates, indent=2)
+
+
+def relevant(records, competences, interests) -> int:
+    """Candidates whose text or requirements contain a profile keyword."""
+    matcher = ProfileMatcher(competences, interests)
+    keywords = {k.lower() for k in competences + interests}
+    count = 0
+    for _, record in records:
+        requirements = {r.lower() for r in getattr(record, "requirements", ())}
+        if matcher.match(record.text)[0] > 0 or keywords & requirements:
+            count += 1
+    return count
+
+
+def bench(rows: int) -> None:
+    formations, jobs = make_catalog_rows(rows)
+    catalog = CatalogSnapshot(formations, jobs)
+    for competences, interests in PROFILES:
+        records, candidates_json = legacy_candidates_json(catalog)
+        # Same prompt text around the candidates, so only the candidate block differs
+        base = build_gemini_prompt(GOAL, competences, interests, [], token_budget=0)
+        legacy_tokens = estimate_tokens(base) + estimate_tokens(candidates_json)
+
+        timings = []
+        for _ in range(20):
+            start = time.perf_counter()
+            selected = select_candidates(catalog, competences, interests, GOAL, 30)
+            timings.append((time.perf_counter() - start) * 1000)
+        candidates = [
+            {"id": r.id, "type": kind, "title": r.titre, "description": r.description or "",
+             "skills": list(getattr(r, "requirements", ()))}
+            for kind, r in selected
+        ]
+        prompt = build_gemini_prompt(GOAL, competences, interests, candidates)
+        sent_ids = {(c["type"], c["id"]) for c in json.loads(prompt.split("Candidates:\n")[1].split("\n\nTask:")[0])}
+        sent = [(kind, r) for kind, r in selected if (kind, r.id) in sent_ids]
+
+        print(f"{'+'.join(competences + interests):<40} | legacy {legacy_tokens:5d} tok, "
+              f"{relevant(records, competences, interests):2d}/{len(records)} relevant | "
+              f"prefilter {estimate_tokens(prompt):5d} tok, {relevant(sent, competences, interests):2d}/{len(sent)} relevant, "
+              f"{median(timings):6.2f} ms")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
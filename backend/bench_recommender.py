@@ -0,0 +1,91 @@
+"""
+Benchmark the keyword recommender on synthetic catalogs.
+Compares the legacy full scan (score_formation/score_job on every row) with
+the BM25 index used by recommend_keyword, and reports snapshot memory per row.
+"batch" is the per-profile cost of rank_catalog_batch over BATCH_PROFILES profiles.
+Run: python bench_recommender.py [rows ...]   (default: 1000 100000 1000000)
+"""
+import random
+import sys
+import time
+from statistics import median
+from app.core.catalog import CatalogSnapshot, FormationRecord, JobRecord
+from app.core.recommender import rank_scan, rank_catalog, rank_catalog_batch
+
+SKILLS = [
+    "python", "fastapi", "sql", "react", "javascript", "docker", "kubernetes", "java",
+    "spring", "flutter", "kotlin", "swift", "pandas", "tensorflow", "figma", "linux",
+    "aws", "azure", "git", "html", "css", "node.js", "c++", "c#", "php", "laravel",
+]
+WORDS = [f"mot{i}" for i in range(5000)]
+
+PROFILES = [
+    (["python", "sql"], ["docker"]),
+    (["react", "javascript", "css"], ["figma", "html"]),
+    (["java", "spring"], ["kubernetes", "aws", "linux"]),
+    (["pandas", "tensorflow", "python", "sql", "git"], ["azure"]),
+]
+
+BATCH_PROFILES = 100
+
+
+def make_catalog_rows(rows: int, seed: int = 42):
+    """Random formations and jobs, half of the rows each."""
+    rng = random.Random(seed)
+    formations, jobs = [], []
+    for i in range(rows // 2):
+        words = rng.sample(WORDS, 20) + rng.sample(SKILLS, 2)
+        rng.shuffle(words)
+        formations.append(FormationRecord(
+            id=i + 1,
+            titre=" ".join(words[:4]),
+            description=" ".join(words[4:]),
+        ))
+        jobs.append(JobRecord(
+            id=i + 1,
+            titre=" ".join(rng.sample(WORDS, 3)),
+            description=" ".join(rng.sample(WORDS, 15)),
+            requirements=rng.sample(SKILLS, 4),
+        ))
+    return formations, jobs
+
+
+def time_requests(func, repeat: int) -> float:
+    """Median latency of func() in milliseconds."""
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    return median(timings)
+
+
+def bench(rows: int) -> None:
+    formations, jobs = make_catalog_rows(rows)
+
+    start = time.perf_counter()
+    catalog = CatalogSnapshot(formations, jobs)
+    build_s = time.perf_counter() - start
+    bytes_per_row = catalog.memory_usage()["bytes_per_row"]
+
+    # The legacy scan takes seconds per request on big catalogs
+    scan_repeat = 20 if rows <= 10_000 else 3
+    scan_ms = time_requests(
+        lambda i: rank_scan(formations, jobs, *PROFILES[i % len(PROFILES)], top_n=5),
+        scan_repeat,
+    )
+    bm25_ms = time_requests(
+        lambda i: rank_catalog(catalog, *PROFILES[i % len(PROFILES)], top_n=5),
+        50,
+    )
+    batch = [(*PROFILES[i % len(PROFILES)], 5) for i in range(BATCH_PROFILES)]
+    batch_ms = time_requests(lambda i: rank_catalog_batch(catalog, batch), 5) / BATCH_PROFILES
+    print(f"{rows:>9} rows | build {build_s:6.2f} s | {bytes_per_row:7.1f} B/row | "
+          f"scan {scan_ms:9.2f} ms | bm25 {bm25_ms:8.2f} ms | x{scan_ms / bm25_ms:6.1f} | "
+          f"batch {batch_ms:6.2f} ms/profile")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 100_000, 1_000_000]
+    for size in sizes:
+        bench(size)
@@ -0,0 +1,124 @@
+"""
+Benchmark the cost of validating a Gemini skillpath response.
+Compares the previous handling (json.loads, then nested loops with .get()
+checks against the catalog) with the compiled Skillpath validator followed by
+the ID filter on the snapshot's ID maps, for bare JSON (structured output) and
+for a markdown-fenced response.
+Run: python bench_validation.py [steps]   (default: 7)
+"""
+import copy
+import json
+import sys
+import time
+from statistics import median
+from bench_recommender import make_catalog_rows
+from app.core.catalog import CatalogSnapshot
+from app.core.gemini_client import _parse_skillpath_text, parse_skillpath
+from app.routes.recommend import _valid_resources
+
+RUNS = 2000
+
+
+def make_response(steps: int) -> dict:
+    """Skillpath of the size Gemini returns: 3 resources per step, 5 jobs and formations."""
+    return {
+        "title": "Become a backend developer",
+        "summary": "A structured path to master backend development with Python and FastAPI.",
+        "steps": [
+            {
+                "id": f"step-{i}",
+                "title": f"Step {i}",
+                "duration_weeks": 2,
+                "progress_estimate": "beginner->intermediate",
+                "resources": [
+                    {"type": "formation", "id": i + 1, "titre": "Python", "url": None, "score": 0.9},
+                    {"type": "job", "id": 10_000_000 + i, "titre": "Unknown", "url": None, "score": 0.4},
+                    {"type": "external", "id": None, "titre": "Docs", "url": "https://docs.python.org", "score": 0.8},
+                ],
+                "explanation": "Master the fundamentals before moving to frameworks",
+            }
+            for i in range(steps)
+        ],
+        "recommended_jobs": [
+            {"id": i + 1, "titre": "Backend Developer", "score": 0.9, "match_reason": "Python backend skills"}
+            for i in range(5)
+        ],
+        "recommended_formations": [
+            {"id": i + 1, "titre": "FastAPI", "score": 0.8, "match_reason": "Builds REST APIs"}
+            for i in range(5)
+        ],
+    }
+
+
+def legacy(text: str, catalog: CatalogSnapshot) -> dict:
+    """Previous parsing and ID checks."""
+    skillpath = _parse_skillpath_text(text)
+    for step in skillpath.get("steps", []):
+        if "resources" in step:
+            valid_resources = []
+            for resource in step["resources"]:
+                if resource.get("type") == "formation" and resource.get("id"):
+                    if resource["id"] in catalog.formation_rows:
+                        valid_resources.append(resource)
+                elif resource.get("type") == "job" and resource.get("id"):
+                    if resource["id"] in catalog.job_rows:
+                        valid_resources.append(resource)
+                elif resource.get("type") == "external":
+                    valid_resources.append(resource)
+            step["resources"] = valid_resources
+    if "recommended_formations" in skillpath:
+        skillpath["recommended_formations"] = [
+            f for f in skillpath["recommended_formations"] if f.get("id") in catalog.formation_rows
+        ]
+    if "recommended_jobs" in skillpath:
+        skillpath["recommended_jobs"] = [
+            j for j in skillpath["recommended_jobs"] if j.get("id") in catalog.job_rows
+        ]
+    return skillpath
+
+
+def validated(text: str, catalog: CatalogSnapshot) -> dict:
+    """Compiled validation, then the ID filter used by the AI mode."""
+    skillpath = parse_skillpath(text)
+    for step in skillpath["steps"]:
+        step["resources"] = _valid_resources(step["resources"], catalog)
+    skillpath["recommended_formations"] = [
+        f for f in skillpath["recommended_formations"] if f["id"] in catalog.formation_rows
+    ]
+    skillpath["recommended_jobs"] = [
+        j for j in skillpath["recommended_jobs"] if j["id"] in catalog.job_rows
+    ]
+    return skillpath
+
+
+def time_us(func, text: str, catalog: CatalogSnapshot) -> float:
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        func(text, catalog)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    return median(timings)
+
+
+def bench(steps: int) -> None:
+    formations, jobs = make_catalog_rows(10_000)
+    catalog = CatalogSnapshot(formations, jobs)
+    response = make_response(steps)
+    bare = json.dumps(response)
+    fenced = "```json\n" + json.dumps(response, indent=2) + "\n```"
+    print(f"Skillpath with {steps} steps, {len(bare)} bytes, median of {RUNS} runs")
+    for name, text in (("bare JSON", bare), ("fenced", fenced)):
+        print(f"{name:<10} | legacy {time_us(legacy, text, catalog):7.1f} us | "
+              f"validated {time_us(validated, text, catalog):7.1f} us")
+    # Malformed resources are rejected by validation, where the loops passed them on
+    broken = copy.deepcopy(response)
+    broken["steps"][0]["resources"].append({"type": "external", "score": "high"})
+    try:
+        parse_skillpath(json.dumps(broken))
+        print("malformed  | accepted")
+    except ValueError as e:
+        print(f"malformed  | rejected: {str(e).splitlines()[0]}")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 7)
@@ -0,0 +1,299 @@
+"""
+Local stand-in for the Gemini API, for load and latency testing of AI mode.
+Serves generateContent and streamGenerateContent (SSE) with recorded or
+templated skillpaths, configurable latency, errors, 429 bursts and malformed
+output. Point the backend at it:
+    GEMINI_API_URL=http://127.0.0.1:8090/v1beta/models/gemini-1.5-flash:generateContent
+    GEMINI_API_KEY=standin
+Settings are read from STANDIN_* environment variables (see StandInSettings).
+Run: python gemini_standin.py
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+MALFORMED_KINDS = ("truncated", "prose", "schema")
+
+
+class StandInSettings:
+    """
+    Behaviour of the stand-in, from STANDIN_* environment variables:
+
+        STANDIN_HOST, STANDIN_PORT       address to listen on (127.0.0.1:8090)
+        STANDIN_RESPONSES                JSON file of recorded responses (a list of
+                                         skillpath objects or raw response texts);
+                                         templated from the prompt when unset
+        STANDIN_LATENCY_MS               median latency of a response (0)
+        STANDIN_LATENCY_DIST             fixed, uniform, exponential or lognormal
+        STANDIN_LATENCY_SPREAD           uniform: +/- fraction of the median;
+                                         lognormal: sigma (0.5)
+        STANDIN_FIRST_CHUNK_FRACTION     share of the latency before the first
+                                         streamed chunk (0.25)
+        STANDIN_STREAM_CHUNK             characters per streamed chunk (40)
+        STANDIN_ERROR_RATE               share of HTTP 500 responses (0)
+        STANDIN_MALFORMED_RATE           share of 200 responses with truncated JSON,
+                                         prose or wrong field types (0)
+        STANDIN_BURST_EVERY              seconds between 429 bursts (0: no bursts)
+        STANDIN_BURST_SECONDS            length of a burst (5)
+        STANDIN_RETRY_AFTER              Retry-After header during a burst (empty: none)
+        STANDIN_SEED                     random seed, for reproducible runs
+    """
+
+    def __init__(self, **overrides):
+        env = os.getenv
+        self.host = env("STANDIN_HOST", "127.0.0.1")
+        self.port = int(env("STANDIN_PORT", "8090"))
+        self.responses_path = env("STANDIN_RESPONSES", "")
+        self.latency_ms = float(env("STANDIN_LATENCY_MS", "0"))
+        self.latency_dist = env("STANDIN_LATENCY_DIST", "fixed")
+        self.latency_spread = float(env("STANDIN_LATENCY_SPREAD", "0.5"))
+        self.first_chunk_fraction = float(env("STANDIN_FIRST_CHUNK_FRACTION", "0.25"))
+        self.stream_chunk = int(env("STANDIN_STREAM_CHUNK", "40"))
+        self.error_rate = float(env("STANDIN_ERROR_RATE", "0"))
+        self.malformed_rate = float(env("STANDIN_MALFORMED_RATE", "0"))
+        self.burst_every = float(env("STANDIN_BURST_EVERY", "0"))
+        self.burst_seconds = float(env("STANDIN_BURST_SECONDS", "5"))
+        self.retry_after = env("STANDIN_RETRY_AFTER", "")
+        seed = env("STANDIN_SEED", "")
+        self.seed = int(seed) if seed else None
+        for name, value in overrides.items():
+            if not hasattr(self, name):
+                raise TypeError(f"Unknown stand-in setting: {name}")
+            setattr(self, name, value)
+        if self.latency_dist not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"STANDIN_LATENCY_DIST must be one of {', '.join(LATENCY_DISTRIBUTIONS)}")
+
+
+def load_responses(path: str) -> List[str]:
+    """Recorded response texts: skillpath objects are serialized, strings kept as is."""
+    with open(path, encoding="utf-8") as f:
+        recorded = json.load(f)
+    if not isinstance(recorded, list) or not recorded:
+        raise ValueError(f"{path} must hold a non-empty JSON list of responses")
+    return [item if isinstance(item, str) else json.dumps(item) for item in recorded]
+
+
+def _prompt_candidates(prompt: str) -> List[Dict]:
+    """Candidates listed in a prompt from build_gemini_prompt."""
+    match = re.search(r"Candidates:\n(.*?)\n\nTask:", prompt, re.S)
+    if not match:
+        return []
+    try:
+        candidates = json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return []
+    return [c for c in candidates if isinstance(c, dict) and isinstance(c.get("id"), int)]
+
+
+def template_skillpath(prompt: str) -> Dict:
+    """Skillpath built from the prompt's goal and candidates, the same for the same prompt."""
+    rng = random.Random(hashlib.sha256(prompt.encode()).digest())
+    goal_match = re.search(r'"goal": "(.*)"', prompt)
+    goal = goal_match.group(1) if goal_match else "your goal"
+    candidates = _prompt_candidates(prompt)
+    formations = [c for c in candidates if c.get("type") == "formation"]
+    jobs = [c for c in candidates if c.get("type") == "job"]
+
+    def resource(candidate: Dict) -> Dict:
+        return {"type": candidate["type"], "id": candidate["id"], "titre": candidate.get("title", ""),
+                "url": None, "score": round(rng.uniform(0.5, 1.0), 2)}
+
+    def recommended(candidate: Dict) -> Dict:
+        return {"id": candidate["id"], "titre": candidate.get("title", ""),
+                "score": round(rng.uniform(0.5, 1.0), 2), "match_reason": f"Relevant to {goal}"}
+
+    steps = []
+    for i in range(rng.randint(3, 6)):
+        resources = [resource(c) for c in formations[i * 2:i * 2 + 2]]
+        if not resources:
+            resources = [{"type": "external", "id": None, "titre": "Documentation",
+                          "url": "https://example.com/docs", "score": 0.7}]
+        steps.append({
+            "id": f"step-{i + 1}",
+            "title": f"Stage {i + 1} towards {goal}"[:60],
+            "duration_weeks": rng.randint(1, 6),
+            "progress_estimate": "beginner->intermediate" if i < 2 else "intermediate->advanced",
+            "resources": resources,
+            "explanation": "Builds on the previous step",
+        })
+    return {
+        "title": f"Path to {goal}"[:60],
+        "summary": f"A {len(steps)}-step roadmap towards {goal}.",
+        "steps": steps,
+        "recommended_jobs": [recommended(c) for c in jobs[:5]],
+        "recommended_formations": [recommended(c) for c in formations[:5]],
+    }
+
+
+class StandIn:
+    """Chooses the outcome, latency and text of each call and counts them."""
+
+    def __init__(self, settings: StandInSettings):
+        self.settings = settings
+        self.rng = random.Random(settings.seed)
+        self.recorded = load_responses(settings.responses_path) if settings.responses_path else None
+        self.started = time.monotonic()
+        self.counts = {"requests": 0, "ok": 0, "errors": 0, "throttled": 0, "malformed": 0}
+
+    def latency(self) -> float:
+        """Seconds to wait for one response, drawn from the configured distribution."""
+        s = self.settings
+        median = s.latency_ms / 1000
+        if median <= 0 or s.latency_dist == "fixed":
+            return max(median, 0.0)
+        if s.latency_dist == "uniform":
+            return median * self.rng.uniform(1 - s.latency_spread, 1 + s.latency_spread)
+        if s.latency_dist == "exponential":
+            # Median of an exponential distribution is ln(2) / rate
+            return self.rng.expovariate(math.log(2) / median)
+        return self.rng.lognormvariate(math.log(median), s.latency_spread)
+
+    def in_burst(self) -> bool:
+        s = self.settings
+        if s.burst_every <= 0:
+            return False
+        return (time.monotonic() - self.started) % s.burst_every >= s.burst_every - s.burst_seconds
+
+    def outcome(self) -> str:
+        """Outcome of the next call: throttled, errors, malformed or ok."""
+        self.counts["requests"] += 1
+        if self.in_burst():
+            kind = "throttled"
+        elif self.rng.random() < self.settings.error_rate:
+            kind = "errors"
+        elif self.rng.random() < self.settings.malformed_rate:
+            kind = "malformed"
+        else:
+            kind = "ok"
+        self.counts[kind] += 1
+        return kind
+
+    def response_text(self, prompt: str, body: Dict, malformed: bool) -> str:
+        if self.recorded:
+            # Same prompt, same recording
+            digest = hashlib.sha256(prompt.encode()).digest()
+            text = self.recorded[int.from_bytes(digest[:4], "big") % len(self.recorded)]
+        else:
+            text = json.dumps(template_skillpath(prompt))
+        if malformed:
+            kind = self.rng.choice(MALFORMED_KINDS)
+            if kind == "truncated":
+                text = text[:len(text) // 2]
+            elif kind == "prose":
+                text = "I'm sorry, I can only describe the skillpath in words."
+            else:
+                text = json.dumps({"title": 42, "steps": "learn things", "recommended_jobs": {}})
+        elif "responseMimeType" not in body.get("generationConfig", {}):
+            # Without structured output Gemini usually wraps JSON in markdown fences
+            text = f"```json\n{text}\n```"
+        return text
+
+    def throttled_response(self) -> JSONResponse:
+        headers = {"Retry-After": self.settings.retry_after} if self.settings.retry_after else {}
+        return JSONResponse(
+            {"error": {"code": 429, "message": "Resource has been exhausted", "status": "RESOURCE_EXHAUSTED"}},
+            status_code=429, headers=headers
+        )
+
+    @staticmethod
+    def error_response() -> JSONResponse:
+        return JSONResponse(
+            {"error": {"code": 500, "message": "Internal error", "status": "INTERNAL"}},
+            status_code=500
+        )
+
+
+def _prompt_text(body: Dict) -> str:
+    return "".join(
+        part.get("text", "")
+        for content in body.get("contents", [])
+        for part in content.get("parts", [])
+    )
+
+
+def _candidate(text: str, finish_reason: Optional[str] = None) -> Dict:
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}}
+    if finish_reason:
+        candidate["finishReason"] = finish_reason
+    return {"candidates": [candidate]}
+
+
+def create_app(settings: Optional[StandInSettings] = None) -> FastAPI:
+    """Stand-in app; GET /standin/stats returns call counts by outcome."""
+    stand_in = StandIn(settings or StandInSettings())
+    app = FastAPI(title="Gemini stand-in")
+
+    @app.post("/v1beta/models/{model}:generateContent")
+    async def generate_content(model: str, request: Request):
+        body = await request.json()
+        outcome = stand_in.outcome()
+        if outcome == "throttled":
+            return stand_in.throttled_response()
+        await asyncio.sleep(stand_in.latency())
+        if outcome == "errors":
+            return stand_in.error_response()
+        text = stand_in.response_text(_prompt_text(body), body, outcome == "malformed")
+        return _candidate(text, "STOP")
+
+    @app.post("/v1beta/models/{model}:streamGenerateContent")
+    async def stream_generate_content(model: str, request: Request):
+        body = await request.json()
+        outcome = stand_in.outcome()
+        if outcome == "throttled":
+            return stand_in.throttled_response()
+        latency = stand_in.latency()
+        if outcome == "errors":
+            await asyncio.sleep(latency)
+            return stand_in.error_response()
+        text = stand_in.response_text(_prompt_text(body), body, outcome == "malformed")
+        size = stand_in.settings.stream_chunk
+        chunks = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+        first_wait = latency * stand_in.settings.first_chunk_fraction
+        chunk_wait = (latency - first_wait) / max(len(chunks) - 1, 1)
+
+        async def events():
+            await asyncio.sleep(first_wait)
+            for i, chunk in enumerate(chunks):
+                if i:
+                    await asyncio.sleep(chunk_wait)
+                last = i == len(chunks) - 1
+                data = _candidate(chunk, "STOP" if last else None)
+                yield f"data: {json.dumps(data)}\r\n\r\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/standin/stats")
+    async def stats():
+        return {**stand_in.counts, "in_burst": stand_in.in_burst()}
+
+    return app
+
+
+def start_in_thread(settings: StandInSettings) -> uvicorn.Server:
+    """Serve the stand-in from a background thread (benchmarks and scripts)."""
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(settings), host=settings.host, port=settings.port, log_level="warning"
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+if __name__ == "__main__":
+    settings = StandInSettings()
+    print(f"Gemini stand-in on http://{settings.host}:{settings.port}"
+          f"/v1beta/models/<model>:generateContent")
+    uvicorn.run(create_app(settings), host=settings.host, port=settings.port, log_level="warning")
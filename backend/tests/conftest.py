@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The app modules create their engines at import time: point them at SQLite
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("DB_PROFILE", "test")
+os.environ.setdefault("MOCK_MODE", "true")
+os.environ.setdefault("PROMPT_CACHE_PATH", "")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,31 @@
+import asyncio
+from app.core import catalog as catalog_module
+from app.core import scoring_executor
+from app.core.catalog import CatalogSnapshot, FormationRecord
+from app.core.catalog_events import CatalogEvent, publish
+
+
+def formation_ids(catalog: CatalogSnapshot):
+    return sorted(catalog.formation_rows)
+
+
+def test_process_pool_scores_older_snapshot_after_workers_moved_on(monkeypatch):
+    monkeypatch.setattr(scoring_executor, "SCORING_EXECUTOR", "process")
+    monkeypatch.setattr(scoring_executor, "SCORING_WORKERS", 1)
+    monkeypatch.setattr(scoring_executor, "SCORING_INLINE_THRESHOLD", 0)
+    v1 = CatalogSnapshot([FormationRecord(1, "Python", None)], [], version=1)
+    monkeypatch.setattr(catalog_module, "_catalog", v1)
+
+    async def scenario():
+        try:
+            assert await scoring_executor.run_scoring(formation_ids, v1) == [1]
+            publish(CatalogEvent("formation", "upsert", 2, {"titre": "SQL", "description": None}))
+            v2 = catalog_module.peek_catalog()
+            assert v2.version == 2
+            assert await scoring_executor.run_scoring(formation_ids, v2) == [1, 2]
+            # A request still holding v1 (e.g. /batch) is scored, not failed
+            assert await scoring_executor.run_scoring(formation_ids, v1) == [1]
+        finally:
+            scoring_executor.shutdown_scoring()
+
+    asyncio.run(scenario())
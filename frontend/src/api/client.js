@@ -5,12 +5,26 @@ const api = axios.create({
     // No default Content-Type; Axios will set appropriate headers per request
 });
 
+// Signed time of our last write: sent back so our reads see our own writes
+let lastWrite = null;
+
 api.interceptors.request.use((config) => {
     const token = localStorage.getItem('token');
     if (token) {
         config.headers.Authorization = `Bearer ${token}`;
     }
+    if (lastWrite) {
+        config.headers['X-Last-Write'] = lastWrite;
+    }
     return config;
 });
 
+api.interceptors.response.use((response) => {
+    const written = response.headers['x-last-write'];
+    if (written) {
+        lastWrite = written;
+    }
+    return response;
+});
+
 export default api;